@@ -12,6 +12,7 @@ BLAND_AI_API_KEY = os.getenv('BLAND_AI_API_KEY')
 INFURA_API_KEY = os.getenv('INFURA_API_KEY')
 BINANCE_API_KEY = os.getenv('BINANCE_API_KEY')
 BINANCE_API_SECRET = os.getenv('BINANCE_API_SECRET')
+COINGECKO_BASE_URL = os.getenv('COINGECKO_BASE_URL', 'https://api.coingecko.com')
 
 # Wallet Configuration
 WALLET_ADDRESS = os.getenv('WALLET_ADDRESS')
@@ -22,6 +23,23 @@ UNUSED_BALANCE_THRESHOLD = 0.5  # 50% above average monthly spending
 MIN_INVESTMENT_AMOUNT = 100  # Minimum amount to consider for investment
 MAX_INVESTMENT_AMOUNT = 10000  # Maximum amount for a single investment
 
+# Safety Net Estimation
+SAFETY_NET_METHOD = os.getenv('SAFETY_NET_METHOD', 'monte_carlo')  # monte_carlo or fixed (3 months of spending)
+SAFETY_NET_CONFIDENCE = float(os.getenv('SAFETY_NET_CONFIDENCE', '0.95'))  # share of simulated paths covered
+SAFETY_NET_HORIZON_DAYS = int(os.getenv('SAFETY_NET_HORIZON_DAYS', '90'))
+SAFETY_NET_HISTORY_DAYS = int(os.getenv('SAFETY_NET_HISTORY_DAYS', '90'))  # days of history bootstrapped
+SAFETY_NET_PATHS = int(os.getenv('SAFETY_NET_PATHS', '2000'))
+SAFETY_NET_MIN_MONTHS = float(os.getenv('SAFETY_NET_MIN_MONTHS', '1'))  # floor in months of average spending
+SAFETY_NET_SEED = int(os.getenv('SAFETY_NET_SEED', '0'))  # per-wallet streams derive from it, so estimates repeat
+SAFETY_NET_SCAN_HOUR = int(os.getenv('SAFETY_NET_SCAN_HOUR', '2'))  # local hour of the nightly batch estimate
+
+# Portfolio Allocation
+PORTFOLIO_METHOD = os.getenv('PORTFOLIO_METHOD', 'risk_parity')  # risk_parity or mean_variance
+PORTFOLIO_MEMECOIN_CAP = float(os.getenv('PORTFOLIO_MEMECOIN_CAP', '0.1'))  # upper cap on memecoins in total; no minimum
+PORTFOLIO_MAX_WEIGHT = float(os.getenv('PORTFOLIO_MAX_WEIGHT', '0.5'))  # largest share of any single asset
+PORTFOLIO_RISK_AVERSION = float(os.getenv('PORTFOLIO_RISK_AVERSION', '5'))  # mean_variance only
+PORTFOLIO_LOOKBACK_DAYS = int(os.getenv('PORTFOLIO_LOOKBACK_DAYS', '30'))  # days of candles behind the covariance
+
 # Blockchain Configuration
 ETHEREUM_RPC_URL = f"https://mainnet.infura.io/v3/{INFURA_API_KEY}"
 BITCOIN_RPC_URL = os.getenv('BITCOIN_RPC_URL')
@@ -29,6 +47,77 @@ BITCOIN_RPC_URL = os.getenv('BITCOIN_RPC_URL')
 # Voice Call Configuration
 CALLBACK_URL = os.getenv('CALLBACK_URL')
 USER_PHONE_NUMBER = os.getenv('USER_PHONE_NUMBER')
+USER_PHONE_NUMBERS = [n.strip() for n in os.getenv('USER_PHONE_NUMBERS', USER_PHONE_NUMBER or '').split(',') if n.strip()]
+# Each user's wallet as comma-separated phone=wallet_id pairs; required with more than one user
+USER_WALLETS = {
+    phone.strip(): wallet_id.strip()
+    for phone, wallet_id in (pair.split('=', 1) for pair in os.getenv('USER_WALLETS', '').split(',') if '=' in pair)
+}
+BLAND_AI_BASE_URL = os.getenv('BLAND_AI_BASE_URL', 'https://api.bland.ai')  # point at a local stand-in for load tests
+BLAND_AI_RATE_LIMIT = float(os.getenv('BLAND_AI_RATE_LIMIT', '5'))  # outbound calls per second
+BLAND_AI_BURST = int(os.getenv('BLAND_AI_BURST', '10'))
+BLAND_AI_RATE_LIMIT_DB_PATH = os.getenv('BLAND_AI_RATE_LIMIT_DB_PATH', 'data/rate_limits.db')  # shared by all workers
+BLAND_AI_TIMEOUT = float(os.getenv('BLAND_AI_TIMEOUT', '30'))  # seconds
+BLAND_AI_MAX_RETRIES = int(os.getenv('BLAND_AI_MAX_RETRIES', '3'))
 
 # Database Configuration
-DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///data/wallet_monitor.db') 
\ No newline at end of file
+DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///data/wallet_monitor.db')
+
+# LLM Response Cache Configuration
+LLM_CACHE_MAX_ENTRIES = int(os.getenv('LLM_CACHE_MAX_ENTRIES', '1024'))
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '3600'))  # seconds
+LLM_CACHE_DB_PATH = os.getenv('LLM_CACHE_DB_PATH')  # e.g. data/llm_cache.db; in-memory only if unset
+
+# LLM Gateway Configuration
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))  # seconds per call, including retries
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+LLM_HEDGE_AFTER = float(os.getenv('LLM_HEDGE_AFTER')) if os.getenv('LLM_HEDGE_AFTER') else None  # seconds
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv('LLM_PROMPT_TOKEN_BUDGET', '2000'))  # estimated tokens per prompt
+LLM_BATCH_MAX_SIZE = int(os.getenv('LLM_BATCH_MAX_SIZE', '8'))  # transcripts per analysis call; 1 disables batching
+LLM_BATCH_MAX_WAIT = float(os.getenv('LLM_BATCH_MAX_WAIT', '0.2'))  # seconds a transcript may wait for a batch
+
+# Webhook Job Queue Configuration
+JOB_QUEUE_DB_PATH = os.getenv('JOB_QUEUE_DB_PATH', 'data/jobs.db')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '4'))
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', '3'))
+JOB_RETRY_BACKOFF = float(os.getenv('JOB_RETRY_BACKOFF', '5'))  # seconds, doubled on each retry
+JOB_RETENTION = int(os.getenv('JOB_RETENTION', '604800'))  # seconds done and dead jobs are kept (7 days)
+WEBHOOK_REDELIVERY_WINDOW = int(os.getenv('WEBHOOK_REDELIVERY_WINDOW', '86400'))  # seconds Bland AI may redeliver a webhook
+
+# Call Session Configuration
+CALL_SESSION_DB_PATH = os.getenv('CALL_SESSION_DB_PATH', 'data/call_sessions.db')
+CALL_SESSION_TTL = int(os.getenv('CALL_SESSION_TTL', '172800'))  # seconds (2 days)
+CALL_SESSION_ANALYSIS_TTL = int(os.getenv('CALL_SESSION_ANALYSIS_TTL', '600'))  # seconds a stored market analysis is reused
+
+# Per-user Check Scheduling
+USER_CHECK_INTERVAL = float(os.getenv('USER_CHECK_INTERVAL', '604800'))  # seconds (7 days); only a safety sweep, wallet changes trigger checks
+USER_CHECK_JITTER = float(os.getenv('USER_CHECK_JITTER', '0.1'))  # fraction of the interval
+USER_CHECK_INITIAL_SPREAD = float(os.getenv('USER_CHECK_INITIAL_SPREAD', '300'))  # spread first checks over this many seconds
+USER_CHECK_BATCH_SIZE = int(os.getenv('USER_CHECK_BATCH_SIZE', '50'))
+USER_CHECK_WORKERS = int(os.getenv('USER_CHECK_WORKERS', '8'))
+
+# Wallet Change Tracking
+WALLET_CHANGE_DEBOUNCE = float(os.getenv('WALLET_CHANGE_DEBOUNCE', '30'))  # seconds of quiet before re-evaluating
+WALLET_CHANGE_MAX_DELAY = float(os.getenv('WALLET_CHANGE_MAX_DELAY', '300'))
+WALLET_BALANCE_CHANGE_THRESHOLD = float(os.getenv('WALLET_BALANCE_CHANGE_THRESHOLD', '0.05'))  # 5% balance move
+WALLET_SPENDING_CHANGE_THRESHOLD = float(os.getenv('WALLET_SPENDING_CHANGE_THRESHOLD', '0.1'))  # 10% monthly spending move
+
+# Multi-worker Deployment
+LEADER_LEASE_DB_PATH = os.getenv('LEADER_LEASE_DB_PATH', 'data/leader.db')  # must be shared by all workers
+LEADER_LEASE_TTL = float(os.getenv('LEADER_LEASE_TTL', '30'))  # seconds before a dead leader is replaced
+
+# Tracing
+TRACE_EXPORT_PATH = os.getenv('TRACE_EXPORT_PATH', 'logs/traces.jsonl')
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '0.1'))  # fraction of runs traced end to end
+
+# Metrics
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR')  # shared by gunicorn workers so /metrics covers all of them
+
+# Conversation Logging
+CONVERSATION_LOG_JOURNAL = os.getenv('CONVERSATION_LOG_JOURNAL', 'true').lower() == 'true'  # append-only JSONL
+CONVERSATION_LOG_FSYNC = os.getenv('CONVERSATION_LOG_FSYNC', 'interval')  # always, interval or never
+CONVERSATION_ARCHIVE_DB_PATH = os.getenv('CONVERSATION_ARCHIVE_DB_PATH', 'data/conversations.db')  # indexed, searchable history
+CONVERSATION_LOG_ARCHIVE_DIR = os.getenv('CONVERSATION_LOG_ARCHIVE_DIR', 'logs/archive')  # compressed segments of closed conversations
+CONVERSATION_LOG_SEGMENT_SECONDS = int(os.getenv('CONVERSATION_LOG_SEGMENT_SECONDS', '3600'))  # one segment per hour
+CONVERSATION_LOG_RETENTION_DAYS = float(os.getenv('CONVERSATION_LOG_RETENTION_DAYS', '90'))  # 0 keeps segments forever
@@ -3,7 +3,8 @@ from src.wallet_monitor import WalletMonitor
 from src.investment_analyzer import InvestmentAnalyzer
 from src.voice_interaction import VoiceInteraction
 from src.conversation_logger import ConversationLogger
-import requests
+from src.conversation_archive import ConversationArchive
+from src.call_dispatcher import CallDispatcher
 import logging
 from config.config import *
 import os
@@ -12,50 +13,31 @@ import os
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+call_dispatcher = CallDispatcher(
+    BLAND_AI_API_KEY,
+    base_url=BLAND_AI_BASE_URL,
+    rate_per_second=BLAND_AI_RATE_LIMIT,
+    burst=BLAND_AI_BURST,
+    timeout=BLAND_AI_TIMEOUT,
+    max_retries=BLAND_AI_MAX_RETRIES,
+    rate_limit_db_path=BLAND_AI_RATE_LIMIT_DB_PATH
+)
+
 def make_bland_ai_call(script):
     """Make a call using Bland AI"""
-    try:
-        url = "https://api.bland.ai/v1/calls"
-        
-        headers = {
-            "Authorization": f"Bearer {BLAND_AI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        # Get phone number and webhook URL from environment variables
-        phone_number = os.getenv('USER_PHONE_NUMBER')
-        webhook_url = os.getenv('CALLBACK_URL')
-        
-        data = {
-            "phone_number": phone_number,
-            "task": script,
-            "webhook_url": webhook_url,
-            "model": "enhanced"  # Use enhanced model for better voice quality
-        }
-        
-        logger.info(f"Making call to {phone_number}")
-        logger.info(f"Using webhook URL: {webhook_url}")
-        logger.info(f"Using API key: {BLAND_AI_API_KEY[:10]}...")
-        
-        response = requests.post(url, headers=headers, json=data)
-        
-        logger.info(f"API Response Status: {response.status_code}")
-        logger.info(f"API Response Headers: {response.headers}")
-        logger.info(f"API Response Body: {response.text}")
-        
-        response.raise_for_status()
-        
-        call_data = response.json()
-        logger.info(f"Call initiated successfully. Response: {call_data}")
-        return call_data.get('call_id')
-        
-    except requests.exceptions.HTTPError as e:
-        logger.error(f"HTTP Error making Bland AI call: {e}")
-        logger.error(f"Response text: {e.response.text if hasattr(e, 'response') else 'No response text'}")
-        return None
-    except Exception as e:
-        logger.error(f"Error making Bland AI call: {e}")
+    # Get phone number and webhook URL from environment variables
+    phone_number = os.getenv('USER_PHONE_NUMBER')
+    webhook_url = os.getenv('CALLBACK_URL')
+    
+    logger.info(f"Making call to {phone_number}")
+    logger.info(f"Using webhook URL: {webhook_url}")
+    
+    # Use enhanced model for better voice quality
+    call_data = call_dispatcher.place_call(phone_number, script, webhook_url=webhook_url, model='enhanced')
+    if call_data is None:
         return None
+    logger.info(f"Call initiated successfully. Response: {call_data}")
+    return call_data.get('call_id')
 
 def run_demo():
     print("🚀 Starting AI Wallet Monitor Demo")
@@ -65,7 +47,11 @@ def run_demo():
     wallet_monitor = WalletMonitor()
     investment_analyzer = InvestmentAnalyzer()
     voice_interaction = VoiceInteraction()
-    conversation_logger = ConversationLogger()
+    conversation_logger = ConversationLogger(
+        journal=CONVERSATION_LOG_JOURNAL,
+        fsync=CONVERSATION_LOG_FSYNC,
+        archive=ConversationArchive(CONVERSATION_ARCHIVE_DB_PATH)
+    )
     
     # Get current POL price
     pol_price = investment_analyzer.get_pol_price()
@@ -148,6 +134,7 @@ def run_demo():
                 print(f"   Risk Level: {suggestion['risk_level']}")
                 print(f"   24h Return: {suggestion['daily_return']*100:.2f}%")
                 print(f"   24h Volume: {suggestion['volume_in_pol']:,.2f} POL (${suggestion['volume']:,.2f})")
+                print(f"   Suggested Allocation: {suggestion['allocation']:.1%} ({suggestion['allocation_pol']:.2f} POL)")
             
             # Print memecoin investments if any
             memecoins = [s for s in suggestions if s.get('is_memecoin', False)]
@@ -159,6 +146,7 @@ def run_demo():
                     print(f"   Risk Level: {suggestion['risk_level']}")
                     print(f"   24h Return: {suggestion['daily_return']*100:.2f}%")
                     print(f"   24h Volume: {suggestion['volume_in_pol']:,.2f} POL (${suggestion['volume']:,.2f})")
+                    print(f"   Suggested Allocation: {suggestion['allocation']:.1%} ({suggestion['allocation_pol']:.2f} POL)")
                     if suggestion['risk_warning']:
                         print(f"   {suggestion['risk_warning']}")
             
@@ -237,6 +225,9 @@ def run_demo():
         msg = "No unused funds detected at this time"
         print(f"\nℹ️ {msg}")
         conversation_logger.log_interaction("system", msg, {"type": "no_unused_funds"})
+        
+    # Compact the journal into the conversation's JSON document
+    conversation_logger.close()
 
 if __name__ == "__main__":
     run_demo() 
\ No newline at end of file
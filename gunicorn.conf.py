@@ -0,0 +1,23 @@
+# Multi-worker runtime: gunicorn -c gunicorn.conf.py src.main:app
+# Every worker serves webhooks and drains the shared job queue; the scheduler
+# lease in LEADER_LEASE_DB_PATH makes sure only one of them schedules calls.
+import multiprocessing
+import os
+from pathlib import Path
+
+bind = os.getenv('BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+timeout = 60
+
+# Workers share metric snapshots here so whichever one answers /metrics reports them all
+os.environ.setdefault('METRICS_MULTIPROC_DIR', 'data/metrics')
+
+def on_starting(server):
+    """Drop metric snapshots left by a previous run"""
+    for path in Path(os.environ['METRICS_MULTIPROC_DIR']).glob('metrics-*.json'):
+        path.unlink()
+
+def post_worker_init(worker):
+    """Start the job workers and the scheduler election in each worker process"""
+    from src.main import start_services
+    start_services()
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from src.fake_services import FakeModel
+from src.llm_gateway import LLMGateway
+
+
+def measure_latency(gateway, num_requests=200, prompt="benchmark prompt"):
+    """Fire num_requests concurrent calls through the gateway and report latency percentiles"""
+    async def timed_call(i):
+        start = time.perf_counter()
+        try:
+            await gateway.agenerate(f"{prompt} {i}")
+            ok = True
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+        
+    async def run_all():
+        return await asyncio.gather(*(timed_call(i) for i in range(num_requests)))
+        
+    started = time.perf_counter()
+    results = asyncio.run_coroutine_threadsafe(run_all(), gateway._loop).result()
+    elapsed = time.perf_counter() - started
+    
+    latencies = sorted(latency for latency, ok in results if ok)
+    errors = sum(1 for _, ok in results if not ok)
+    if not latencies:
+        return {'requests': num_requests, 'errors': errors}
+        
+    def percentile(pct):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+        
+    return {
+        'requests': num_requests,
+        'errors': errors,
+        'throughput_rps': num_requests / elapsed,
+        'p50': percentile(50),
+        'p99': percentile(99),
+        'hedges_sent': gateway.hedges_sent,
+        'retries': gateway.retries
+    }
+
+
+if __name__ == "__main__":
+    # python llm_benchmark.py
+    for hedge_after in (None, 0.4):
+        gateway = LLMGateway(FakeModel(failure_rate=0.02), max_concurrency=16,
+                             timeout=10.0, hedge_after=hedge_after)
+        print(f"hedge_after={hedge_after}: {measure_latency(gateway)}")
+        gateway.close()
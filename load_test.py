@@ -0,0 +1,305 @@
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+from src.fake_services import FakeExchange, LatencyProfile, RemoteGeminiModel, start_fake_services
+
+# Mix of transcripts: some the local parser answers, the rest go to (fake) Gemini
+TRANSCRIPTS = [
+    "user: No thanks, I'm not interested.",
+    "user: Yes, let's put 100 POL into BTC.",
+    "user: Hmm, I'm not sure. What are the risks with Solana right now?",
+    "user: Maybe later, can you tell me more about how the fees work?",
+    "user: I think I'd go with ethereum but how much would you recommend?",
+    "assistant: That's 100 POL in BTC. Please say the confirmation word to confirm.\nuser: rates, 100 in BTC",
+    "user: Sounds interesting, but I have a few questions first about volatility."
+]
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+class Recorder:
+    def __init__(self):
+        """Collect (latency, ok) samples per endpoint"""
+        self.samples = defaultdict(list)
+        self._lock = threading.Lock()
+        
+    def add(self, name, latency, ok):
+        """Record one request"""
+        with self._lock:
+            self.samples[name].append((latency, ok))
+            
+    def report(self, elapsed):
+        """Throughput, latency percentiles and error rate per endpoint"""
+        rows = []
+        for name, samples in sorted(self.samples.items()):
+            latencies = [latency for latency, _ in samples]
+            errors = sum(1 for _, ok in samples if not ok)
+            rows.append({
+                'name': name,
+                'count': len(samples),
+                'throughput': len(samples) / elapsed if elapsed else 0.0,
+                'p50': percentile(latencies, 0.50),
+                'p95': percentile(latencies, 0.95),
+                'p99': percentile(latencies, 0.99),
+                'error_rate': errors / len(samples)
+            })
+        return rows
+
+
+def stage_report(trace_path):
+    """Latency percentiles and error rate per traced stage"""
+    spans = defaultdict(list)
+    if os.path.exists(trace_path):
+        with open(trace_path) as f:
+            for line in f:
+                span = json.loads(line)
+                spans[span['name']].append(span)
+    rows = []
+    for name, items in sorted(spans.items()):
+        durations = [span['duration'] for span in items]
+        rows.append({
+            'name': name,
+            'count': len(items),
+            'p50': percentile(durations, 0.50),
+            'p95': percentile(durations, 0.95),
+            'p99': percentile(durations, 0.99),
+            'error_rate': sum(1 for span in items if span['error']) / len(items)
+        })
+    return rows
+
+
+def print_table(title, rows):
+    """Print a report section"""
+    print(f"\n{title}")
+    print(f"{'name':<42} {'count':>6} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for row in rows:
+        rps = f"{row['throughput']:8.1f}" if 'throughput' in row else f"{'':>8}"
+        print(f"{row['name']:<42} {row['count']:>6} {rps} {row['p50'] * 1000:9.1f} "
+              f"{row['p95'] * 1000:9.1f} {row['p99'] * 1000:9.1f} {row['error_rate']:7.1%}")
+
+
+def synthetic_phone(i):
+    """Phone number of the i-th synthetic user"""
+    return f"+1555{i:07d}"
+
+
+def configure_environment(args, workdir, services):
+    """Point the app at the fakes and a scratch directory; must run before src.main is imported"""
+    os.environ.update({
+        'BLAND_AI_API_KEY': 'load-test',
+        'BLAND_AI_BASE_URL': services['bland_ai'].url,
+        'BLAND_AI_RATE_LIMIT': str(args.bland_rate_limit),
+        'BLAND_AI_BURST': str(args.bland_rate_limit),
+        'COINGECKO_BASE_URL': services['coingecko'].url,
+        'GEMINI_API_KEY': 'load-test',
+        'CALLBACK_URL': 'http://127.0.0.1/webhook/bland-ai',
+        'USER_PHONE_NUMBER': '+15550000000',
+        'USER_WALLETS': ','.join(f"{synthetic_phone(i)}=load-test-{i}" for i in range(args.users)),
+        'JOB_QUEUE_DB_PATH': os.path.join(workdir, 'jobs.db'),
+        'JOB_WORKERS': str(args.job_workers),
+        'CALL_SESSION_DB_PATH': os.path.join(workdir, 'call_sessions.db'),
+        'LEADER_LEASE_DB_PATH': os.path.join(workdir, 'leader.db'),
+        'CONVERSATION_ARCHIVE_DB_PATH': os.path.join(workdir, 'conversations.db'),
+        'CONVERSATION_LOG_ARCHIVE_DIR': os.path.join(workdir, 'log_archive'),
+        'TRACE_EXPORT_PATH': os.path.join(workdir, 'traces.jsonl'),
+        'TRACE_SAMPLE_RATE': '1.0'
+    })
+
+
+def patch_clients(main, services):
+    """Swap the exchange and Gemini clients for ones talking to the fakes"""
+    from src import voice_interaction
+    from src.metrics import instrument
+    
+    for analyzer in (main.investment_analyzer, main.voice_interaction.investment_analyzer):
+        analyzer.binance = instrument(FakeExchange(services['exchange'].url), 'binance', ['fetch_ticker', 'fetch_ohlcv'])
+    voice_interaction.model.model = instrument(
+        RemoteGeminiModel(services['gemini'].url), 'gemini', ['generate_content']
+    )
+
+
+def run_scheduler_phase(main, recorder, users, concurrency):
+    """Run check_unused_funds for synthetic users, as the per-user scheduler would
+
+    Every synthetic user is topped up, so a run only counts as ok when it placed a call;
+    check_unused_funds logs and swallows its own errors, so not raising proves nothing.
+    """
+    def run(i):
+        start = time.perf_counter()
+        try:
+            ok = main.check_unused_funds(synthetic_phone(i)) is not None
+        except Exception:
+            ok = False
+        recorder.add('check_unused_funds', time.perf_counter() - start, ok)
+        
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(run, range(users)))
+    return time.perf_counter() - start
+
+
+def run_webhook_phase(app_url, calls, recorder, concurrency, duplicate_rate):
+    """Deliver a completed-call webhook for every placed call (plus some redeliveries) in one burst"""
+    deliveries = []
+    for call in calls:
+        payload = {
+            'call_id': call['call_id'],
+            'status': 'completed',
+            'transcript': random.choice(TRANSCRIPTS),
+            'metadata': call.get('metadata') or {}
+        }
+        deliveries.append(payload)
+        if random.random() < duplicate_rate:
+            deliveries.append(payload)
+    random.shuffle(deliveries)
+    
+    session = requests.Session()
+    job_ids = set()
+    lock = threading.Lock()
+    
+    def deliver(payload):
+        start = time.perf_counter()
+        try:
+            response = session.post(f"{app_url}/webhook/bland-ai", json=payload, timeout=30)
+            ok = response.status_code == 202
+            if ok:
+                with lock:
+                    job_ids.add(response.json()['job_id'])
+        except requests.RequestException:
+            ok = False
+        recorder.add('POST /webhook/bland-ai', time.perf_counter() - start, ok)
+        
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(deliver, deliveries))
+    return time.perf_counter() - start, job_ids
+
+
+def wait_for_jobs(app_url, job_ids, recorder, timeout):
+    """Poll job status until every job is done or dead; returns the final job records"""
+    session = requests.Session()
+    pending = set(job_ids)
+    finished = {}
+    deadline = time.monotonic() + timeout
+    while pending and time.monotonic() < deadline:
+        for job_id in list(pending):
+            start = time.perf_counter()
+            response = session.get(f"{app_url}/jobs/{job_id}", timeout=10)
+            recorder.add('GET /jobs/<job_id>', time.perf_counter() - start, response.status_code == 200)
+            job = response.json()
+            if job.get('status') in ('done', 'dead'):
+                finished[job_id] = job
+                pending.discard(job_id)
+        time.sleep(0.2)
+    return finished, pending
+
+
+def main():
+    """Start the fakes, drive the app through both phases and print the report"""
+    parser = argparse.ArgumentParser(description="Load-test OSCARR against local fakes of its external services")
+    parser.add_argument('--users', type=int, default=50, help="synthetic scheduler runs")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duplicate-rate', type=float, default=0.1, help="fraction of webhooks redelivered")
+    parser.add_argument('--job-workers', type=int, default=4)
+    parser.add_argument('--bland-rate-limit', type=float, default=1000.0)
+    parser.add_argument('--timeout', type=float, default=120.0, help="seconds to wait for webhook jobs")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="injected failure rate for every fake")
+    for name, latency in (('bland', 0.15), ('coingecko', 0.05), ('exchange', 0.03), ('gemini', 0.4)):
+        parser.add_argument(f'--{name}-latency', type=float, default=latency, help="mean seconds")
+    parser.add_argument('--tail-probability', type=float, default=0.02)
+    parser.add_argument('--tail-latency', type=float, default=1.0)
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args()
+    
+    def profile(latency):
+        """Latency profile with the shared tail and failure settings"""
+        return LatencyProfile(latency, latency / 4, args.tail_probability, args.tail_latency, args.failure_rate)
+        
+    services = start_fake_services({
+        'bland_ai': profile(args.bland_latency),
+        'coingecko': profile(args.coingecko_latency),
+        'exchange': profile(args.exchange_latency),
+        'gemini': profile(args.gemini_latency)
+    })
+    workdir = tempfile.mkdtemp(prefix='oscarr-load-')
+    configure_environment(args, workdir, services)
+    
+    import src.main as app_main
+    from src.tracing import tracer
+    
+    patch_clients(app_main, services)
+    # Plenty of unused funds so every synthetic user gets a call
+    for i in range(args.users):
+        app_main.get_user_wallet(synthetic_phone(i)).update_balance(1_000_000)
+    
+    server = make_server('127.0.0.1', 0, app_main.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_url = f"http://127.0.0.1:{server.server_port}"
+    workers = app_main.start_job_workers()
+    
+    recorder = Recorder()
+    scheduler_elapsed = run_scheduler_phase(app_main, recorder, args.users, args.concurrency)
+    webhook_elapsed, job_ids = run_webhook_phase(
+        app_url, services['bland_ai'].calls, recorder, args.concurrency, args.duplicate_rate
+    )
+    finished, unfinished = wait_for_jobs(app_url, job_ids, recorder, args.timeout)
+    total_elapsed = scheduler_elapsed + webhook_elapsed
+    
+    workers.stop()
+    tracer.exporter.flush()
+    server.shutdown()
+    
+    job_totals = [job['timings'].get('total', 0.0) for job in finished.values()]
+    report = {
+        'scheduler_phase_seconds': scheduler_elapsed,
+        'webhook_phase_seconds': webhook_elapsed,
+        'endpoints': recorder.report(total_elapsed),
+        'stages': stage_report(os.environ['TRACE_EXPORT_PATH']),
+        'jobs': {
+            'queued': len(job_ids),
+            'done': sum(1 for job in finished.values() if job['status'] == 'done'),
+            'dead': sum(1 for job in finished.values() if job['status'] == 'dead'),
+            'unfinished': len(unfinished),
+            'p50': percentile(job_totals, 0.50),
+            'p95': percentile(job_totals, 0.95),
+            'p99': percentile(job_totals, 0.99)
+        },
+        'fake_services': {name: service.get_stats() for name, service in services.items()},
+        'workdir': workdir
+    }
+    
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+        
+    print_table("Endpoints (client side)", report['endpoints'])
+    print_table("Stages (from traces)", report['stages'])
+    jobs = report['jobs']
+    print(f"\nWebhook jobs: {jobs['queued']} queued, {jobs['done']} done, {jobs['dead']} dead, "
+          f"{jobs['unfinished']} unfinished; processing p50={jobs['p50'] * 1000:.1f}ms "
+          f"p95={jobs['p95'] * 1000:.1f}ms p99={jobs['p99'] * 1000:.1f}ms")
+    print("\nFake services:")
+    for name, stats in report['fake_services'].items():
+        print(f"  {name:<10} {stats}")
+    print(f"\nTraces and databases kept in {workdir}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 import os
 import json
-import requests
 from dotenv import load_dotenv
+from src.call_dispatcher import CallDispatcher
 
 def make_call(phone_number):
     """
@@ -14,16 +14,9 @@ def make_call(phone_number):
         print("Error: BLAND_AI_API_KEY not found in config.env")
         return
 
-    url = "https://api.bland.ai/v1/calls"
+    dispatcher = CallDispatcher(api_key, base_url=os.getenv('BLAND_AI_BASE_URL', 'https://api.bland.ai'))
     
-    headers = {
-        "Authorization": f"{api_key}",
-        "Content-Type": "application/json"
-    }
-    
-    payload = {
-        "phone_number": phone_number,
-        "task": """Hello, this is Oscar, your personal investment advisor. I'm calling because I've identified some excellent investment opportunities that align with your financial goals. 
+    task = """Hello, this is Oscar, your personal investment advisor. I'm calling because I've identified some excellent investment opportunities that align with your financial goals. 
         
         As your personal advisor, I can help you with:
         - Analyzing market trends
@@ -33,32 +26,29 @@ def make_call(phone_number):
         
         I noticed you have some funds that could be working harder for you. Would you like me to walk you through some personalized investment options?
         
-        (Note: Please say 'invest' at any time to authorize a transaction, or 'stop' to end this call)""",
-        "webhook_url": "https://webhook.site/ddd50ba8-fe27-40f5-baf4-faa0737b11ba",
-        "model": "enhanced",
-        "first_sentence": "Hello, this is Oscar, your personal investment advisor. Is this a good time to talk?",
-        "record": True,
-        "temperature": 0.7
-    }
+        (Note: Please say 'invest' at any time to authorize a transaction, or 'stop' to end this call)"""
 
-    try:
-        print(f"Initiating call to {phone_number}...")
-        response = requests.post(url, headers=headers, json=payload)
-        response.raise_for_status()
-        
-        result = response.json()
-        if result.get('status') == 'success':
-            print(f"✅ Call initiated successfully!")
-            print(f"Call ID: {result.get('call_id')}")
-            print(f"Status: {result.get('message')}")
-        else:
-            print("❌ Failed to initiate call:")
-            print(json.dumps(result, indent=2))
-            
-    except requests.exceptions.RequestException as e:
-        print(f"❌ Error making the request: {str(e)}")
-    except json.JSONDecodeError:
-        print("❌ Error parsing API response")
+    print(f"Initiating call to {phone_number}...")
+    result = dispatcher.place_call(
+        phone_number,
+        task,
+        webhook_url="https://webhook.site/ddd50ba8-fe27-40f5-baf4-faa0737b11ba",
+        model="enhanced",
+        first_sentence="Hello, this is Oscar, your personal investment advisor. Is this a good time to talk?",
+        record=True,
+        temperature=0.7
+    )
+    dispatcher.close()
+    
+    if result is None:
+        print("❌ Error making the request (see log for details)")
+    elif result.get('status') == 'success':
+        print(f"✅ Call initiated successfully!")
+        print(f"Call ID: {result.get('call_id')}")
+        print(f"Status: {result.get('message')}")
+    else:
+        print("❌ Failed to initiate call:")
+        print(json.dumps(result, indent=2))
 
 if __name__ == "__main__":
     import sys
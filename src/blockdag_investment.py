@@ -84,11 +84,40 @@ class InvestmentContract:
         
     def make_investment(self, amount: int) -> Dict:
         """Make a new investment"""
+        if self.wallet.signing_service:
+            return self.make_investments([amount])[0]
         return self.contract.functions.invest().transact({
             'value': amount,
             'from': self.wallet.address
         })
         
+    def make_investments(self, amounts: List[int]) -> List[Dict]:
+        """Make several investments, signing them as one batch in the wallet's signing pool"""
+        if not self.wallet.signing_service:
+            raise ValueError("make_investments requires a wallet with a signing service")
+            
+        # Sign with the wallet's own BlockDAG key, so sender, nonce and signature are one account
+        sender = self.wallet.signer_address()
+        # Nonces come from the wallet's allocator, shared with its own transfers
+        with self.wallet.nonces.allocate(sender, len(amounts)) as nonce:
+            unsigned_txs = [
+                self.contract.functions.invest().build_transaction({
+                    'value': amount,
+                    'from': sender,
+                    'nonce': nonce + i
+                })
+                for i, amount in enumerate(amounts)
+            ]
+            # build_transaction includes 'from', which the signer derives from the key instead
+            for tx in unsigned_txs:
+                tx.pop('from', None)
+                
+            signed_txs = self.wallet.signing_service.sign_batch('blockdag', unsigned_txs)
+            return [
+                self.wallet.client.send_raw_transaction(tx['raw_transaction'])
+                for tx in signed_txs
+            ]
+        
     def get_investments(self, address: str = None) -> List[Dict]:
         """Get investments for an address"""
         if not address:
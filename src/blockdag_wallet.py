@@ -7,13 +7,25 @@ from dotenv import load_dotenv
 from blockdag_network_sdk import BlockDAGClient
 from typing import Dict, List, Optional
 import json
+from .fee_oracle import FeeOracle
+from .nonce_manager import get_nonce_manager
+from .signing_service import SigningService, get_signing_service
 
 class BlockDAGWallet:
-    def __init__(self, network: str = 'testnet'):
+    def __init__(self, network: str = 'testnet', signing_service: Optional[SigningService] = None):
         """Initialize BlockDAG wallet with API credentials"""
         load_dotenv()
         self.network = network
+        self.address = os.getenv('BLOCKDAG_WALLET_ADDRESS')
+        # With a BlockDAG key configured, native transfers are signed in the shared pool
+        if signing_service is None and os.getenv('BLOCKDAG_PRIVATE_KEY'):
+            signing_service = get_signing_service()
+        self.signing_service = signing_service
         self.client = self._initialize_client()
+        # Shared by every wallet on this chain, so concurrent batches for one sender never reuse a nonce
+        self.nonces = get_nonce_manager(self.client.chain_id, self.client.get_transaction_count)
+        # Starts sampling on the first fee lookup, not here
+        self.fee_oracle = FeeOracle(self.client)
         
     def _initialize_client(self) -> BlockDAGClient:
         """Initialize BlockDAG client with environment variables"""
@@ -33,7 +45,8 @@ class BlockDAGWallet:
         to_address: str, 
         amount: float, 
         asset: str = 'BDAG',
-        private_key: str = None
+        private_key: str = None,
+        fee_tier: str = 'standard'
     ) -> Dict:
         """
         Send BDAG or other supported assets
@@ -43,10 +56,15 @@ class BlockDAGWallet:
             amount: Amount to send
             asset: Asset type (default: BDAG)
             private_key: Sender's private key (if not using env var)
+            fee_tier: Fee tier from the fee oracle ('low', 'standard' or 'fast')
             
         Returns:
             Transaction receipt
         """
+        # Native transfers signed by the pool never touch the key in this process
+        if self.signing_service and not private_key and asset == 'BDAG':
+            return self.send_transactions([{'to': to_address, 'amount': amount}], fee_tier)[0]
+            
         if not private_key:
             private_key = os.getenv('BLOCKDAG_PRIVATE_KEY')
             
@@ -54,12 +72,61 @@ class BlockDAGWallet:
             'from': os.getenv('BLOCKDAG_WALLET_ADDRESS'),
             'to': to_address,
             'value': amount,
-            'asset': asset,
-            'private_key': private_key
+            'asset': asset
         }
+        tx_data['gas'] = self.fee_oracle.get_gas_limit(asset, 'transfer', tx_data)
+        tx_data['gas_price'] = self.fee_oracle.get_gas_price(fee_tier)
+        tx_data['private_key'] = private_key
         
         return self.client.send_transaction(tx_data)
     
+    def signer_address(self) -> str:
+        """Address of the key the signing pool signs BDAG transactions with; must be this wallet's address"""
+        signer = self.signing_service.get_address('blockdag')
+        if self.address and signer.lower() != self.address.lower():
+            raise ValueError(
+                f"Signing key belongs to {signer}, not the wallet address {self.address}; "
+                "check BLOCKDAG_PRIVATE_KEY and BLOCKDAG_WALLET_ADDRESS"
+            )
+        return signer
+        
+    def send_transactions(self, transfers: List[Dict], fee_tier: str = 'standard') -> List[Dict]:
+        """
+        Sign a batch of BDAG transfers in the signing pool and broadcast them
+        
+        Args:
+            transfers: List of {'to': address, 'amount': BDAG amount}
+            fee_tier: Fee tier from the fee oracle ('low', 'standard' or 'fast')
+            
+        Returns:
+            Transaction receipts, in the same order as transfers
+        """
+        if not self.signing_service:
+            raise ValueError("send_transactions requires a signing service")
+            
+        sender = self.signer_address()
+        gas_price = self.fee_oracle.get_gas_price(fee_tier)
+        with self.nonces.allocate(sender, len(transfers)) as nonce:
+            unsigned_txs = []
+            for i, transfer in enumerate(transfers):
+                tx = {
+                    'from': sender,
+                    'to': transfer['to'],
+                    'value': int(transfer['amount'] * 10 ** 18),
+                    'asset': 'BDAG'
+                }
+                unsigned_txs.append({
+                    'to': transfer['to'],
+                    'value': tx['value'],
+                    'gas': self.fee_oracle.get_gas_limit('BDAG', 'transfer', tx),
+                    'gasPrice': gas_price,
+                    'nonce': nonce + i,
+                    'chainId': self.client.chain_id
+                })
+                
+            signed_txs = self.signing_service.sign_batch('blockdag', unsigned_txs)
+            return [self.client.send_raw_transaction(tx['raw_transaction']) for tx in signed_txs]
+    
     def get_transaction_history(self, address: str = None, limit: int = 10) -> List[Dict]:
         """Get transaction history for an address"""
         if not address:
@@ -0,0 +1,203 @@
+import logging
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Only rejections that prove no call was placed are retried; a 5xx may come after the call started
+RETRYABLE_STATUS_CODES = {429}
+
+
+def request_not_sent(error):
+    """Whether a requests error happened before the request reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.Timeout):
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    reason = error.args[0] if error.args else None
+    reason = getattr(reason, 'reason', reason)
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        """Allow `rate` acquisitions per second with bursts of up to `capacity`"""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SharedTokenBucket:
+    def __init__(self, db_path, rate, capacity, name='default'):
+        """A token bucket kept in SQLite, so every process sharing db_path draws from one limit"""
+        self.db_path = db_path
+        self.rate = rate
+        self.capacity = capacity
+        self.name = name
+        self._local = threading.local()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS token_buckets ("
+            "name TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        
+    def _connection(self):
+        """Get this thread's SQLite connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            self._local.conn = conn
+        return conn
+        
+    def acquire(self):
+        """Block until a token is available"""
+        conn = self._connection()
+        while True:
+            # Wall clock, since monotonic clocks are not comparable between processes
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT tokens, updated_at FROM token_buckets WHERE name = ?", (self.name,)
+                ).fetchone()
+                if row is None:
+                    tokens = float(self.capacity)
+                else:
+                    tokens = min(self.capacity, row[0] + max(now - row[1], 0.0) * self.rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                conn.execute(
+                    "INSERT OR REPLACE INTO token_buckets (name, tokens, updated_at) VALUES (?, ?, ?)",
+                    (self.name, tokens, now)
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            if not wait:
+                return
+            time.sleep(wait)
+
+
+class CallDispatcher:
+    def __init__(self, api_key, base_url='https://api.bland.ai', rate_per_second=5.0, burst=10,
+                 pool_size=10, timeout=30, max_retries=3, backoff_base=0.5, max_backoff=30.0,
+                 rate_limit_db_path=None):
+        """Initialize a pooled, rate-limited client for Bland AI outbound calls
+
+        With rate_limit_db_path the rate limit is shared by every process using that database
+        (e.g. all gunicorn workers); otherwise it only applies within this process.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff  # seconds; also caps the provider's Retry-After
+        self.pool_size = pool_size
+        if rate_limit_db_path:
+            self.rate_limiter = SharedTokenBucket(rate_limit_db_path, rate_per_second, burst, name='bland_ai')
+        else:
+            self.rate_limiter = TokenBucket(rate_per_second, burst)
+        
+        # One keep-alive session shared by every caller; retries are handled below
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': api_key,
+            'Content-Type': 'application/json'
+        })
+        
+    def place_call(self, phone_number, task, webhook_url=None, model='enhanced', idempotency_key=None, **options):
+        """Place one outbound call; returns the API response body, or None on failure
+
+        Attempts are retried only when the call certainly was not placed: the connection never
+        opened, or the API answered 429. Every attempt carries the same Idempotency-Key.
+        """
+        payload = {'phone_number': phone_number, 'task': task, 'model': model, **options}
+        if webhook_url:
+            payload['webhook_url'] = webhook_url
+        headers = {'Idempotency-Key': idempotency_key or uuid.uuid4().hex}
+        
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/v1/calls", json=payload, headers=headers, timeout=self.timeout
+                )
+                if response.status_code not in RETRYABLE_STATUS_CODES:
+                    response.raise_for_status()
+                    result = response.json()
+                    logger.info(f"Call to {phone_number} initiated. Call ID: {result.get('call_id')}")
+                    return result
+                error = f"HTTP {response.status_code}: {response.text[:200]}"
+                retry_after = response.headers.get('Retry-After')
+            except requests.RequestException as e:
+                if not request_not_sent(e):
+                    # The request may have reached Bland AI; retrying could ring the user twice
+                    logger.error(f"Error making Bland AI call to {phone_number}, not retrying: {e}")
+                    return None
+                error = str(e)
+            except Exception as e:
+                logger.error(f"Error making Bland AI call to {phone_number}: {e}")
+                return None
+                
+            if attempt == self.max_retries:
+                logger.error(f"Giving up on call to {phone_number} after {attempt + 1} attempts: {error}")
+                return None
+            delay = self._backoff(attempt, retry_after)
+            logger.warning(f"Bland AI call to {phone_number} failed ({error}), retrying in {delay:.2f}s")
+            time.sleep(delay)
+            
+    def _backoff(self, attempt, retry_after=None):
+        """Jittered exponential backoff, honouring Retry-After (up to max_backoff) when the provider sends it"""
+        if retry_after:
+            try:
+                return min(max(float(retry_after), 0.0), self.max_backoff)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_base * 2 ** attempt, self.max_backoff))
+        
+    def place_calls(self, calls, max_workers=None):
+        """Place a batch of campaign calls concurrently; calls are dicts of place_call kwargs"""
+        with ThreadPoolExecutor(max_workers=max_workers or self.pool_size) as executor:
+            return list(executor.map(lambda call: self.place_call(**call), calls))
+            
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
@@ -0,0 +1,84 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class CallSessionStore:
+    def __init__(self, db_path='data/call_sessions.db', ttl=172800, max_entries=10000):
+        """Initialize the per-call session store (in-memory LRU over SQLite)"""
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._sessions = OrderedDict()  # call_id -> (session, expires_at)
+        self._lock = threading.Lock()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS call_sessions ("
+            "call_id TEXT PRIMARY KEY, session TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_call_sessions_expiry ON call_sessions (expires_at)")
+        self._db.commit()
+        self.purge_expired()
+        
+    def put(self, call_id, session):
+        """Store the state of an outbound call under its Bland AI call_id"""
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(call_id, session, expires_at)
+            self._db.execute(
+                "INSERT OR REPLACE INTO call_sessions (call_id, session, expires_at) VALUES (?, ?, ?)",
+                (call_id, json.dumps(session, default=str), expires_at)
+            )
+            self._db.commit()
+            
+    def get(self, call_id):
+        """Load a call's session in one lookup; None if unknown or expired"""
+        if not call_id:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(call_id)
+            if entry is None:
+                row = self._db.execute(
+                    "SELECT session, expires_at FROM call_sessions WHERE call_id = ?", (call_id,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = (json.loads(row[0]), row[1])
+                self._remember(call_id, *entry)
+                
+            if entry[1] <= now:
+                self._sessions.pop(call_id, None)
+                self._db.execute("DELETE FROM call_sessions WHERE call_id = ?", (call_id,))
+                self._db.commit()
+                return None
+                
+            self._sessions.move_to_end(call_id)
+            return entry[0]
+            
+    def _remember(self, call_id, session, expires_at):
+        """Cache a session in memory, evicting the least recently used beyond max_entries"""
+        self._sessions[call_id] = (session, expires_at)
+        self._sessions.move_to_end(call_id)
+        while len(self._sessions) > self.max_entries:
+            self._sessions.popitem(last=False)
+            
+    def purge_expired(self):
+        """Delete expired sessions from memory and disk"""
+        now = time.time()
+        with self._lock:
+            for call_id in [k for k, (_, expires_at) in self._sessions.items() if expires_at <= now]:
+                del self._sessions[call_id]
+            deleted = self._db.execute("DELETE FROM call_sessions WHERE expires_at <= ?", (now,)).rowcount
+            self._db.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired call sessions")
+        return deleted
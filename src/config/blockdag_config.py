@@ -3,6 +3,8 @@ BlockDAG Network Configuration
 """
 from enum import Enum
 
+GWEI = 10 ** 9  # gas prices are in wei throughout; configure them as multiples of GWEI
+
 class NetworkType(Enum):
     MAINNET = 'mainnet'
     TESTNET = 'testnet'
@@ -12,11 +14,28 @@ class NetworkType(Enum):
 DEFAULT_CONFIG = {
     'network': NetworkType.TESTNET.value,
     'gas_limit': 21000,
-    'gas_price': 10,  # in gwei
+    'gas_price': 10 * GWEI,  # in wei
     'confirmations_required': 6,
     'timeout': 300,  # 5 minutes
 }
 
+# Fee oracle configuration
+FEE_ORACLE_CONFIG = {
+    'sample_interval': 15,  # seconds between network fee samples
+    'sample_size': 200,  # recent transactions to sample per refresh
+    'max_estimate_age': 120,  # seconds before cached fee estimates are considered stale
+    'gas_estimate_ttl': 3600,  # seconds to cache gas estimates per (asset, call type)
+    'gas_limit_margin': 1.2,  # safety margin applied to estimated gas
+    'max_gas_price': 100 * GWEI,  # in wei, hard ceiling for any tier
+}
+
+# Percentile of recently paid gas prices used for each fee tier
+FEE_TIERS = {
+    'low': 25,
+    'standard': 50,
+    'fast': 90,
+}
+
 # API endpoints
 ENDPOINTS = {
     NetworkType.MAINNET: 'https://api.blockdag.network/mainnet',
@@ -0,0 +1,297 @@
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .conversation_logger import replay_journal
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS conversations (
+    conversation_id TEXT PRIMARY KEY,
+    started_at TEXT,
+    started_ts REAL,
+    balance_pol REAL,
+    pol_price_usd REAL,
+    symbol TEXT,
+    decision_status TEXT,
+    investment_amount REAL,
+    interaction_count INTEGER NOT NULL DEFAULT 0,
+    source_path TEXT,
+    source_mtime REAL,
+    document TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_conversations_started ON conversations (started_ts);
+CREATE INDEX IF NOT EXISTS idx_conversations_decision ON conversations (symbol, decision_status, started_ts);
+CREATE INDEX IF NOT EXISTS idx_conversations_status ON conversations (decision_status, started_ts);
+CREATE INDEX IF NOT EXISTS idx_conversations_amount ON conversations (investment_amount);
+
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    timestamp TEXT,
+    role TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_conversation ON messages (conversation_id, seq);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    message, content='messages', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts (rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts (messages_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+"""
+
+
+def to_timestamp(value):
+    """Epoch seconds from a datetime, an ISO string or a number (None passes through)"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+def _to_float(value):
+    """Amounts arrive as numbers or strings; anything else is stored as NULL"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ConversationArchive:
+    def __init__(self, db_path='data/conversations.db'):
+        """Open (or create) the SQLite conversation archive"""
+        self.db_path = db_path
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+        
+    def _row(self, conversation, source_path=None, source_mtime=None):
+        """Flatten a conversation document into its indexed columns"""
+        initial_state = conversation.get('initial_state') or {}
+        decision = conversation.get('final_decision') or {}
+        started_at = conversation.get('timestamp')
+        return (
+            conversation['conversation_id'],
+            started_at,
+            to_timestamp(started_at) if started_at else None,
+            _to_float(initial_state.get('balance_pol')),
+            _to_float(conversation.get('pol_price_usd')),
+            decision.get('preferred_investment'),
+            decision.get('status', 'completed') if decision else None,
+            _to_float(decision.get('investment_amount')),
+            len(conversation.get('interactions') or []),
+            source_path,
+            source_mtime,
+            json.dumps(conversation, default=str)
+        )
+        
+    def _ingest(self, conversation, source_path=None, source_mtime=None):
+        """Replace one conversation and its messages (call with the lock held, inside a transaction)"""
+        conversation_id = conversation['conversation_id']
+        self._db.execute("DELETE FROM messages WHERE conversation_id = ?", (conversation_id,))
+        self._db.execute(
+            "INSERT OR REPLACE INTO conversations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._row(conversation, source_path, source_mtime)
+        )
+        self._db.executemany(
+            "INSERT INTO messages (conversation_id, seq, timestamp, role, message) VALUES (?, ?, ?, ?, ?)",
+            [
+                (conversation_id, seq, item.get('timestamp'), item.get('role'), item.get('message'))
+                for seq, item in enumerate(conversation.get('interactions') or [])
+            ]
+        )
+        
+    def ingest(self, conversation, source_path=None):
+        """Add or update one conversation document"""
+        source_mtime = os.path.getmtime(source_path) if source_path and os.path.exists(source_path) else None
+        with self._lock:
+            with self._db:
+                self._ingest(conversation, source_path, source_mtime)
+                
+    def ingest_many(self, conversations, source_path=None):
+        """Add or update a batch of conversation documents in one transaction"""
+        with self._lock:
+            with self._db:
+                for conversation in conversations:
+                    self._ingest(conversation, source_path)
+                    
+    def import_directory(self, log_dir='logs'):
+        """Bulk import conversation_*.json documents (and journals without one); unchanged files are skipped
+
+        The .log and summary_*.txt files are renderings of the same documents, so they are not read.
+        """
+        start = time.perf_counter()
+        known = {
+            row['source_path']: row['source_mtime']
+            for row in self._db.execute("SELECT source_path, source_mtime FROM conversations")
+        }
+        paths = sorted(Path(log_dir).glob('conversation_*.json'))
+        documents = {path.with_suffix('') for path in paths}
+        # Journals of conversations that never compacted (e.g. the process died)
+        paths += [path for path in sorted(Path(log_dir).glob('conversation_*.jsonl')) if path.with_suffix('') not in documents]
+        
+        imported = skipped = failed = 0
+        with self._lock:
+            with self._db:
+                for path in paths:
+                    mtime = os.path.getmtime(path)
+                    if known.get(str(path)) == mtime:
+                        skipped += 1
+                        continue
+                    try:
+                        if path.suffix == '.jsonl':
+                            conversation = replay_journal(path)
+                        else:
+                            with open(path) as f:
+                                conversation = json.load(f)
+                        self._ingest(conversation, str(path), mtime)
+                        imported += 1
+                    except Exception as e:
+                        failed += 1
+                        logger.error(f"Error importing {path}: {e}")
+                        
+        elapsed = time.perf_counter() - start
+        logger.info(f"Imported {imported} conversations ({skipped} unchanged, {failed} failed) in {elapsed:.2f}s")
+        return {'imported': imported, 'skipped': skipped, 'failed': failed, 'seconds': elapsed}
+        
+    def find_conversations(self, symbol=None, status=None, since=None, until=None,
+                           min_amount=None, max_amount=None, limit=100):
+        """Query conversations by decision; symbol 'BTC' also matches pairs like 'BTC/USDT'"""
+        clauses, params = [], []
+        if symbol:
+            clauses.append("(symbol = ? OR symbol LIKE ?)")
+            params += [symbol, f"{symbol}/%"]
+        if status:
+            clauses.append("decision_status = ?")
+            params.append(status)
+        if since is not None:
+            clauses.append("started_ts >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            clauses.append("started_ts < ?")
+            params.append(to_timestamp(until))
+        if min_amount is not None:
+            clauses.append("investment_amount >= ?")
+            params.append(min_amount)
+        if max_amount is not None:
+            clauses.append("investment_amount <= ?")
+            params.append(max_amount)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT conversation_id, started_at, symbol, decision_status, investment_amount, balance_pol, "
+                f"pol_price_usd, interaction_count FROM conversations {where} ORDER BY started_ts DESC LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+        
+    def search_messages(self, query, role=None, since=None, until=None, limit=50):
+        """Full-text search over messages (FTS5 query syntax), best matches first"""
+        clauses, params = ["messages_fts MATCH ?"], [query]
+        if role:
+            clauses.append("m.role = ?")
+            params.append(role)
+        if since is not None:
+            clauses.append("c.started_ts >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            clauses.append("c.started_ts < ?")
+            params.append(to_timestamp(until))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT m.conversation_id, m.seq, m.timestamp, m.role, "
+                "snippet(messages_fts, 0, '[', ']', '...', 12) AS snippet "
+                "FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+                "JOIN conversations c ON c.conversation_id = m.conversation_id "
+                f"WHERE {' AND '.join(clauses)} ORDER BY bm25(messages_fts) LIMIT ?",
+                params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+        
+    def get_conversation(self, conversation_id):
+        """Get the full conversation document"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT document FROM conversations WHERE conversation_id = ?", (conversation_id,)
+            ).fetchone()
+        return json.loads(row['document']) if row else None
+        
+    def get_decision_totals(self, status='completed', since=None, until=None):
+        """Number of decisions and total amount per symbol"""
+        clauses, params = ["decision_status = ?"], [status]
+        if since is not None:
+            clauses.append("started_ts >= ?")
+            params.append(to_timestamp(since))
+        if until is not None:
+            clauses.append("started_ts < ?")
+            params.append(to_timestamp(until))
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT symbol, COUNT(*) AS decisions, SUM(investment_amount) AS total_amount "
+                f"FROM conversations WHERE {' AND '.join(clauses)} GROUP BY symbol ORDER BY total_amount DESC",
+                params
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+def main():
+    """Command line: import a log directory, or query the archive"""
+    parser = argparse.ArgumentParser(description="OSCARR conversation archive")
+    parser.add_argument('--db', default=os.getenv('CONVERSATION_ARCHIVE_DB_PATH', 'data/conversations.db'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    import_parser = commands.add_parser('import', help="bulk import a log directory")
+    import_parser.add_argument('log_dir', nargs='?', default='logs')
+    
+    find_parser = commands.add_parser('find', help="find conversations by decision")
+    find_parser.add_argument('--symbol')
+    find_parser.add_argument('--status')
+    find_parser.add_argument('--since')
+    find_parser.add_argument('--until')
+    find_parser.add_argument('--min-amount', type=float)
+    find_parser.add_argument('--limit', type=int, default=100)
+    
+    search_parser = commands.add_parser('search', help="full-text search over messages")
+    search_parser.add_argument('query')
+    search_parser.add_argument('--role')
+    search_parser.add_argument('--limit', type=int, default=50)
+    
+    args = parser.parse_args()
+    archive = ConversationArchive(args.db)
+    start = time.perf_counter()
+    if args.command == 'import':
+        result = archive.import_directory(args.log_dir)
+    elif args.command == 'find':
+        result = archive.find_conversations(
+            symbol=args.symbol, status=args.status, since=args.since, until=args.until,
+            min_amount=args.min_amount, limit=args.limit
+        )
+    else:
+        result = archive.search_messages(args.query, role=args.role, limit=args.limit)
+    print(json.dumps(result, indent=2, default=str))
+    print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+
+
+if __name__ == '__main__':
+    # python -m src.conversation_archive import logs
+    main()
@@ -1,13 +1,77 @@
 import json
-import logging
+import time
 from datetime import datetime
 import os
 from pathlib import Path
+from .log_writer import get_log_writer
+
+FSYNC_POLICIES = ('always', 'interval', 'never')
+
+
+def replay_journal(path):
+    """Rebuild a conversation document from its JSONL journal (e.g. one left behind by a crash)"""
+    conversation = None
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn final line from a crash mid-write; everything before it is intact
+                break
+            event, data = entry['event'], entry['data']
+            if event == 'start':
+                conversation = data
+            elif conversation is None:
+                # Nothing to apply events to until the start line
+                continue
+            elif event == 'initial_state':
+                conversation['initial_state'] = data['initial_state']
+                conversation['pol_price_usd'] = data['pol_price_usd']
+            elif event == 'investment_suggestions':
+                conversation['investment_suggestions'] = data
+            elif event == 'interaction':
+                conversation['interactions'].append(data)
+            elif event == 'final_decision':
+                conversation['final_decision'] = data
+    if conversation is None:
+        raise ValueError(f"Journal {path} has no start event")
+    return conversation
+
+
+class ConversationTextLog:
+    def __init__(self, writer, path):
+        """Human-readable conversation log written through the shared log writer"""
+        self.writer = writer
+        self.path = path
+        
+    def info(self, message):
+        """Queue a line in the format the per-conversation FileHandler used to write"""
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+        self.writer.write(self.path, f"{timestamp} - INFO - {message}\n")
+
 
 class ConversationLogger:
-    def __init__(self, log_dir="logs"):
-        """Initialize the conversation logger"""
+    def __init__(self, log_dir="logs", journal=True, fsync='interval', fsync_interval=1.0, writer=None,
+                 archive=None):
+        """Initialize the conversation logger
+
+        In journal mode every event is appended to a JSONL file, so each log call costs the same
+        however long the conversation gets; the JSON document is produced by compact() or close().
+        fsync is 'always' (every event), 'interval' (at most every fsync_interval seconds) or 'never'.
+        When an archive is given, close() also indexes the finished conversation there.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
         self.log_dir = log_dir
+        self.journal = journal
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        # One background writer for all conversations keeps disk I/O off the call path
+        self.writer = writer or get_log_writer()
+        self.archive = archive
         self.current_conversation = {
             "timestamp": datetime.now().isoformat(),
             "conversation_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
@@ -31,20 +95,15 @@ class ConversationLogger:
             f"conversation_{self.current_conversation['conversation_id']}.json"
         )
         
-        # Configure file logger
-        self.logger = logging.getLogger(f"conversation_{self.current_conversation['conversation_id']}")
-        self.logger.setLevel(logging.INFO)
-        
-        # Create file handler
-        fh = logging.FileHandler(self.log_file)
-        fh.setLevel(logging.INFO)
-        
-        # Create formatter
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        fh.setFormatter(formatter)
+        self.logger = ConversationTextLog(self.writer, self.log_file)
         
-        # Add handler to logger
-        self.logger.addHandler(fh)
+        self.journal_file = None
+        if journal:
+            self.journal_file = os.path.join(
+                log_dir,
+                f"conversation_{self.current_conversation['conversation_id']}.jsonl"
+            )
+            self._record('start', self.current_conversation)
 
     def log_initial_state(self, balance_pol, pol_price_usd, monthly_spending_pol):
         """Log the initial state of the wallet"""
@@ -58,17 +117,17 @@ class ConversationLogger:
         
         self.current_conversation["initial_state"] = initial_state
         self.current_conversation["pol_price_usd"] = pol_price_usd
+        self._record('initial_state', {'initial_state': initial_state, 'pol_price_usd': pol_price_usd})
         
         self.logger.info(f"Initial State:")
         self.logger.info(f"Balance: {balance_pol:.2f} POL (≈ ${balance_pol * pol_price_usd:.2f})")
         self.logger.info(f"POL Price: ${pol_price_usd:.6f}")
         self.logger.info(f"Monthly Spending: {monthly_spending_pol:.2f} POL (≈ ${monthly_spending_pol * pol_price_usd:.2f})")
-        
-        self._save_json()
 
     def log_investment_suggestions(self, suggestions):
         """Log investment suggestions"""
         self.current_conversation["investment_suggestions"] = suggestions
+        self._record('investment_suggestions', suggestions)
         
         self.logger.info("\nInvestment Suggestions:")
         for suggestion in suggestions:
@@ -76,8 +135,6 @@ class ConversationLogger:
                 f"{suggestion['symbol']}: {suggestion['price_in_pol']:.2f} POL "
                 f"(${suggestion['price']:.2f}) - Risk: {suggestion['risk_level']}"
             )
-        
-        self._save_json()
 
     def log_interaction(self, role, message, metadata=None):
         """Log an interaction (AI or user)"""
@@ -89,16 +146,16 @@ class ConversationLogger:
         }
         
         self.current_conversation["interactions"].append(interaction)
+        self._record('interaction', interaction)
         
         self.logger.info(f"\n{role.upper()}: {message}")
         if metadata:
             self.logger.info(f"Metadata: {json.dumps(metadata, indent=2)}")
-        
-        self._save_json()
 
     def log_investment_decision(self, decision):
         """Log the final investment decision"""
         self.current_conversation["final_decision"] = decision
+        self._record('final_decision', decision)
         
         pol_price = self.current_conversation["pol_price_usd"]
         amount_pol = decision.get("investment_amount", 0)
@@ -109,13 +166,45 @@ class ConversationLogger:
         )
         self.logger.info(f"Asset: {decision.get('preferred_investment')}")
         self.logger.info(f"Status: {decision.get('status', 'completed')}")
-        
-        self._save_json()
+
+    def _record(self, event, data):
+        """Persist one event: a journal line in journal mode, otherwise a full JSON rewrite"""
+        if not self.journal or self.journal_file is None:
+            # After close() the journal is gone, so late events go straight into the JSON document
+            self._save_json()
+            return
+        # Journal lines are the only durable copy, so wait for queue space rather than dropping one
+        self.writer.write(self.journal_file, json.dumps({'event': event, 'data': data}, default=str) + '\n', block=True)
+        if self.fsync == 'always':
+            # Durable before returning, at the cost of waiting for the writer
+            self.writer.fsync(self.journal_file)
+        elif self.fsync == 'interval' and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            self.writer.fsync(self.journal_file, wait=False)
+            self._last_fsync = time.monotonic()
 
     def _save_json(self):
         """Save the current conversation to JSON file"""
-        with open(self.json_file, 'w') as f:
-            json.dump(self.current_conversation, f, indent=2)
+        tmp_file = f"{self.json_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.current_conversation, f, indent=2, default=str)
+        os.replace(tmp_file, self.json_file)
+
+    def compact(self):
+        """Write the conversation's JSON document now (journal mode keeps appending afterwards)"""
+        self._save_json()
+        return self.json_file
+
+    def close(self):
+        """Compact the journal into the JSON document, release the files and archive the conversation"""
+        self.compact()
+        if self.archive is not None:
+            self.archive.ingest(self.current_conversation, self.json_file)
+        if self.journal_file:
+            self.writer.close_file(self.journal_file)
+            # The JSON document now holds everything the journal did
+            os.remove(self.journal_file)
+            self.journal_file = None
+        self.writer.close_file(self.log_file, wait=False)
 
     def get_conversation_summary(self):
         """Get a human-readable summary of the conversation"""
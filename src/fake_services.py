@@ -0,0 +1,317 @@
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BATCH_CALL_ID = re.compile(r'^\[Call (\d+)\]$', re.MULTILINE)
+
+# Canned transcript analyses the fake Gemini picks from
+ANALYSES = [
+    {'interest': 'yes', 'preferred_investment': 'BTC/USDT', 'investment_amount': '100', 'amount_confirmed': 'yes',
+     'confirmation_word_correct': 'no', 'questions': [], 'sentiment': 'positive', 'next_step': 'confirm',
+     'investment_completed': 'no'},
+    {'interest': 'unsure', 'preferred_investment': None, 'investment_amount': None, 'amount_confirmed': 'no',
+     'confirmation_word_correct': 'no', 'questions': ['What are the risks?'], 'sentiment': 'neutral',
+     'next_step': 'answer questions', 'investment_completed': 'no'},
+    {'interest': 'no', 'preferred_investment': None, 'investment_amount': None, 'amount_confirmed': 'no',
+     'confirmation_word_correct': 'no', 'questions': [], 'sentiment': 'negative', 'next_step': 'end',
+     'investment_completed': 'no'}
+]
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self, latency=0.2, jitter=0.05, tail_probability=0.02, tail_latency=2.0,
+                 failure_rate=0.0, responder=None):
+        """Offline stand-in for the Gemini model with a tunable latency distribution"""
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        self.responder = responder or (lambda prompt: '{"interest": "unsure"}')
+        self.calls = 0
+        
+    def _sample_delay(self):
+        """Sample a completion latency, occasionally from the slow tail"""
+        delay = max(0.0, random.gauss(self.latency, self.jitter))
+        if random.random() < self.tail_probability:
+            delay += self.tail_latency
+        return delay
+        
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Sleep for a sampled latency, then return a canned response or a transient error"""
+        self.calls += 1
+        if stream:
+            return self._stream(prompt)
+        time.sleep(self._sample_delay())
+        if random.random() < self.failure_rate:
+            raise ConnectionError("Simulated transient model failure")
+        return FakeResponse(self.responder(prompt))
+        
+    def _stream(self, prompt):
+        """Yield the canned response word by word, spreading the sampled latency across chunks"""
+        words = self.responder(prompt).split(' ')
+        per_chunk = self._sample_delay() / max(len(words), 1)
+        for i, word in enumerate(words):
+            time.sleep(per_chunk)
+            yield FakeResponse(word if i == 0 else ' ' + word)
+
+
+class LatencyProfile:
+    def __init__(self, latency=0.05, jitter=0.01, tail_probability=0.0, tail_latency=1.0, failure_rate=0.0):
+        """Response time distribution and injected failure rate of a fake service"""
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_probability = tail_probability
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        
+    def sample_delay(self):
+        """Sample a response latency, occasionally from the slow tail"""
+        delay = max(0.0, random.gauss(self.latency, self.jitter))
+        if random.random() < self.tail_probability:
+            delay += self.tail_latency
+        return delay
+        
+    def should_fail(self):
+        """Whether to inject a failure into this request"""
+        return random.random() < self.failure_rate
+
+
+class FakeService:
+    def __init__(self, name, routes, profile=None, failure_status=503, host='127.0.0.1', port=0):
+        """Local HTTP stand-in for an external API; routes map (method, path) -> fn(query, body) -> (status, payload)"""
+        self.name = name
+        self.routes = routes
+        self.profile = profile or LatencyProfile()
+        self.failure_status = failure_status
+        self.requests = 0
+        self.failures = 0
+        self.calls = []  # requests worth inspecting later, e.g. placed phone calls
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+        
+    @property
+    def url(self):
+        """Base URL to point the client at"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+        
+    def _handler_class(self):
+        """Build the request handler bound to this service"""
+        service = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                service._handle(self, 'GET')
+                
+            def do_POST(self):
+                service._handle(self, 'POST')
+                
+            def log_message(self, format, *args):
+                pass
+                
+        return Handler
+        
+    def _handle(self, handler, method):
+        """Apply the latency profile, then dispatch to the route"""
+        parsed = urlparse(handler.path)
+        length = int(handler.headers.get('Content-Length') or 0)
+        raw = handler.rfile.read(length) if length else b''
+        time.sleep(self.profile.sample_delay())
+        with self._lock:
+            self.requests += 1
+            
+        route = self.routes.get((method, parsed.path))
+        if route is None:
+            status, payload = 404, {'error': f"No route for {method} {parsed.path}"}
+        elif self.profile.should_fail():
+            with self._lock:
+                self.failures += 1
+            status, payload = self.failure_status, {'error': 'Injected failure'}
+        else:
+            try:
+                query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+                body = json.loads(raw) if raw else {}
+                status, payload = route(query, body)
+            except Exception as e:
+                logger.error(f"Error in fake {self.name} route {parsed.path}: {e}")
+                status, payload = 500, {'error': str(e)}
+                
+        data = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header('Content-Type', 'application/json')
+        handler.send_header('Content-Length', str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+        
+    def record(self, item):
+        """Keep a request for later inspection"""
+        with self._lock:
+            self.calls.append(item)
+            
+    def start(self):
+        """Serve in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name=f'fake-{self.name}', daemon=True)
+        self._thread.start()
+        logger.info(f"Fake {self.name} listening on {self.url}")
+        return self
+        
+    def stop(self):
+        """Shut the server down"""
+        self._server.shutdown()
+        self._server.server_close()
+        
+    def get_stats(self):
+        """Get request counters"""
+        with self._lock:
+            return {'requests': self.requests, 'injected_failures': self.failures, 'recorded': len(self.calls)}
+
+
+def fake_bland_ai(profile=None):
+    """Bland AI: POST /v1/calls queues a call and records it so the harness can send its webhook"""
+    service = None
+    
+    def place_call(query, body):
+        call_id = uuid.uuid4().hex
+        service.record({'call_id': call_id, **body})
+        return 200, {'status': 'success', 'call_id': call_id, 'message': 'Call successfully queued.'}
+        
+    service = FakeService('bland_ai', {('POST', '/v1/calls'): place_call}, profile, failure_status=429)
+    return service
+
+
+def fake_coingecko(profile=None, pol_price=0.24213):
+    """CoinGecko: GET /api/v3/simple/price"""
+    def simple_price(query, body):
+        ids = query.get('ids', 'matic-network').split(',')
+        return 200, {coin_id: {'usd': pol_price * random.uniform(0.99, 1.01)} for coin_id in ids}
+        
+    return FakeService('coingecko', {('GET', '/api/v3/simple/price'): simple_price}, profile, failure_status=429)
+
+
+def _base_price(symbol):
+    """Stable made-up price per symbol"""
+    return 10 ** (1 + sum(map(ord, symbol)) % 5)
+
+
+def fake_exchange(profile=None):
+    """Exchange with ccxt-shaped JSON: GET /ticker and GET /ohlcv, random walks around a per-symbol price"""
+    def ticker(query, body):
+        symbol = query['symbol']
+        last = _base_price(symbol) * random.uniform(0.97, 1.03)
+        return 200, {'symbol': symbol, 'last': last, 'quoteVolume': last * random.uniform(1e4, 1e6)}
+        
+    def ohlcv(query, body):
+        symbol = query['symbol']
+        limit = int(query.get('limit', 30))
+        step = 86400000  # one day in ms; only the 1d timeframe is simulated
+        now = int(time.time() * 1000) // step * step
+        price = _base_price(symbol)
+        rows = []
+        for i in range(limit):
+            close = price * math.exp(random.gauss(0, 0.02))
+            high, low = max(price, close) * 1.01, min(price, close) * 0.99
+            rows.append([now - (limit - i) * step, price, high, low, close, random.uniform(1e3, 1e5)])
+            price = close
+        return 200, rows
+        
+    return FakeService('exchange', {('GET', '/ticker'): ticker, ('GET', '/ohlcv'): ohlcv}, profile)
+
+
+def gemini_responder(prompt):
+    """Answer the app's prompts in the shape it expects: JSON analyses or plain text"""
+    if 'Respond with a JSON array only' in prompt:
+        ids = [int(i) for i in BATCH_CALL_ID.findall(prompt)]
+        return json.dumps([{'id': i, **random.choice(ANALYSES)} for i in ids])
+    if 'Respond with JSON only' in prompt:
+        return json.dumps(random.choice(ANALYSES))
+    return ("Thanks for your questions. Based on the current trend and risk level this looks like a "
+            "reasonable option. Say the word rates to confirm the investment.")
+
+
+def fake_gemini(profile=None):
+    """Gemini: POST /v1/generate returns {"text": ...} for {"prompt": ...}"""
+    def generate(query, body):
+        return 200, {'text': gemini_responder(body.get('prompt', ''))}
+        
+    return FakeService('gemini', {('POST', '/v1/generate'): generate}, profile)
+
+
+def start_fake_services(profiles=None):
+    """Start every fake service; profiles maps service name -> LatencyProfile"""
+    profiles = profiles or {}
+    services = {
+        'bland_ai': fake_bland_ai(profiles.get('bland_ai')),
+        'coingecko': fake_coingecko(profiles.get('coingecko')),
+        'exchange': fake_exchange(profiles.get('exchange')),
+        'gemini': fake_gemini(profiles.get('gemini'))
+    }
+    for service in services.values():
+        service.start()
+    return services
+
+
+class FakeExchange:
+    def __init__(self, base_url, timeout=10):
+        """ccxt-compatible client for the fake exchange (fetch_ticker/fetch_ohlcv only)"""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        
+    def fetch_ticker(self, symbol):
+        """Get the 24h ticker for symbol"""
+        response = self.session.get(f"{self.base_url}/ticker", params={'symbol': symbol}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+        
+    def fetch_ohlcv(self, symbol, timeframe='1d', limit=30):
+        """Get [timestamp, open, high, low, close, volume] rows"""
+        response = self.session.get(
+            f"{self.base_url}/ohlcv",
+            params={'symbol': symbol, 'timeframe': timeframe, 'limit': limit},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+class RemoteGeminiModel:
+    def __init__(self, base_url, timeout=30):
+        """Client for the fake Gemini service exposing generate_content like the SDK model"""
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Generate a response (streamed word by word when stream=True)"""
+        response = self.session.post(f"{self.base_url}/v1/generate", json={'prompt': prompt}, timeout=self.timeout)
+        if response.status_code >= 500:
+            # Surface as a transient error so the gateway retries, like the SDK's ServiceUnavailable
+            raise ConnectionError(f"Fake Gemini returned {response.status_code}")
+        response.raise_for_status()
+        text = response.json()['text']
+        if not stream:
+            return FakeResponse(text)
+        return (FakeResponse(word if i == 0 else ' ' + word) for i, word in enumerate(text.split(' ')))
@@ -0,0 +1,134 @@
+"""
+BlockDAG Fee Oracle for OSCARR
+Samples recent network fees in the background and serves cached fee and gas estimates.
+All gas prices are in wei.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config.blockdag_config import DEFAULT_CONFIG, FEE_ORACLE_CONFIG, FEE_TIERS
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class FeeOracle:
+    """Background fee sampler with cached per-tier gas price and per-call gas estimates"""
+    
+    def __init__(self, client, config: Dict = None):
+        """Initialize the oracle with a BlockDAG client and optional config overrides"""
+        self.client = client
+        self.config = {**FEE_ORACLE_CONFIG, **(config or {})}
+        self._lock = threading.Lock()
+        self._fee_estimates: Dict[str, int] = {}
+        self._fees_updated_at = 0.0
+        self._gas_estimates: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._stop_event = threading.Event()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        
+    def start(self):
+        """Take an initial fee sample and start the background sampler"""
+        with self._start_lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self.refresh()
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='fee-oracle', daemon=True)
+            self._thread.start()
+            
+    def _ensure_started(self):
+        """Start sampling on first use, so creating an oracle (or a wallet) has no side effects"""
+        if self._thread is None and not self._stop_event.is_set():
+            self.start()
+        
+    def stop(self):
+        """Stop the background sampler"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=self.config['sample_interval'])
+            self._thread = None
+            
+    def _run(self):
+        """Sampler loop: refresh fee estimates every sample_interval seconds"""
+        while not self._stop_event.wait(self.config['sample_interval']):
+            self.refresh()
+            
+    def refresh(self) -> Dict[str, int]:
+        """Sample recent network fees and recompute the tier estimates"""
+        try:
+            prices = sorted(
+                int(p) for p in self.client.get_recent_gas_prices(limit=self.config['sample_size'])
+            )
+            if not prices:
+                logger.warning("No recent gas prices returned, keeping previous fee estimates")
+                return self._cached_estimates()
+                
+            estimates = {
+                tier: int(min(self._percentile(prices, pct), self.config['max_gas_price']))
+                for tier, pct in FEE_TIERS.items()
+            }
+            with self._lock:
+                self._fee_estimates = estimates
+                self._fees_updated_at = time.monotonic()
+            return estimates
+            
+        except Exception as e:
+            logger.error(f"Error sampling network fees: {e}")
+            return self._cached_estimates()
+            
+    @staticmethod
+    def _percentile(sorted_values: List[float], pct: float) -> float:
+        """Linear-interpolated percentile of an already sorted list"""
+        if len(sorted_values) == 1:
+            return sorted_values[0]
+        rank = (len(sorted_values) - 1) * pct / 100.0
+        lower = int(rank)
+        upper = min(lower + 1, len(sorted_values) - 1)
+        return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+        
+    def _cached_estimates(self) -> Dict[str, int]:
+        """Cached gas prices (wei) for every tier, falling back to the default when stale"""
+        with self._lock:
+            fresh = time.monotonic() - self._fees_updated_at <= self.config['max_estimate_age']
+            if self._fee_estimates and fresh:
+                return dict(self._fee_estimates)
+        return {tier: DEFAULT_CONFIG['gas_price'] for tier in FEE_TIERS}
+        
+    def get_fee_estimates(self) -> Dict[str, int]:
+        """Get cached gas prices (wei) for every tier, starting the sampler on first use"""
+        self._ensure_started()
+        return self._cached_estimates()
+        
+    def get_gas_price(self, tier: str = 'standard') -> int:
+        """Get the cached gas price (wei) for a fee tier"""
+        if tier not in FEE_TIERS:
+            raise ValueError(f"Unknown fee tier '{tier}', expected one of {list(FEE_TIERS)}")
+        return self.get_fee_estimates()[tier]
+        
+    def get_gas_limit(self, asset: str, call_type: str, tx_data: Dict) -> int:
+        """Get the gas limit for a call, estimating once per (asset, call type) and caching it"""
+        key = (asset, call_type)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._gas_estimates.get(key)
+            if cached and now - cached[1] <= self.config['gas_estimate_ttl']:
+                return cached[0]
+                
+        try:
+            estimate = int(self.client.estimate_gas(tx_data) * self.config['gas_limit_margin'])
+        except Exception as e:
+            logger.error(f"Error estimating gas for {asset}/{call_type}: {e}")
+            return DEFAULT_CONFIG['gas_limit']
+            
+        with self._lock:
+            self._gas_estimates[key] = (estimate, now)
+        return estimate
+        
+    def invalidate_gas_estimate(self, asset: str, call_type: str):
+        """Drop a cached gas estimate, e.g. after an out-of-gas failure"""
+        with self._lock:
+            self._gas_estimates.pop((asset, call_type), None)
@@ -6,6 +6,9 @@ import ccxt
 import requests
 from config.config import *
 from .wallet_monitor import WalletMonitor
+from .metrics import instrument, track
+from .safety_net import SafetyNetEstimator, resolve_safety_net
+from .portfolio_allocator import PortfolioAllocator
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -15,21 +18,41 @@ class InvestmentAnalyzer:
     def __init__(self):
         self.wallet_monitor = WalletMonitor()
         # Initialize Binance exchange without API keys for public data
-        self.binance = ccxt.binance({
-            'enableRateLimit': True
-        })
+        self.binance = instrument(
+            ccxt.binance({'enableRateLimit': True}),
+            'binance',
+            ['fetch_ticker', 'fetch_ohlcv']
+        )
         self.pol_price = self.get_pol_price()
+        self.safety_net_estimator = None
+        if SAFETY_NET_METHOD == 'monte_carlo':
+            self.safety_net_estimator = SafetyNetEstimator(
+                horizon_days=SAFETY_NET_HORIZON_DAYS,
+                n_paths=SAFETY_NET_PATHS,
+                confidence=SAFETY_NET_CONFIDENCE,
+                history_days=SAFETY_NET_HISTORY_DAYS,
+                seed=SAFETY_NET_SEED
+            )
+        self.portfolio_allocator = PortfolioAllocator(
+            method=PORTFOLIO_METHOD,
+            memecoin_cap=PORTFOLIO_MEMECOIN_CAP,
+            max_weight=PORTFOLIO_MAX_WEIGHT,
+            risk_aversion=PORTFOLIO_RISK_AVERSION,
+            lookback=PORTFOLIO_LOOKBACK_DAYS
+        )
+        self.candles = {}  # symbol -> daily closes from the latest fetch
         
     def get_pol_price(self):
         """Get real-time POL price from CoinGecko"""
         try:
-            url = "https://api.coingecko.com/api/v3/simple/price"
+            url = f"{COINGECKO_BASE_URL}/api/v3/simple/price"
             params = {
                 "ids": "matic-network",  # CoinGecko ID for POL (formerly MATIC)
                 "vs_currencies": "usd"
             }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
+            with track('coingecko', 'simple_price'):
+                response = requests.get(url, params=params)
+                response.raise_for_status()
             data = response.json()
             return data["matic-network"]["usd"]
         except Exception as e:
@@ -42,14 +65,21 @@ class InvestmentAnalyzer:
         self.pol_price = self.get_pol_price()
         return self.pol_price
 
-    def identify_unused_funds(self):
-        """Identify unused funds based on spending patterns and thresholds"""
+    def identify_unused_funds(self, safety_net=None, wallet_monitor=None):
+        """Identify unused funds based on spending patterns and thresholds
+
+        wallet_monitor is the user's wallet (this analyzer's own wallet by default). safety_net
+        can be passed in when it was estimated for many wallets in one batch (the nightly scan).
+        Whatever the estimate, at least SAFETY_NET_MIN_MONTHS of average spending is kept.
+        """
         try:
+            wallet_monitor = wallet_monitor or self.wallet_monitor
+            
             # Get current balance in POL
-            current_balance = self.wallet_monitor.get_ethereum_balance()
+            current_balance = wallet_monitor.get_ethereum_balance()
             
             # Calculate spending patterns in POL
-            spending_patterns = self.wallet_monitor.calculate_spending_patterns()
+            spending_patterns = wallet_monitor.calculate_spending_patterns()
             if not spending_patterns:
                 # If no spending patterns, use default threshold (equivalent to ~$50 in POL)
                 monthly_average = 206.5  # ~50 USD worth of POL
@@ -59,8 +89,11 @@ class InvestmentAnalyzer:
             # Calculate threshold (50% above monthly spending)
             threshold = monthly_average * (1 + UNUSED_BALANCE_THRESHOLD)
             
-            # Calculate unused funds (anything above 3 months of spending)
-            safety_net = monthly_average * 3  # Keep 3 months of expenses as safety net
+            # Keep what covers simulated spending over the horizon at SAFETY_NET_CONFIDENCE
+            if safety_net is None and self.safety_net_estimator is not None:
+                safety_net = self.safety_net_estimator.estimate(wallet_monitor)
+            # Without an estimate keep 3 months of expenses; with one, never less than the floor
+            safety_net = resolve_safety_net(safety_net, monthly_average, SAFETY_NET_MIN_MONTHS)
             unused_funds = current_balance - safety_net
             
             if unused_funds >= MIN_INVESTMENT_AMOUNT / self.pol_price:  # Convert USD minimum to POL
@@ -68,6 +101,7 @@ class InvestmentAnalyzer:
                     'total_balance': current_balance,
                     'monthly_average': monthly_average,
                     'unused_funds': unused_funds,
+                    'safety_net': safety_net,
                     'threshold': threshold,
                     'usd_equivalent': unused_funds * self.pol_price  # Add USD equivalent for reference
                 }
@@ -102,7 +136,7 @@ class InvestmentAnalyzer:
                     ohlcv = self.binance.fetch_ohlcv(
                         symbol,
                         timeframe='1d',
-                        limit=30
+                        limit=max(30, PORTFOLIO_LOOKBACK_DAYS + 1)
                     )
                     
                     # Convert to DataFrame for analysis
@@ -110,12 +144,14 @@ class InvestmentAnalyzer:
                         ohlcv,
                         columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
                     )
+                    self.candles[symbol] = df['close'].to_numpy()
                     
                     # Calculate daily return
                     daily_return = (ticker['last'] - df['close'].iloc[-1]) / df['close'].iloc[-1]
                     
-                    # Calculate volatility
-                    volatility = (df['high'] - df['low']).mean() / df['close'].mean()
+                    # Calculate volatility over the last 30 days
+                    recent = df.tail(30)
+                    volatility = (recent['high'] - recent['low']).mean() / recent['close'].mean()
                     
                     # Determine risk level based on volatility and if it's a memecoin
                     is_memecoin = symbol in ['DOGE/USDT', 'SHIB/USDT', 'PEPE/USDT', 'FLOKI/USDT']
@@ -151,8 +187,17 @@ class InvestmentAnalyzer:
                     logger.error(f"Error fetching data for {symbol}: {e}")
                     continue
             
-            # Sort suggestions: First by type (standard then memecoins), then by daily return
-            suggestions.sort(key=lambda x: (x['is_memecoin'], -x['daily_return']))
+            # Split the funds across the candidates instead of ranking them one by one
+            weights = self.portfolio_allocator.allocate(
+                {s['symbol']: self.candles[s['symbol']] for s in suggestions},
+                memecoins={s['symbol'] for s in suggestions if s['is_memecoin']}
+            )
+            for suggestion in suggestions:
+                suggestion['allocation'] = weights.get(suggestion['symbol'], 0.0)
+                suggestion['allocation_pol'] = suggestion['allocation'] * amount_pol
+            
+            # Sort suggestions: First by type (standard then memecoins), then by allocation and daily return
+            suggestions.sort(key=lambda x: (x['is_memecoin'], -x['allocation'], -x['daily_return']))
             
             return suggestions
             
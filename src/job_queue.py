@@ -0,0 +1,320 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from .metrics import registry
+from .tracing import tracer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+job_seconds = registry.histogram('oscarr_job_seconds', 'Job processing time', ['kind', 'outcome'])
+job_stage_seconds = registry.histogram('oscarr_job_stage_seconds', 'Time spent in each job stage', ['kind', 'stage'])
+
+
+class JobQueue:
+    def __init__(self, db_path='data/jobs.db', max_attempts=3, retry_backoff=5.0, lease_seconds=300):
+        """Initialize a durable SQLite-backed job queue"""
+        self.db_path = db_path
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds  # running jobs whose worker stopped renewing are reclaimed after this
+        self._local = threading.local()
+        self._job_available = threading.Event()
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                run_after REAL NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                last_error TEXT,
+                timings TEXT,
+                dedup_key TEXT,
+                claim_token TEXT
+            )"""
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+        if 'dedup_key' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN dedup_key TEXT")
+        if 'claim_token' not in columns:
+            conn.execute("ALTER TABLE jobs ADD COLUMN claim_token TEXT")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_due ON jobs (status, run_after)")
+        conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedup ON jobs (dedup_key)")
+        conn.commit()
+        
+    def _connection(self):
+        """Get this thread's SQLite connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+        
+    def enqueue(self, kind, payload, dedup_key=None):
+        """Persist a job and return its id; a repeated dedup_key returns the existing job's id"""
+        return self.enqueue_once(kind, payload, dedup_key)[0]
+        
+    def enqueue_once(self, kind, payload, dedup_key=None):
+        """Persist a job unless one with dedup_key exists; returns (job_id, is_duplicate)
+        
+        The unique index on dedup_key makes this safe across threads and processes. A job that
+        already died is the exception: a new delivery revives it with the new payload. Once
+        purge() deletes a finished job its dedup_key is free again.
+        """
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, kind, payload, run_after, created_at, updated_at, dedup_key) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now, now, dedup_key)
+            ).rowcount
+            duplicate = False
+            if not inserted:
+                job_id, status = conn.execute(
+                    "SELECT id, status FROM jobs WHERE dedup_key = ?", (dedup_key,)
+                ).fetchone()
+                if status == 'dead':
+                    conn.execute(
+                        "UPDATE jobs SET kind = ?, payload = ?, status = 'pending', attempts = 0, run_after = ?, "
+                        "updated_at = ?, claim_token = NULL WHERE id = ?",
+                        (kind, json.dumps(payload), now, now, job_id)
+                    )
+                    logger.info(f"Re-enqueued dead job {job_id} for {dedup_key}")
+                else:
+                    duplicate = True
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if not duplicate:
+            self._job_available.set()
+        return job_id, duplicate
+        
+    def wait_for_job(self, timeout):
+        """Block until a job is enqueued in this process or the timeout passes"""
+        if self._job_available.wait(timeout):
+            self._job_available.clear()
+            
+    def claim(self):
+        """Atomically take the oldest due job (or an expired lease); returns None if idle
+        
+        The returned token identifies this claim: once the lease expires and another worker
+        reclaims the job, the old token no longer completes, fails or renews it. An expired
+        lease that already used its last attempt (e.g. the job keeps crashing its worker) is
+        marked dead instead of being run again.
+        """
+        conn = self._connection()
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "UPDATE jobs SET status = 'dead', updated_at = ?, last_error = ?, claim_token = NULL "
+                "WHERE status = 'running' AND run_after <= ? AND attempts >= ?",
+                (now, 'Lease expired on the last attempt', now, self.max_attempts)
+            )
+            row = conn.execute(
+                "SELECT id, kind, payload, attempts FROM jobs "
+                "WHERE (status = 'pending' AND run_after <= ?) OR (status = 'running' AND run_after <= ?) "
+                "ORDER BY run_after LIMIT 1",
+                (now, now)
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, run_after = ?, updated_at = ?, "
+                "claim_token = ? WHERE id = ?",
+                (now + self.lease_seconds, now, token, row[0])
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return {'id': row[0], 'kind': row[1], 'payload': json.loads(row[2]), 'attempts': row[3] + 1, 'token': token}
+        
+    def extend_lease(self, job_id, token):
+        """Push back the lease of a job this claim still owns; False if it was lost"""
+        now = time.time()
+        return self._connection().execute(
+            "UPDATE jobs SET run_after = ?, updated_at = ? WHERE id = ? AND claim_token = ? AND status = 'running'",
+            (now + self.lease_seconds, now, job_id, token)
+        ).rowcount == 1
+        
+    def complete(self, job_id, token, timings=None):
+        """Mark a job done and store its per-stage timings; False if the claim was lost"""
+        return self._connection().execute(
+            "UPDATE jobs SET status = 'done', updated_at = ?, timings = ?, claim_token = NULL "
+            "WHERE id = ? AND claim_token = ? AND status = 'running'",
+            (time.time(), json.dumps(timings or {}), job_id, token)
+        ).rowcount == 1
+        
+    def fail(self, job_id, token, attempts, error, timings=None):
+        """Schedule a retry with exponential backoff, or mark the job dead after max_attempts
+        
+        Returns the new status, or None if the claim was lost (the job belongs to another worker).
+        """
+        now = time.time()
+        if attempts >= self.max_attempts:
+            status, run_after = 'dead', now
+        else:
+            status, run_after = 'pending', now + self.retry_backoff * 2 ** (attempts - 1)
+        updated = self._connection().execute(
+            "UPDATE jobs SET status = ?, run_after = ?, updated_at = ?, last_error = ?, timings = ?, claim_token = NULL "
+            "WHERE id = ? AND claim_token = ? AND status = 'running'",
+            (status, run_after, now, str(error), json.dumps(timings or {}), job_id, token)
+        ).rowcount
+        return status if updated else None
+        
+    def purge(self, older_than):
+        """Delete done and dead jobs last updated more than older_than seconds ago; returns the count"""
+        deleted = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN ('done', 'dead') AND updated_at < ?",
+            (time.time() - older_than,)
+        ).rowcount
+        if deleted:
+            logger.info(f"Purged {deleted} finished jobs")
+        return deleted
+        
+    def get_job(self, job_id):
+        """Get a job's status, attempts, last error and timings"""
+        row = self._connection().execute(
+            "SELECT status, attempts, last_error, timings FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': job_id,
+            'status': row[0],
+            'attempts': row[1],
+            'last_error': row[2],
+            'timings': json.loads(row[3]) if row[3] else {}
+        }
+        
+    def get_stats(self):
+        """Count jobs by status"""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+class StageTimer:
+    def __init__(self):
+        """Record how long each named stage of a job takes"""
+        self.timings = {}
+        
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work (and trace it as a span of the job's trace)"""
+        start = time.perf_counter()
+        try:
+            with tracer.span(name):
+                yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 4)
+
+
+class JobWorkerPool:
+    def __init__(self, job_queue, handlers, num_workers=4, poll_interval=0.5):
+        """Drain the queue with a fixed number of worker threads; handlers map job kind -> fn(payload, timer)"""
+        self.job_queue = job_queue
+        self.handlers = handlers
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._running = {}  # job id -> claim token, renewed by the heartbeat thread
+        self._running_lock = threading.Lock()
+        
+    def start(self):
+        """Start the worker threads and the lease heartbeat"""
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self._work, name=f'job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        thread = threading.Thread(target=self._heartbeat, name='job-heartbeat', daemon=True)
+        thread.start()
+        self._threads.append(thread)
+        
+    def _heartbeat(self):
+        """Renew the leases of running jobs so long handlers are not reclaimed mid-run"""
+        interval = self.job_queue.lease_seconds / 3
+        while not self._stop_event.wait(interval):
+            with self._running_lock:
+                running = list(self._running.items())
+            for job_id, token in running:
+                try:
+                    if not self.job_queue.extend_lease(job_id, token):
+                        logger.warning(f"Lost the lease on job {job_id}")
+                except Exception as e:
+                    logger.error(f"Error renewing lease on job {job_id}: {e}")
+                    
+    def stop(self, timeout=10):
+        """Stop the workers after their current job"""
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        
+    def _work(self):
+        """Claim and run jobs until stopped"""
+        while not self._stop_event.is_set():
+            try:
+                job = self.job_queue.claim()
+            except Exception as e:
+                logger.error(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                # Wake immediately for local enqueues; poll for retries and other processes' jobs
+                self.job_queue.wait_for_job(self.poll_interval)
+                continue
+            self._run(job)
+            
+    def _run(self, job):
+        """Run one job and record its outcome"""
+        timer = StageTimer()
+        start = time.perf_counter()
+        with self._running_lock:
+            self._running[job['id']] = job['token']
+        try:
+            handler = self.handlers[job['kind']]
+            handler(job['payload'], timer)
+        except Exception as e:
+            timer.timings['total'] = round(time.perf_counter() - start, 4)
+            self._observe(job['kind'], 'failed', timer.timings)
+            status = self.job_queue.fail(job['id'], job['token'], job['attempts'], e, timer.timings)
+            logger.error(f"Job {job['id']} ({job['kind']}) failed on attempt {job['attempts']}, now {status or 'owned by another worker'}: {e}")
+            return
+        finally:
+            with self._running_lock:
+                self._running.pop(job['id'], None)
+                
+        timer.timings['total'] = round(time.perf_counter() - start, 4)
+        self._observe(job['kind'], 'done', timer.timings)
+        if self.job_queue.complete(job['id'], job['token'], timer.timings):
+            logger.info(f"Job {job['id']} ({job['kind']}) done: {timer.timings}")
+        else:
+            logger.warning(f"Job {job['id']} ({job['kind']}) finished after losing its lease: {timer.timings}")
+            
+    def _observe(self, kind, outcome, timings):
+        """Record a job's total and per-stage times in the metrics registry"""
+        job_seconds.labels(kind, outcome).observe(timings['total'])
+        for stage, seconds in timings.items():
+            if stage != 'total':
+                job_stage_seconds.labels(kind, stage).observe(seconds)
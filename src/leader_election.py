@@ -0,0 +1,128 @@
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class LeaderLease:
+    def __init__(self, db_path='data/leader.db', name='scheduler', ttl=30.0, renew_interval=10.0,
+                 on_elected=None, on_revoked=None):
+        """Elect one leader among processes sharing db_path via a renewable SQLite lease"""
+        self.db_path = db_path
+        self.name = name
+        self.ttl = ttl
+        self.renew_interval = renew_interval
+        self.on_elected = on_elected
+        self.on_revoked = on_revoked
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases ("
+            "name TEXT PRIMARY KEY, holder TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.close()
+        
+    def _connect(self):
+        """Open a connection in autocommit mode so transactions are explicit"""
+        return sqlite3.connect(self.db_path, timeout=self.ttl / 2, isolation_level=None)
+        
+    def try_acquire(self):
+        """Take or renew the lease if it is free, expired, or already ours; returns True if we hold it"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT holder, expires_at FROM leases WHERE name = ?", (self.name,)).fetchone()
+            if row is None or row[0] == self.holder_id or row[1] <= now:
+                conn.execute(
+                    "INSERT OR REPLACE INTO leases (name, holder, expires_at) VALUES (?, ?, ?)",
+                    (self.name, self.holder_id, now + self.ttl)
+                )
+                conn.execute("COMMIT")
+                return True
+            conn.execute("COMMIT")
+            return False
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+            
+    def release(self):
+        """Give the lease up so another process can take over immediately"""
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder_id))
+        finally:
+            conn.close()
+            
+    def start(self):
+        """Campaign for leadership in the background"""
+        self._thread = threading.Thread(target=self._campaign, name=f'lease-{self.name}', daemon=True)
+        self._thread.start()
+        
+    def stop(self):
+        """Stop campaigning and release the lease if held"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        if self.is_leader:
+            self._set_leader(False)
+            self.release()
+            
+    def _campaign(self):
+        """Renew while leading, retry while following; step down if a renewal fails"""
+        while not self._stop_event.is_set():
+            try:
+                acquired = self.try_acquire()
+            except Exception as e:
+                logger.error(f"Error renewing {self.name} lease: {e}")
+                acquired = False
+            if acquired != self.is_leader:
+                self._set_leader(acquired)
+            self._stop_event.wait(self.renew_interval)
+            
+    def _set_leader(self, is_leader):
+        """Record a leadership change and run the matching callback"""
+        self.is_leader = is_leader
+        logger.info(f"{self.holder_id} {'became' if is_leader else 'is no longer'} {self.name} leader")
+        callback = self.on_elected if is_leader else self.on_revoked
+        if callback:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error handling {self.name} leadership change: {e}")
+                if is_leader:
+                    self._step_down()
+                    
+    def _step_down(self):
+        """Give up a lease whose duties failed to start, so it isn't renewed with nothing running
+        
+        The next campaign round (here or in another process) takes the lease and tries again.
+        """
+        self.is_leader = False
+        try:
+            # Undo whatever part of the duties did start
+            if self.on_revoked:
+                self.on_revoked()
+        except Exception as e:
+            logger.error(f"Error stopping {self.name} duties after a failed start: {e}")
+        try:
+            self.release()
+        except Exception as e:
+            logger.error(f"Error releasing {self.name} lease: {e}")
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from .llm_streaming import SentenceStream, StreamFeed
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Error types (by class name, so no provider SDK import is needed) worth retrying
+TRANSIENT_ERRORS = {
+    'ResourceExhausted',
+    'ServiceUnavailable',
+    'DeadlineExceeded',
+    'InternalServerError',
+    'TooManyRequests',
+}
+
+
+def is_transient(error):
+    """Check whether an error is worth retrying"""
+    if isinstance(error, (ConnectionError, asyncio.TimeoutError, TimeoutError)):
+        return True
+    return type(error).__name__ in TRANSIENT_ERRORS
+
+
+class LLMGateway:
+    def __init__(self, model, max_concurrency=8, timeout=30.0, max_retries=2,
+                 backoff_base=0.5, hedge_after=None):
+        """Initialize the gateway around a model exposing generate_content(prompt)"""
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.hedge_after = hedge_after  # seconds before a duplicate request is sent; None disables
+        self.hedges_sent = 0
+        self.retries = 0
+        
+        # Blocking SDK calls run here, at most max_concurrency at a time (see _submit)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='llm-call')
+        
+        # Dedicated event loop so synchronous Flask handlers can share one concurrency limit
+        self._loop = asyncio.new_event_loop()
+        self._semaphore = None
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, name='llm-gateway', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        
+    def _run_loop(self):
+        """Run the gateway's event loop in a background thread"""
+        asyncio.set_event_loop(self._loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._loop.call_soon(self._ready.set)
+        self._loop.run_forever()
+        
+    def _call_model(self, prompt, cache_key):
+        """Invoke the underlying (blocking) model and return the response text"""
+        if cache_key is not None:
+            return self.model.generate_content(prompt, cache_key=cache_key).text
+        return self.model.generate_content(prompt).text
+        
+    def _submit(self, call):
+        """Run a blocking call in the executor with a slot already taken from the semaphore
+        
+        The slot is released when the call actually finishes, not when its caller stops waiting:
+        a call abandoned by a timeout keeps running in its thread, so it keeps counting.
+        """
+        future = self._executor.submit(call)
+        future.add_done_callback(lambda _: self._loop.call_soon_threadsafe(self._semaphore.release))
+        return asyncio.wrap_future(future, loop=self._loop)
+        
+    async def _attempt(self, prompt, cache_key):
+        """Single attempt, hedged with a duplicate request if the first one is slow"""
+        call = partial(self._call_model, prompt, cache_key)
+        await self._semaphore.acquire()
+        primary = self._submit(call)
+        if self.hedge_after is None:
+            return await primary
+            
+        done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        if done:
+            return primary.result()
+        if self._semaphore.locked():
+            # No spare slot: a duplicate would only queue behind other callers
+            return await primary
+            
+        await self._semaphore.acquire()
+        self.hedges_sent += 1
+        hedge = self._submit(call)
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                error = future.exception()
+        raise error
+        
+    async def agenerate(self, prompt, cache_key=None, timeout=None):
+        """Generate text with a concurrency slot per model call, an overall deadline and jittered retries"""
+        deadline = self._loop.time() + (timeout or self.timeout)
+        attempt = 0
+        while True:
+            remaining = deadline - self._loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError("LLM call deadline exceeded")
+            try:
+                return await asyncio.wait_for(self._attempt(prompt, cache_key), remaining)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_transient(e):
+                    raise
+                attempt += 1
+                self.retries += 1
+                # Full jitter: sleep a random slice of the exponential backoff window
+                backoff = random.uniform(0, self.backoff_base * 2 ** attempt)
+                backoff = min(backoff, max(deadline - self._loop.time(), 0))
+                logger.warning(f"Transient LLM error ({e}), retry {attempt} in {backoff:.2f}s")
+                await asyncio.sleep(backoff)
+                    
+    def generate(self, prompt, cache_key=None, timeout=None):
+        """Blocking wrapper for callers outside the event loop (e.g. Flask handlers)"""
+        timeout = timeout or self.timeout
+        future = asyncio.run_coroutine_threadsafe(
+            self.agenerate(prompt, cache_key=cache_key, timeout=timeout), self._loop
+        )
+        try:
+            # Small grace period so the in-loop deadline fires first and reports cleanly
+            return future.result(timeout + 1.0)
+        except Exception:
+            future.cancel()
+            raise
+            
+    def stream(self, prompt, cache_key=None, timeout=None, name='llm_stream'):
+        """Stream a completion as sentence-level segments, consumed in the caller's thread
+        
+        Generation takes a concurrency slot like generate() and must finish within timeout,
+        counting the wait for the slot. Transient errors are retried until the first chunk
+        arrives. Call cancel() on the result when the caller hangs up: the upstream request is
+        closed and its slot freed.
+        """
+        feed = StreamFeed(time.monotonic() + (timeout or self.timeout))
+        stream = SentenceStream(feed, name=name, started_at=time.perf_counter())
+        feed.start_future = asyncio.run_coroutine_threadsafe(self._start_stream(prompt, cache_key, feed), self._loop)
+        return stream
+        
+    async def _start_stream(self, prompt, cache_key, feed):
+        """Wait for a slot, then generate the stream in the executor (the slot is held until it ends)"""
+        await self._semaphore.acquire()
+        if feed.cancelled.is_set():
+            self._semaphore.release()
+            return
+        self._submit(partial(self._produce_stream, prompt, cache_key, feed))
+        
+    def _produce_stream(self, prompt, cache_key, feed):
+        """Read the model's stream into the feed, stopping upstream as soon as the feed is cancelled"""
+        attempt = 0
+        while True:
+            started = False
+            try:
+                kwargs = {'stream': True} if cache_key is None else {'stream': True, 'cache_key': cache_key}
+                chunks = self.model.generate_content(prompt, **kwargs)
+                try:
+                    for chunk in chunks:
+                        if feed.cancelled.is_set():
+                            break
+                        text = getattr(chunk, 'text', chunk)
+                        if text:
+                            started = True
+                            feed.put(text)
+                finally:
+                    # Closing the response iterator stops reading it, which ends the request upstream
+                    close = getattr(chunks, 'close', None)
+                    if close:
+                        close()
+                feed.finish()
+                return
+            except Exception as e:
+                # Text already handed on cannot be taken back, so only a stream that has not started is retried
+                if started or feed.cancelled.is_set() or attempt >= self.max_retries or not is_transient(e):
+                    feed.fail(e)
+                    return
+                attempt += 1
+                self.retries += 1
+                backoff = random.uniform(0, self.backoff_base * 2 ** attempt)
+                logger.warning(f"Transient LLM stream error ({e}), retry {attempt} in {backoff:.2f}s")
+                if feed.cancelled.wait(min(backoff, max(feed.deadline - time.monotonic(), 0))) or feed.expired():
+                    feed.fail(e)
+                    return
+                    
+    def close(self):
+        """Stop the background event loop"""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
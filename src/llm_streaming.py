@@ -0,0 +1,187 @@
+import logging
+import queue
+import re
+import threading
+import time
+from .metrics import registry
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A sentence ends at ., ! or ? followed by whitespace (the final sentence is flushed at end of stream)
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+stream_first_token_seconds = registry.histogram(
+    'oscarr_llm_stream_first_token_seconds',
+    'Time from an LLM stream request to its first token',
+    ['name']
+)
+stream_seconds = registry.histogram(
+    'oscarr_llm_stream_seconds',
+    'Total time of LLM streams by how they ended',
+    ['name', 'outcome']
+)
+
+
+class StreamFeed:
+    def __init__(self, deadline):
+        """Chunks handed from the thread generating a stream to the thread consuming it
+
+        deadline is the time.monotonic() by which the stream must have finished, including any
+        wait for a concurrency slot; iterating past it raises TimeoutError and cancels the stream.
+        """
+        self.deadline = deadline
+        self.cancelled = threading.Event()
+        self.start_future = None  # set by the gateway while the request waits for a slot
+        self._queue = queue.Queue()
+        
+    def put(self, text):
+        """Pass on one chunk of generated text"""
+        self._queue.put(('chunk', text))
+        
+    def finish(self):
+        """Mark the end of the stream"""
+        self._queue.put(('end', None))
+        
+    def fail(self, error):
+        """End the stream with an error raised in the consumer"""
+        self._queue.put(('error', error))
+        
+    def cancel(self):
+        """Stop the stream from either side; the producer closes the upstream request when it sees this"""
+        self.cancelled.set()
+        if self.start_future is not None:
+            self.start_future.cancel()
+        self._queue.put(('end', None))
+        
+    close = cancel
+    
+    def expired(self):
+        """Whether the deadline has passed"""
+        return time.monotonic() >= self.deadline
+        
+    def __iter__(self):
+        """Yield chunks until the stream ends, fails, is cancelled or runs past the deadline"""
+        while True:
+            try:
+                kind, value = self._queue.get(timeout=max(self.deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self.cancel()
+                raise TimeoutError("LLM stream deadline exceeded")
+            if kind == 'chunk':
+                yield value
+            elif kind == 'end':
+                return
+            else:
+                raise value
+
+
+class SentenceStream:
+    def __init__(self, chunks, min_segment_chars=40, deadline=None, name='llm_stream', started_at=None):
+        """Wrap an iterator of streamed text chunks and yield sentence-level segments
+
+        started_at (a time.perf_counter() value) is when the request was made; by default timing
+        starts when iteration does.
+        """
+        self.chunks = chunks
+        self.min_segment_chars = min_segment_chars
+        self.deadline = deadline  # seconds from the start; None means no limit of its own
+        self.name = name
+        self.started_at = started_at
+        self.text = ''
+        self.segments = 0
+        self.cancelled = False
+        self.outcome = None
+        self.time_to_first_token = None
+        self.time_to_first_segment = None
+        self.total_time = None
+        self._cancel_event = threading.Event()
+        
+    def cancel(self):
+        """Stop the stream, e.g. when the caller hung up; safe to call from another thread"""
+        self._cancel_event.set()
+        cancel = getattr(self.chunks, 'cancel', None)
+        if cancel:
+            # Wakes a consumer blocked on the next chunk and stops generation upstream
+            cancel()
+            
+    def __iter__(self):
+        """Yield segments as soon as enough complete sentences have been received"""
+        start = self.started_at if self.started_at is not None else time.perf_counter()
+        buffer = ''
+        self.outcome = 'error'
+        try:
+            for chunk in self.chunks:
+                if self._cancel_event.is_set() or (
+                    self.deadline is not None and time.perf_counter() - start > self.deadline
+                ):
+                    self.cancelled = True
+                    break
+                    
+                text = getattr(chunk, 'text', chunk)
+                if not text:
+                    continue
+                if self.time_to_first_token is None:
+                    self.time_to_first_token = time.perf_counter() - start
+                    stream_first_token_seconds.labels(self.name).observe(self.time_to_first_token)
+                self.text += text
+                buffer += text
+                
+                # Everything before the last sentence boundary is complete
+                parts = SENTENCE_END.split(buffer)
+                if len(parts) > 1:
+                    complete = ' '.join(parts[:-1]).strip()
+                    if len(complete) >= self.min_segment_chars:
+                        buffer = parts[-1]
+                        yield self._emit(complete, start)
+                        
+            self.cancelled = self.cancelled or self._cancel_event.is_set()
+            if not self.cancelled and buffer.strip():
+                yield self._emit(buffer.strip(), start)
+            self.outcome = 'cancelled' if self.cancelled else 'completed'
+            
+        except GeneratorExit:
+            # The consumer stopped reading early (e.g. the call was already placed)
+            self.cancelled = True
+            self.outcome = 'cancelled'
+            raise
+            
+        except TimeoutError:
+            self.outcome = 'timeout'
+            raise
+            
+        finally:
+            close = getattr(self.chunks, 'close', None)
+            if self.outcome != 'completed' and close:
+                close()
+            self.total_time = time.perf_counter() - start
+            stream_seconds.labels(self.name, self.outcome).observe(self.total_time)
+            logger.info(
+                f"{self.name}: {self.segments} segments, "
+                f"ttft={self._format(self.time_to_first_token)}, "
+                f"first_segment={self._format(self.time_to_first_segment)}, "
+                f"total={self.total_time:.3f}s ({self.outcome})"
+            )
+            
+    def _emit(self, segment, start):
+        """Record segment metrics and return the segment"""
+        if self.time_to_first_segment is None:
+            self.time_to_first_segment = time.perf_counter() - start
+        self.segments += 1
+        return segment
+        
+    @staticmethod
+    def _format(seconds):
+        return f"{seconds:.3f}s" if seconds is not None else 'n/a'
+        
+    def get_metrics(self):
+        """Get timing metrics for the stream"""
+        return {
+            'time_to_first_token': self.time_to_first_token,
+            'time_to_first_segment': self.time_to_first_segment,
+            'total_time': self.total_time,
+            'segments': self.segments,
+            'cancelled': self.cancelled,
+            'outcome': self.outcome
+        }
@@ -0,0 +1,278 @@
+import argparse
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'conversations-'
+SEGMENT_TIME_FORMAT = '%Y%m%d-%H%M%S'
+
+
+class LogRotator:
+    def __init__(self, log_dir='logs', archive_dir='logs/archive', segment_seconds=3600,
+                 retention_days=90, min_age=300, compress_level=6, archive=None):
+        """Roll closed conversations out of log_dir into compressed time segments
+
+        Each segment is a gzip file made of one gzip member per conversation (still readable
+        whole with zcat), with a sidecar .idx of byte offsets so one conversation can be read
+        by seeking to its member. Segments older than retention_days are deleted by expire().
+        """
+        self.log_dir = Path(log_dir)
+        self.archive_dir = Path(archive_dir)
+        self.segment_seconds = segment_seconds
+        self.retention_days = retention_days
+        self.min_age = min_age
+        self.compress_level = compress_level
+        self.archive = archive
+        self._lock = threading.Lock()
+        self.archive_dir.mkdir(parents=True, exist_ok=True)
+        
+    def segment_start(self, timestamp):
+        """Start (epoch seconds) of the segment holding a conversation started at timestamp"""
+        return int(timestamp // self.segment_seconds * self.segment_seconds)
+        
+    def segment_path(self, start):
+        """Path of the segment beginning at start"""
+        name = datetime.fromtimestamp(start).strftime(SEGMENT_TIME_FORMAT)
+        return self.archive_dir / f"{SEGMENT_PREFIX}{name}.jsonl.gz"
+        
+    @staticmethod
+    def index_path(segment):
+        """Sidecar index of a segment"""
+        return Path(str(segment)[:-len('.jsonl.gz')] + '.idx')
+        
+    def closed_conversations(self, now=None):
+        """JSON documents of conversations that are finished: no live journal and untouched for min_age"""
+        now = now or time.time()
+        for path in sorted(self.log_dir.glob('conversation_*.json')):
+            if path.with_suffix('.jsonl').exists():
+                continue
+            if now - path.stat().st_mtime < self.min_age:
+                continue
+            yield path
+            
+    def _companions(self, document_path, conversation_id):
+        """The text log and summary written alongside a conversation's JSON document"""
+        return [
+            document_path.with_suffix('.log'),
+            self.log_dir / f"summary_{conversation_id}.txt"
+        ]
+        
+    def rotate(self, now=None):
+        """Move every closed conversation into its segment; returns how many were rotated"""
+        start = time.perf_counter()
+        batches = defaultdict(list)
+        failed = 0
+        with self._lock:
+            for path in self.closed_conversations(now):
+                try:
+                    conversation, member = self._pack(path)
+                    started = datetime.fromisoformat(conversation['timestamp']).timestamp()
+                    batches[self.segment_path(self.segment_start(started))].append((path, conversation, member))
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Error rotating {path}: {e}")
+            rotated = 0
+            for segment, items in batches.items():
+                try:
+                    self._append(segment, items)
+                    rotated += len(items)
+                except Exception as e:
+                    failed += len(items)
+                    logger.error(f"Error appending to segment {segment}: {e}")
+        if rotated or failed:
+            logger.info(f"Rotated {rotated} conversations ({failed} failed) in {time.perf_counter() - start:.2f}s")
+        return rotated
+        
+    def _pack(self, path):
+        """Read a conversation and its text log into one compressed gzip member"""
+        with open(path) as f:
+            conversation = json.load(f)
+        log_file = path.with_suffix('.log')
+        record = {
+            'conversation': conversation,
+            'log': log_file.read_text(encoding='utf-8') if log_file.exists() else None
+        }
+        return conversation, gzip.compress(json.dumps(record, default=str).encode() + b'\n', self.compress_level)
+        
+    def _append(self, segment, items):
+        """Append a batch of members to a segment, index them, then remove their source files"""
+        entries = []
+        index_path = self.index_path(segment)
+        # Bytes past the last indexed member are from an append that crashed before indexing; their
+        # sources were kept, so drop the bytes rather than leave an unreadable member in the segment
+        indexed_end = max((offset + length for offset, length in self.load_index(segment).values()), default=0)
+        if segment.exists() and segment.stat().st_size > indexed_end:
+            logger.warning(f"Truncating unindexed tail of {segment} at byte {indexed_end}")
+            os.truncate(segment, indexed_end)
+        with open(segment, 'ab') as f:
+            for path, conversation, member in items:
+                entries.append({'conversation_id': conversation['conversation_id'], 'offset': f.tell(), 'length': len(member)})
+                f.write(member)
+            f.flush()
+            os.fsync(f.fileno())
+        # The index is written after the data, so an entry never points at bytes that are not on disk;
+        # a crash in between leaves unindexed members, which the next rotation truncates and re-appends
+        with open(index_path, 'a+b') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b'\n':
+                    # A torn last line from a crash must not swallow the first new entry
+                    f.write(b'\n')
+            f.writelines(json.dumps(entry).encode() + b'\n' for entry in entries)
+            f.flush()
+            os.fsync(f.fileno())
+            
+        if self.archive is not None:
+            try:
+                self.archive.ingest_many([conversation for _, conversation, _ in items], str(segment))
+            except Exception as e:
+                # The segment already holds them; keeping the sources would only append them twice
+                logger.error(f"Error indexing rotated conversations in the archive: {e}")
+        for path, conversation, member in items:
+            for file in [path] + self._companions(path, conversation['conversation_id']):
+                if file.exists():
+                    file.unlink()
+                    
+    def load_index(self, segment):
+        """conversation_id -> (offset, length) for a segment (the last entry wins)"""
+        index = {}
+        index_path = self.index_path(segment)
+        if not index_path.exists():
+            return index
+        with open(index_path) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                    index[entry['conversation_id']] = (entry['offset'], entry['length'])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    # A torn line from a crash mid-append; later lines are still good
+                    continue
+        return index
+        
+    def _candidate_segments(self, conversation_id):
+        """Segments to look in: the one implied by the id's start time first, then all others"""
+        segments = self.list_segments()
+        try:
+            started = datetime.strptime(conversation_id, '%Y%m%d_%H%M%S').timestamp()
+            likely = self.segment_path(self.segment_start(started))
+            segments = [likely] + [segment for segment in segments if segment != likely]
+        except ValueError:
+            pass
+        return segments
+        
+    def read(self, conversation_id):
+        """Read one rotated conversation ({'conversation': ..., 'log': ...}) by seeking to its member"""
+        for segment in self._candidate_segments(conversation_id):
+            entry = self.load_index(segment).get(conversation_id)
+            if entry is None:
+                continue
+            offset, length = entry
+            with open(segment, 'rb') as f:
+                f.seek(offset)
+                data = f.read(length)
+            try:
+                return json.loads(gzip.decompress(data))
+            except (OSError, EOFError, zlib.error, json.JSONDecodeError) as e:
+                logger.error(f"Error reading {conversation_id} from {segment}: {e}")
+                return None
+        return None
+        
+    def iter_segment(self, segment):
+        """Stream every record of a segment"""
+        with gzip.open(segment, 'rt', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+                
+    def list_segments(self):
+        """All segments, oldest first"""
+        return sorted(self.archive_dir.glob(f"{SEGMENT_PREFIX}*.jsonl.gz"))
+        
+    def expire(self, now=None):
+        """Delete segments (and their indexes) that ended more than retention_days ago"""
+        if not self.retention_days:
+            return 0
+        cutoff = (now or time.time()) - self.retention_days * 86400
+        expired = 0
+        with self._lock:
+            for segment in self.list_segments():
+                name = segment.name[len(SEGMENT_PREFIX):-len('.jsonl.gz')]
+                try:
+                    start = datetime.strptime(name, SEGMENT_TIME_FORMAT).timestamp()
+                except ValueError:
+                    continue
+                if start + self.segment_seconds > cutoff:
+                    break
+                segment.unlink()
+                index_path = self.index_path(segment)
+                if index_path.exists():
+                    index_path.unlink()
+                expired += 1
+        if expired:
+            logger.info(f"Expired {expired} conversation log segments")
+        return expired
+        
+    def run(self):
+        """Rotate then apply retention (the periodic maintenance job)"""
+        try:
+            self.rotate()
+            self.expire()
+        except Exception as e:
+            logger.error(f"Error in conversation log rotation: {e}")
+            
+    def get_stats(self):
+        """Get segment counts and sizes"""
+        segments = self.list_segments()
+        return {
+            'segments': len(segments),
+            'bytes': sum(segment.stat().st_size for segment in segments),
+            'pending': sum(1 for _ in self.closed_conversations())
+        }
+
+
+def main():
+    """Command line: rotate closed conversations, expire old segments, or read one conversation back"""
+    parser = argparse.ArgumentParser(description="OSCARR conversation log rotation")
+    parser.add_argument('--log-dir', default='logs')
+    parser.add_argument('--archive-dir', default=os.getenv('CONVERSATION_LOG_ARCHIVE_DIR', 'logs/archive'))
+    parser.add_argument('--min-age', type=float, default=300)
+    parser.add_argument('--retention-days', type=float, default=float(os.getenv('CONVERSATION_LOG_RETENTION_DAYS', '90')))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rotate', help="move closed conversations into segments")
+    commands.add_parser('expire', help="delete segments past retention")
+    commands.add_parser('stats', help="show segment counts and sizes")
+    read_parser = commands.add_parser('read', help="print one rotated conversation")
+    read_parser.add_argument('conversation_id')
+    
+    args = parser.parse_args()
+    rotator = LogRotator(args.log_dir, args.archive_dir, retention_days=args.retention_days, min_age=args.min_age)
+    if args.command == 'rotate':
+        print(f"Rotated {rotator.rotate()} conversations")
+    elif args.command == 'expire':
+        print(f"Expired {rotator.expire()} segments")
+    elif args.command == 'stats':
+        print(json.dumps(rotator.get_stats(), indent=2))
+    else:
+        record = rotator.read(args.conversation_id)
+        if record is None:
+            print(f"Conversation {args.conversation_id} not found")
+            return 1
+        print(json.dumps(record['conversation'], indent=2))
+
+
+if __name__ == '__main__':
+    # python -m src.log_rotation rotate
+    raise SystemExit(main())
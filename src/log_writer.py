@@ -0,0 +1,221 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class _Control:
+    def __init__(self, action, path=None):
+        """A flush/close/fsync request processed in order with the writes before it"""
+        self.action = action
+        self.path = path
+        self.error = None
+        self.done = threading.Event()
+
+
+class LogWriter:
+    def __init__(self, max_open_files=64, idle_timeout=60.0, max_queue=10000, batch_size=1000,
+                 flush_interval=0.5, buffer_size=65536, put_timeout=1.0, control_timeout=30.0):
+        """Write many log files from one background thread with a bounded queue and bounded open handles"""
+        self.max_open_files = max_open_files
+        self.idle_timeout = idle_timeout
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.put_timeout = put_timeout
+        self.control_timeout = control_timeout
+        self.writes = 0
+        self.batches = 0
+        self.dropped = 0
+        self.opens = 0
+        
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._files = OrderedDict()  # path -> (file, last_used); least recently used first
+        self._dirty = set()
+        self._thread = threading.Thread(target=self._write_loop, name='log-writer', daemon=True)
+        self._thread.start()
+        
+    def write(self, path, text, block=False):
+        """Queue text to be appended to path; waits up to put_timeout for space, then drops it
+
+        With block=True (journals, which must not lose lines) it waits for space instead, and
+        raises RuntimeError if the writer thread has died and the queue will never drain.
+        """
+        while True:
+            try:
+                self._queue.put((path, text), timeout=self.put_timeout)
+                return
+            except queue.Full:
+                if not block:
+                    self.dropped += 1
+                    logger.error(f"Log writer queue full, dropped a write to {path}")
+                    return
+                if not self._thread.is_alive():
+                    raise RuntimeError(f"Log writer thread is not running, cannot write to {path}")
+                    
+    def _control(self, action, path=None, wait=True, timeout=None):
+        """Queue a control request behind pending writes, optionally waiting (control_timeout by default)
+
+        The returned control has error set when it failed or was not done in time.
+        """
+        timeout = self.control_timeout if timeout is None else timeout
+        control = _Control(action, path)
+        try:
+            self._queue.put(control, timeout=timeout)
+        except queue.Full:
+            control.error = 'queue full'
+            logger.error(f"Log writer queue full, could not {action} {path}")
+            return control
+        if wait and not control.done.wait(timeout):
+            control.error = 'timed out'
+            logger.error(f"Log writer did not {action} {path} within {timeout}s")
+        return control
+        
+    def flush(self, path=None, wait=True):
+        """Flush buffered writes to the OS (one file, or all of them)"""
+        return self._control('flush', path, wait)
+        
+    def fsync(self, path, wait=True):
+        """Flush and fsync one file"""
+        return self._control('fsync', path, wait)
+        
+    def close_file(self, path, wait=True):
+        """Write out and close one file, e.g. when its conversation ends"""
+        return self._control('close', path, wait)
+        
+    def _write_loop(self):
+        """Drain the queue in batches, grouping writes per file"""
+        last_flush = time.monotonic()
+        while True:
+            batch = []
+            try:
+                try:
+                    batch.append(self._queue.get(timeout=self.flush_interval))
+                except queue.Empty:
+                    pass
+                while batch and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                        
+                pending = defaultdict(list)
+                for item in batch:
+                    if isinstance(item, _Control):
+                        # Controls apply to everything queued before them
+                        self._write_pending(pending)
+                        pending.clear()
+                        self._apply(item)
+                    else:
+                        pending[item[0]].append(item[1])
+                self._write_pending(pending)
+                if batch:
+                    self.batches += 1
+                    
+                now = time.monotonic()
+                if now - last_flush >= self.flush_interval:
+                    self._flush_dirty()
+                    self._close_idle(now)
+                    last_flush = now
+            except Exception as e:
+                # Keep the thread alive, and never leave a caller waiting on a control from this batch
+                logger.error(f"Error in log writer loop: {e}")
+                for item in batch:
+                    if isinstance(item, _Control) and not item.done.is_set():
+                        item.error = str(e)
+                        item.done.set()
+                        
+    def _write_pending(self, pending):
+        """Append each file's texts in one write"""
+        for path, texts in pending.items():
+            try:
+                self._open(path).write(''.join(texts))
+                self._dirty.add(path)
+                self.writes += len(texts)
+            except Exception as e:
+                logger.error(f"Error writing log file {path}: {e}")
+                
+    def _apply(self, control):
+        """Run a flush, fsync or close request"""
+        try:
+            if control.action == 'flush':
+                if control.path is None:
+                    self._flush_dirty()
+                elif control.path in self._files:
+                    self._files[control.path][0].flush()
+            elif control.action == 'fsync':
+                f = self._open(control.path)
+                f.flush()
+                os.fsync(f.fileno())
+            elif control.action == 'close':
+                self._close(control.path)
+        except Exception as e:
+            control.error = str(e)
+            logger.error(f"Error applying {control.action} to {control.path}: {e}")
+        finally:
+            control.done.set()
+            
+    def _open(self, path):
+        """Get an open handle for path, closing the least recently used one beyond max_open_files"""
+        entry = self._files.get(path)
+        if entry is None:
+            while len(self._files) >= self.max_open_files:
+                self._close(next(iter(self._files)))
+            f = open(path, 'a', encoding='utf-8', buffering=self.buffer_size)
+            self.opens += 1
+        else:
+            f = entry[0]
+        self._files[path] = (f, time.monotonic())
+        self._files.move_to_end(path)
+        return f
+        
+    def _close(self, path):
+        """Close one handle if it is open"""
+        entry = self._files.pop(path, None)
+        self._dirty.discard(path)
+        if entry:
+            entry[0].close()
+            
+    def _flush_dirty(self):
+        """Push buffered data of every file written since the last flush to the OS"""
+        for path in list(self._dirty):
+            if path in self._files:
+                self._files[path][0].flush()
+        self._dirty.clear()
+        
+    def _close_idle(self, now):
+        """Close handles that have not been written for idle_timeout seconds"""
+        for path, (_, last_used) in list(self._files.items()):
+            if now - last_used < self.idle_timeout:
+                break
+            self._close(path)
+            
+    def get_stats(self):
+        """Get writer counters"""
+        return {
+            'queued': self._queue.qsize(),
+            'open_files': len(self._files),
+            'writes': self.writes,
+            'batches': self.batches,
+            'opens': self.opens,
+            'dropped': self.dropped
+        }
+
+
+_shared_writer = None
+_shared_lock = threading.Lock()
+
+
+def get_log_writer():
+    """The process-wide writer shared by every conversation"""
+    global _shared_writer
+    with _shared_lock:
+        if _shared_writer is None:
+            _shared_writer = LogWriter()
+        return _shared_writer
@@ -1,13 +1,24 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
+import threading
+import time
+from datetime import datetime
 from apscheduler.schedulers.background import BackgroundScheduler
 import logging
-from datetime import datetime
 import os
-import requests
 from config.config import *
 from src.wallet_monitor import WalletMonitor
 from src.investment_analyzer import InvestmentAnalyzer
 from src.voice_interaction import VoiceInteraction
+from src.job_queue import JobQueue, JobWorkerPool
+from src.call_session_store import CallSessionStore
+from src.call_dispatcher import CallDispatcher
+from src.user_scheduler import UserScheduler
+from src.wallet_change_tracker import WalletChangeTracker
+from src.leader_election import LeaderLease
+from src.conversation_archive import ConversationArchive
+from src.log_rotation import LogRotator
+from src.metrics import registry, track
+from src.tracing import configure as configure_tracing, current_trace_id, tracer, valid_trace_id
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -20,123 +31,410 @@ scheduler = BackgroundScheduler()
 wallet_monitor = WalletMonitor()
 investment_analyzer = InvestmentAnalyzer()
 voice_interaction = VoiceInteraction()
+job_queue = JobQueue(
+    JOB_QUEUE_DB_PATH,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    retry_backoff=JOB_RETRY_BACKOFF
+)
+call_sessions = CallSessionStore(CALL_SESSION_DB_PATH, ttl=CALL_SESSION_TTL)
+configure_tracing(TRACE_EXPORT_PATH, TRACE_SAMPLE_RATE)
+call_dispatcher = CallDispatcher(
+    BLAND_AI_API_KEY,
+    base_url=BLAND_AI_BASE_URL,
+    rate_per_second=BLAND_AI_RATE_LIMIT,
+    burst=BLAND_AI_BURST,
+    timeout=BLAND_AI_TIMEOUT,
+    max_retries=BLAND_AI_MAX_RETRIES,
+    rate_limit_db_path=BLAND_AI_RATE_LIMIT_DB_PATH
+)
+log_rotator = LogRotator(
+    'logs',
+    CONVERSATION_LOG_ARCHIVE_DIR,
+    segment_seconds=CONVERSATION_LOG_SEGMENT_SECONDS,
+    retention_days=CONVERSATION_LOG_RETENTION_DAYS,
+    archive=ConversationArchive(CONVERSATION_ARCHIVE_DB_PATH)
+)
 
-def make_bland_ai_call(script):
+http_request_seconds = registry.histogram(
+    'oscarr_http_request_seconds',
+    'Time to handle HTTP requests',
+    ['route', 'status']
+)
+job_queue_jobs = registry.gauge('oscarr_job_queue_jobs', 'Jobs in the queue by status', ['status'])
+for _status in ('pending', 'running', 'done', 'dead'):
+    job_queue_jobs.labels(_status).set_function(lambda status=_status: job_queue.get_stats().get(status, 0))
+
+def make_bland_ai_call(script, phone_number=USER_PHONE_NUMBER):
     """Make a call using Bland AI"""
+    # Bland AI echoes metadata back in the webhook, which links it to this trace
+    trace_id = current_trace_id()
+    options = {'metadata': {'trace_id': trace_id}} if trace_id else {}
+    with track('bland_ai', 'place_call') as outcome:
+        result = call_dispatcher.place_call(phone_number, script, webhook_url=CALLBACK_URL, **options)
+        if not result:
+            outcome.error()
+    return result.get('call_id') if result else None
+
+user_wallets = {}  # phone number -> WalletMonitor
+user_wallets_lock = threading.Lock()
+
+def get_user_wallet(phone_number):
+    """Wallet monitor of the user behind a phone number"""
+    wallet_id = USER_WALLETS.get(phone_number)
+    if wallet_id is None:
+        # Only a single-user deployment may fall back to the default wallet
+        if len(USER_PHONE_NUMBERS) > 1 or phone_number not in (USER_PHONE_NUMBER, *USER_PHONE_NUMBERS):
+            raise KeyError(f"No wallet configured for {phone_number}; add it to USER_WALLETS")
+        return investment_analyzer.wallet_monitor
+    with user_wallets_lock:
+        if phone_number not in user_wallets:
+            user_wallets[phone_number] = WalletMonitor(wallet_id)
+        return user_wallets[phone_number]
+
+def check_user_wallets():
+    """Refuse to run more than one user unless every one of them has their own wallet"""
+    if len(USER_PHONE_NUMBERS) > 1:
+        missing = [phone_number for phone_number in USER_PHONE_NUMBERS if phone_number not in USER_WALLETS]
+        if missing:
+            raise ValueError(f"USER_WALLETS has no wallet for {', '.join(missing)}")
+
+# phone_number -> safety net from the last nightly scan; a user without one is estimated alone
+safety_nets = {}
+
+def estimate_safety_nets():
+    """Nightly scan: estimate every user's safety net in one batched simulation for the day's checks"""
+    estimator = investment_analyzer.safety_net_estimator
+    if estimator is None:
+        return
     try:
-        url = "https://api.bland.ai/v1/calls"
-        
-        headers = {
-            "Authorization": f"Bearer {BLAND_AI_API_KEY}",
-            "Content-Type": "application/json"
-        }
-        
-        data = {
-            "phone_number": USER_PHONE_NUMBER,
-            "task": script,
-            "webhook_url": CALLBACK_URL,
-            "model": "enhanced"  # Use enhanced model for better voice quality
-        }
-        
-        response = requests.post(url, headers=headers, json=data)
-        response.raise_for_status()
-        
-        call_id = response.json().get('call_id')
-        logger.info(f"Call initiated successfully. Call ID: {call_id}")
-        return call_id
-        
+        phone_numbers = list(USER_PHONE_NUMBERS)
+        estimates = estimator.estimate_many([get_user_wallet(phone_number) for phone_number in phone_numbers])
+        safety_nets.update(zip(phone_numbers, estimates))
     except Exception as e:
-        logger.error(f"Error making Bland AI call: {e}")
-        return None
+        logger.error(f"Error estimating safety nets: {e}")
+
+def on_wallet_change(phone_number):
+    """A changed wallet outdates its nightly estimate, so drop it and check the user now"""
+    safety_nets.pop(phone_number, None)
+    user_scheduler.prioritize(phone_number)
+
+def check_unused_funds(phone_number=USER_PHONE_NUMBER):
+    """Check a user for unused funds and initiate a call if needed; returns the call id, or None when no call was placed"""
+    return check_unused_funds_batch([phone_number]).get(phone_number)
 
-def check_unused_funds():
-    """Periodically check for unused funds and initiate calls if needed"""
+def check_unused_funds_batch(phone_numbers):
+    """Check a batch of users against one suggestions snapshot; returns phone_number -> call id for the calls placed"""
+    call_ids = {}
     try:
-        # Identify unused funds
-        unused_funds_data = investment_analyzer.identify_unused_funds()
-        if not unused_funds_data:
-            return
+        # Identify unused funds in each user's own wallet, one trace per user
+        found = {}
+        for phone_number in phone_numbers:
+            with tracer.start_trace('check_unused_funds', phone_number=phone_number) as trace:
+                with tracer.span('identify_unused_funds'):
+                    unused_funds_data = investment_analyzer.identify_unused_funds(
+                        safety_net=safety_nets.get(phone_number),
+                        wallet_monitor=get_user_wallet(phone_number)
+                    )
+            if unused_funds_data:
+                logger.info(f"Found unused funds: ${unused_funds_data['unused_funds']:.2f}")
+                found[phone_number] = (unused_funds_data, trace.trace_id)
+        if not found:
+            return call_ids
             
-        unused_funds = unused_funds_data['unused_funds']
-        logger.info(f"Found unused funds: ${unused_funds:.2f}")
-        
-        # Get investment suggestions
-        suggestions = investment_analyzer.get_investment_suggestions(unused_funds)
+        # Get investment suggestions once for the whole batch
+        with tracer.start_trace('get_investment_suggestions', users=len(found)):
+            suggestions = investment_analyzer.get_investment_suggestions(
+                max(data['unused_funds'] for data, _ in found.values())
+            )
         if not suggestions:
             logger.warning("No investment suggestions available")
-            return
+            return call_ids
             
-        # Generate call script
-        script = voice_interaction.generate_call_script(unused_funds, suggestions)
-        if not script:
-            logger.error("Failed to generate call script")
-            return
+        # Generate every call script from one compiled template
+        with tracer.start_trace('generate_call_scripts', users=len(found)):
+            scripts = voice_interaction.generate_call_scripts(
+                [{'unused_funds': data['unused_funds']} for data, _ in found.values()],
+                suggestions
+            )
+        if not scripts:
+            logger.error("Failed to generate call scripts")
+            return call_ids
             
-        # Make the actual call using Bland AI
-        call_id = make_bland_ai_call(script)
-        if call_id:
-            logger.info(f"Call initiated successfully. Call ID: {call_id}")
-        else:
-            logger.error("Failed to initiate call")
-        
+        for (phone_number, (unused_funds_data, trace_id)), script in zip(found.items(), scripts):
+            call_id = place_call(phone_number, unused_funds_data, suggestions, script, trace_id)
+            if call_id:
+                call_ids[phone_number] = call_id
+                
     except Exception as e:
         logger.error(f"Error in check_unused_funds: {e}")
+    return call_ids
 
-@app.route('/webhook/bland-ai', methods=['POST'])
-def handle_bland_ai_webhook():
-    """Handle webhooks from Bland AI"""
+def place_call(phone_number, unused_funds_data, suggestions, script, trace_id):
+    """Call one user about their unused funds and store the call session; returns the call id"""
+    try:
+        with tracer.start_trace('place_call', trace_id=trace_id, phone_number=phone_number) as trace:
+            unused_funds = unused_funds_data['unused_funds']
+            # The batch shares market data, but each user's allocation is of their own funds
+            suggestions = [dict(s, allocation_pol=s.get('allocation', 0.0) * unused_funds) for s in suggestions]
+            
+            # Analyze the recommended option now so the webhook doesn't have to refetch market data
+            recommended = next((s['symbol'] for s in suggestions if not s.get('is_memecoin')), None)
+            analysis = {}
+            if recommended:
+                with tracer.span('analyze_investment_opportunity', symbol=recommended):
+                    analysis[recommended] = investment_analyzer.analyze_investment_opportunity(
+                        recommended, min(unused_funds, MAX_INVESTMENT_AMOUNT)
+                    )
+                    
+            # Make the actual call using Bland AI
+            with tracer.span('make_bland_ai_call'):
+                call_id = make_bland_ai_call(script, phone_number)
+            if call_id:
+                logger.info(f"Call initiated successfully. Call ID: {call_id}")
+                trace.set_attribute('call_id', call_id)
+                call_sessions.put(call_id, {
+                    'phone_number': phone_number,
+                    'unused_funds': unused_funds_data,
+                    'suggestions': suggestions,
+                    'recommended_symbol': recommended,
+                    'script': script,
+                    'analysis': analysis,
+                    'analyzed_at': {symbol: time.time() for symbol in analysis},
+                    'trace_id': trace.trace_id
+                })
+            else:
+                logger.error("Failed to initiate call")
+            return call_id
+            
+    except Exception as e:
+        logger.error(f"Error placing call to {phone_number}: {e}")
+        return None
+
+def get_session_analysis(session, symbol, amount):
+    """Get the analysis stored with the call session, analyzing (and storing) on a miss or once it is stale"""
+    analysis = session['analysis'].get(symbol)
+    analyzed_at = session.setdefault('analyzed_at', {}).get(symbol, 0)
+    # Prices move while the user thinks it over; never confirm against an old quote
+    if analysis is None or time.time() - analyzed_at > CALL_SESSION_ANALYSIS_TTL:
+        analysis = investment_analyzer.analyze_investment_opportunity(symbol, amount)
+        session['analysis'][symbol] = analysis
+        session['analyzed_at'][symbol] = time.time()
+    return analysis
+
+def get_requested_amount(user_response, unused_funds):
+    """Amount to invest: what the user asked for, capped by unused funds and the maximum
+    
+    Returns None when the user named an amount that is not a positive number, so they can be asked again.
+    """
+    requested = user_response.get('investment_amount')
+    if requested is None:
+        requested = unused_funds
     try:
-        data = request.json
-        transcript = data.get('transcript', '')
-        call_status = data.get('status', '')
+        requested = float(str(requested).replace(',', ''))
+    except (TypeError, ValueError):
+        return None
+    if not requested > 0:
+        return None
+    return min(requested, unused_funds, MAX_INVESTMENT_AMOUNT)
+
+def make_session_call(session, script):
+    """Place a follow-up call and carry the session over to its call_id"""
+    call_id = make_bland_ai_call(script, session.get('phone_number', USER_PHONE_NUMBER))
+    if call_id:
+        call_sessions.put(call_id, {**session, 'script': script})
+    return call_id
+
+def process_bland_ai_webhook(data, timer):
+    """Process a queued Bland AI webhook (runs on a job worker)"""
+    transcript = data.get('transcript', '')
+    call_status = data.get('status', '')
+    
+    if call_status == 'completed':
+        with timer.stage('session_lookup'):
+            session = call_sessions.get(data.get('call_id'))
+        if not session:
+            logger.warning(f"No session for call {data.get('call_id')}, ignoring webhook")
+            return
+        unused_funds = session['unused_funds']['unused_funds']
         
-        if call_status == 'completed':
-            # Process user's response
+        # Process user's response
+        with timer.stage('transcript_analysis'):
             user_response = voice_interaction.process_user_response(transcript)
-            if not user_response:
-                return jsonify({'status': 'error', 'message': 'Failed to process user response'})
-                
-            # Handle investment confirmation if user expressed interest
-            if user_response['interest'] == 'yes' and user_response['preferred_investment']:
-                symbol = user_response['preferred_investment']
-                amount = min(unused_funds, MAX_INVESTMENT_AMOUNT)
+        if not user_response:
+            # Nothing has been sent yet, so the job is safe to retry
+            raise RuntimeError('Failed to process user response')
+            
+        symbol = user_response.get('preferred_investment') or session['recommended_symbol']
+        amount = get_requested_amount(user_response, unused_funds)
+        if amount is None:
+            # e.g. "half of it": never guess, ask for a number before anything is confirmed
+            logger.info(f"Unclear investment amount {user_response.get('investment_amount')!r}, asking again")
+            amount = min(unused_funds, MAX_INVESTMENT_AMOUNT)
+            user_response = {
+                **user_response,
+                'interest': 'unsure',
+                'amount_confirmed': 'no',
+                'next_step': f"Ask the user how many POL they want to invest, as a number up to {amount:.2f}"
+            }
+        
+        # Handle investment confirmation if user expressed interest
+        if user_response['interest'] == 'yes' and user_response['preferred_investment']:
+            with timer.stage('market_analysis'):
+                analysis = get_session_analysis(session, symbol, amount)
+            with timer.stage('confirmation_generation'):
+                confirmation = voice_interaction.handle_investment_confirmation(symbol, amount, analysis)
+            if confirmation:
+                # Make follow-up call with confirmation
+                with timer.stage('outbound_call'):
+                    make_session_call(session, confirmation)
+                logger.info(f"Investment confirmation call made")
                 
-                confirmation = voice_interaction.handle_investment_confirmation(symbol, amount)
-                if confirmation:
-                    # Make follow-up call with confirmation
-                    make_bland_ai_call(confirmation)
-                    logger.info(f"Investment confirmation call made")
-                    
-            # Generate follow-up if needed
-            elif user_response['questions'] or user_response['next_step'] != 'end':
-                follow_up = voice_interaction.generate_follow_up(
-                    investment_analyzer.analyze_investment_opportunity(symbol, amount),
-                    user_response
-                )
-                if follow_up:
-                    # Make follow-up call
-                    make_bland_ai_call(follow_up)
-                    logger.info(f"Follow-up call made")
-                    
-        return jsonify({'status': 'success'})
+        # Generate follow-up if needed
+        elif user_response['questions'] or user_response['next_step'] != 'end':
+            with timer.stage('market_analysis'):
+                analysis = get_session_analysis(session, symbol, amount)
+            with timer.stage('follow_up_generation'):
+                follow_up = voice_interaction.generate_follow_up(analysis, user_response)
+            if follow_up:
+                # Make follow-up call
+                with timer.stage('outbound_call'):
+                    make_session_call(session, follow_up)
+                logger.info(f"Follow-up call made")
+
+def trace_bland_ai_webhook(data, timer):
+    """Process a webhook job as part of the trace of the call that produced it"""
+    metadata = data.get('metadata')
+    trace_id = valid_trace_id(metadata.get('trace_id')) if isinstance(metadata, dict) else None
+    if trace_id is None:
+        # Bland AI did not echo the metadata back; the session knows which trace placed the call
+        session = call_sessions.get(data.get('call_id')) if data.get('call_id') else None
+        trace_id = valid_trace_id((session or {}).get('trace_id'))
+    with tracer.start_trace('bland_ai_webhook', trace_id=trace_id, call_id=data.get('call_id'), status=data.get('status')):
+        process_bland_ai_webhook(data, timer)
+
+@app.before_request
+def start_request_timer():
+    """Note when the request started for the latency histogram"""
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    """Record request latency by route and status code"""
+    started = g.get('request_started')
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        http_request_seconds.labels(route, response.status_code).observe(time.perf_counter() - started)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Expose metrics in Prometheus text format"""
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/webhook/bland-ai', methods=['POST'])
+def handle_bland_ai_webhook():
+    """Validate a Bland AI webhook and queue it for processing"""
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Expected a JSON object'}), 400
+        if not isinstance(data.get('status', ''), str) or not isinstance(data.get('transcript', ''), str):
+            return jsonify({'status': 'error', 'message': 'Invalid status or transcript'}), 400
+            
+        # Bland AI may redeliver, to any worker; the jobs table's unique dedup_key maps
+        # the same call_id and status to one job
+        dedup_key = f"{data['call_id']}:{data.get('status', '')}" if data.get('call_id') else None
+        job_id, duplicate = job_queue.enqueue_once('bland_ai_webhook', data, dedup_key=dedup_key)
+        return jsonify({'status': 'accepted', 'job_id': job_id, 'duplicate': duplicate}), 202
         
     except Exception as e:
         logger.error(f"Error handling Bland AI webhook: {e}")
-        return jsonify({'status': 'error', 'message': str(e)})
+        return jsonify({'status': 'error', 'message': str(e)}), 500
 
-def start_scheduler():
-    """Start the background scheduler"""
-    scheduler.add_job(
-        check_unused_funds,
-        'interval',
-        hours=24,  # Check daily
-        next_run_time=datetime.now()
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Get the status and per-stage timings of a queued webhook job"""
+    job = job_queue.get_job(job_id)
+    if not job:
+        return jsonify({'status': 'error', 'message': 'Job not found'}), 404
+    return jsonify(job)
+
+def start_job_workers():
+    """Start the worker pool that drains the webhook queue"""
+    workers = JobWorkerPool(
+        job_queue,
+        {'bland_ai_webhook': trace_bland_ai_webhook},
+        num_workers=JOB_WORKERS
     )
+    workers.start()
+    return workers
+
+user_scheduler = UserScheduler(
+    check_unused_funds,
+    interval=USER_CHECK_INTERVAL,
+    jitter=USER_CHECK_JITTER,
+    batch_size=USER_CHECK_BATCH_SIZE,
+    max_workers=USER_CHECK_WORKERS,
+    initial_spread=USER_CHECK_INITIAL_SPREAD,
+    check_many_fn=check_unused_funds_batch
+)
+wallet_change_tracker = WalletChangeTracker(
+    on_wallet_change,
+    balance_threshold=WALLET_BALANCE_CHANGE_THRESHOLD,
+    spending_threshold=WALLET_SPENDING_CHANGE_THRESHOLD,
+    debounce=WALLET_CHANGE_DEBOUNCE,
+    max_delay=WALLET_CHANGE_MAX_DELAY
+)
+
+def start_scheduler():
+    """Start the per-user check scheduler and the background maintenance jobs"""
+    check_user_wallets()
+    for phone_number in USER_PHONE_NUMBERS:
+        user_scheduler.add_user(phone_number)
+        # Significant wallet changes move the user's check forward; the interval is only a safety sweep
+        wallet_change_tracker.watch(phone_number, get_user_wallet(phone_number))
+    user_scheduler.start()
+    # First scan right away, then nightly
+    scheduler.add_job(estimate_safety_nets, 'cron', hour=SAFETY_NET_SCAN_HOUR, next_run_time=datetime.now())
+    scheduler.add_job(call_sessions.purge_expired, 'interval', hours=1)
+    # Finished jobs double as the webhook dedup store, so keep them at least as long as Bland AI may redeliver
+    scheduler.add_job(job_queue.purge, 'interval', hours=1, args=[max(JOB_RETENTION, WEBHOOK_REDELIVERY_WINDOW)])
+    scheduler.add_job(log_rotator.run, 'interval', seconds=CONVERSATION_LOG_SEGMENT_SECONDS)
     scheduler.start()
 
+def start_leader_duties():
+    """Run the schedulers in this process (called when it wins the scheduler lease)"""
+    if scheduler.running:
+        scheduler.resume()
+    else:
+        start_scheduler()
+    # Also undoes the pause from a failed earlier start
+    user_scheduler.resume()
+
+def stop_leader_duties():
+    """Pause the schedulers (called when this process loses the scheduler lease)"""
+    scheduler.pause()
+    user_scheduler.pause()
+
+leader_lease = LeaderLease(
+    LEADER_LEASE_DB_PATH,
+    name='scheduler',
+    ttl=LEADER_LEASE_TTL,
+    renew_interval=LEADER_LEASE_TTL / 3,
+    on_elected=start_leader_duties,
+    on_revoked=stop_leader_duties
+)
+
+def start_services():
+    """Start this process's background services; every worker serves webhooks, only the leader schedules"""
+    if METRICS_MULTIPROC_DIR:
+        registry.enable_multiprocess(METRICS_MULTIPROC_DIR)
+    start_job_workers()
+    leader_lease.start()
+
 if __name__ == '__main__':
-    # Start the scheduler
-    start_scheduler()
+    # Start the webhook job workers and campaign for the scheduler lease
+    start_services()
     
     # Run the Flask app
     app.run(host='0.0.0.0', port=5001) 
\ No newline at end of file
@@ -0,0 +1,383 @@
+import bisect
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from .tracing import tracer
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Seconds; covers fast cache-backed calls up to slow LLM and telephony requests
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value):
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    """Render {name="value",...} from (name, value) pairs (empty string when there are none)"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    """Render a sample value the way Prometheus expects"""
+    if value != value:
+        return 'NaN'
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _render_family(name, kind, documentation, samples):
+    """Render one family's HELP/TYPE header and (suffix, labels, value) samples"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for suffix, labels, value in samples:
+        lines.append(f"{name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+class _Metric:
+    kind = None
+    child_class = None
+    
+    def __init__(self, name, documentation, labelnames=()):
+        """A metric family; children hold the values for each label combination"""
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+            
+    def labels(self, *values, **kwargs):
+        """Get the child for one label combination, creating it on first use"""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+        
+    def _new_child(self):
+        """Create the value holder for one label combination"""
+        return self.child_class()
+        
+    def _child_samples(self, labels, child):
+        """(suffix, labels, value) samples of one child"""
+        return [('', labels, child.value)]
+        
+    def samples(self):
+        """Every (suffix, labels, value) sample of the family"""
+        samples = []
+        for key, child in sorted(self._children.items()):
+            samples.extend(self._child_samples(list(zip(self.labelnames, key)), child))
+        return samples
+        
+    def render(self):
+        """Render the family in Prometheus text format"""
+        return _render_family(self.name, self.kind, self.documentation, self.samples())
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+        
+    def inc(self, amount=1.0):
+        """Increase the counter"""
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    kind = 'counter'
+    child_class = _CounterChild
+    
+    def inc(self, amount=1.0):
+        """Increase an unlabelled counter"""
+        self._children[()].inc(amount)
+
+
+class _GaugeChild:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+        
+    def set(self, value):
+        """Set the gauge"""
+        self.value = value
+        
+    def set_function(self, function):
+        """Read the gauge from function() at scrape time instead of storing a value"""
+        self.function = function
+        
+    def get(self):
+        """Current value (from the callback if one is set)"""
+        if self.function is None:
+            return self.value
+        try:
+            return self.function()
+        except Exception as e:
+            logger.error(f"Error reading gauge: {e}")
+            return float('nan')
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+    child_class = _GaugeChild
+    
+    def set(self, value):
+        """Set an unlabelled gauge"""
+        self._children[()].set(value)
+        
+    def set_function(self, function):
+        """Read an unlabelled gauge from function() at scrape time"""
+        self._children[()].set_function(function)
+        
+    def _child_samples(self, labels, child):
+        return [('', labels, child.get())]
+
+
+class _HistogramChild:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+        
+    def observe(self, value):
+        """Record one measurement"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            
+    @contextmanager
+    def time(self):
+        """Observe how long a block takes"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+    
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """A histogram with fixed upper bounds (buckets are stored per bucket, made cumulative on render)"""
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+        
+    def _new_child(self):
+        """Histogram children need the family's buckets"""
+        return _HistogramChild(self.buckets)
+        
+    def observe(self, value):
+        """Record a measurement on an unlabelled histogram"""
+        self._children[()].observe(value)
+        
+    def time(self):
+        """Time a block on an unlabelled histogram"""
+        return self._children[()].time()
+        
+    def _child_samples(self, labels, child):
+        with child._lock:
+            counts = list(child.counts)
+            total = child.sum
+        samples = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            samples.append(('_bucket', labels + [('le', _format_value(bound))], cumulative))
+        samples.append(('_sum', labels, total))
+        samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Hold every metric family exposed on /metrics"""
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self.multiprocess_dir = None
+        self._stop_event = threading.Event()
+        
+    def _register(self, cls, name, documentation, labelnames, **kwargs):
+        """Get a family by name, creating it on first use"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+            return metric
+            
+    def counter(self, name, documentation, labelnames=()):
+        """Get or create a counter"""
+        return self._register(Counter, name, documentation, labelnames)
+        
+    def gauge(self, name, documentation, labelnames=()):
+        """Get or create a gauge"""
+        return self._register(Gauge, name, documentation, labelnames)
+        
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Get or create a histogram"""
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+        
+    def enable_multiprocess(self, directory, interval=5.0):
+        """Share samples with the other worker processes through snapshot files in directory
+
+        Each process rewrites its own snapshot every interval seconds (and when it serves a
+        scrape), so any worker answering /metrics can render every worker's samples, each
+        labelled with worker="<pid>". Snapshots of processes that have exited are removed.
+        """
+        self.multiprocess_dir = Path(directory)
+        self.multiprocess_dir.mkdir(parents=True, exist_ok=True)
+        self.write_snapshot()
+        thread = threading.Thread(
+            target=self._snapshot_loop, args=(interval,), name='metrics-snapshot', daemon=True
+        )
+        thread.start()
+        
+    def _snapshot_loop(self, interval):
+        """Keep this process's snapshot fresh"""
+        while not self._stop_event.wait(interval):
+            try:
+                self.write_snapshot()
+            except Exception as e:
+                logger.error(f"Error writing metrics snapshot: {e}")
+                
+    def _families(self):
+        """Current families as JSON-ready dicts"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return [
+            {'name': m.name, 'kind': m.kind, 'documentation': m.documentation, 'samples': m.samples()}
+            for m in metrics
+        ]
+        
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file"""
+        path = self.multiprocess_dir / f"metrics-{os.getpid()}.json"
+        tmp_path = path.with_suffix('.tmp')
+        tmp_path.write_text(json.dumps(self._families()))
+        os.replace(tmp_path, path)
+        
+    def _read_snapshots(self):
+        """{pid: families} for every live worker process"""
+        snapshots = {}
+        for path in self.multiprocess_dir.glob('metrics-*.json'):
+            pid = int(path.stem[len('metrics-'):])
+            if pid != os.getpid() and not _process_alive(pid):
+                path.unlink(missing_ok=True)
+                continue
+            try:
+                snapshots[pid] = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading metrics snapshot {path}: {e}")
+        return snapshots
+        
+    def render(self):
+        """Render every metric in Prometheus text exposition format"""
+        if self.multiprocess_dir is None:
+            lines = []
+            for family in self._families():
+                lines.extend(_render_family(**family))
+            return '\n'.join(lines) + '\n'
+            
+        self.write_snapshot()
+        merged = {}
+        for pid, families in sorted(self._read_snapshots().items()):
+            for family in families:
+                entry = merged.setdefault(family['name'], {**family, 'samples': []})
+                entry['samples'].extend(
+                    (suffix, [('worker', pid)] + [tuple(label) for label in labels], value)
+                    for suffix, labels, value in family['samples']
+                )
+        lines = []
+        for family in merged.values():
+            lines.extend(_render_family(**family))
+        return '\n'.join(lines) + '\n'
+
+
+def _process_alive(pid):
+    """Whether a process with this pid still exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+registry = MetricsRegistry()
+
+external_request_seconds = registry.histogram(
+    'oscarr_external_request_seconds',
+    'Latency of requests to external services',
+    ['service', 'operation']
+)
+external_request_errors = registry.counter(
+    'oscarr_external_request_errors_total',
+    'Failed requests to external services',
+    ['service', 'operation']
+)
+
+
+class _Outcome:
+    def __init__(self):
+        self.failed = False
+        
+    def error(self):
+        """Count this request as failed even though no exception was raised"""
+        self.failed = True
+
+
+@contextmanager
+def track(service, operation):
+    """Time a request to an external service and count it as an error if it raises or is marked failed"""
+    outcome = _Outcome()
+    start = time.perf_counter()
+    try:
+        # Also a child span when this runs inside a sampled trace
+        with tracer.span(f"{service}.{operation}"):
+            yield outcome
+    except Exception:
+        outcome.failed = True
+        raise
+    finally:
+        external_request_seconds.labels(service, operation).observe(time.perf_counter() - start)
+        if outcome.failed:
+            external_request_errors.labels(service, operation).inc()
+
+
+def instrument(obj, service, methods):
+    """Replace obj's methods with versions that are timed under the given service"""
+    for name in methods:
+        method = getattr(obj, name)
+        
+        @functools.wraps(method)
+        def timed(*args, _method=method, _name=name, **kwargs):
+            with track(service, _name):
+                return _method(*args, **kwargs)
+                
+        setattr(obj, name, timed)
+    return obj
@@ -0,0 +1,62 @@
+"""
+Nonce Manager for OSCARR
+Hands out transaction nonces per sender, so concurrent batches signed for the
+same account never reuse a nonce
+"""
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class NonceManager:
+    """Per-sender nonce allocator backed by the chain's transaction count"""
+    
+    def __init__(self, fetch_count: Callable[[str], int]):
+        """fetch_count(sender) returns the sender's transaction count on the chain"""
+        self.fetch_count = fetch_count
+        self._next: Dict[str, int] = {}
+        self._locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._guard = threading.Lock()
+        
+    def _lock(self, sender: str) -> threading.Lock:
+        """The lock serializing one sender's allocations"""
+        with self._guard:
+            return self._locks[sender.lower()]
+            
+    @contextmanager
+    def allocate(self, sender: str, count: int = 1) -> Iterator[int]:
+        """Reserve count consecutive nonces for sender and yield the first
+        
+        The sender's lock is held until the block exits, so sign and broadcast inside it. If the
+        block raises, the local reservation is dropped and the next allocation trusts the chain
+        again, so a failed broadcast does not leave a gap that stalls every later transaction.
+        """
+        key = sender.lower()
+        with self._lock(sender):
+            # The chain may be ahead (transactions sent elsewhere) or behind (ours still pending)
+            first = max(self.fetch_count(sender), self._next.get(key, 0))
+            try:
+                yield first
+            except BaseException:
+                self._next.pop(key, None)
+                raise
+            self._next[key] = first + count
+
+
+_managers: Dict[int, NonceManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(chain_id: int, fetch_count: Callable[[str], int]) -> NonceManager:
+    """The process-wide nonce manager for a chain, shared by every wallet on it"""
+    with _managers_lock:
+        manager = _managers.get(chain_id)
+        if manager is None:
+            manager = _managers[chain_id] = NonceManager(fetch_count)
+        return manager
@@ -0,0 +1,149 @@
+import numpy as np
+import logging
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ALLOCATION_METHODS = ('risk_parity', 'mean_variance')
+
+
+def log_returns(closes_by_symbol, lookback=None):
+    """Daily log returns as a (days, assets) matrix over the trailing window every symbol has"""
+    symbols = [symbol for symbol, closes in closes_by_symbol.items() if len(closes) > 1]
+    if not symbols:
+        return [], np.empty((0, 0))
+    length = min(len(closes_by_symbol[symbol]) for symbol in symbols)
+    if lookback:
+        length = min(length, lookback + 1)
+    prices = np.array([closes_by_symbol[symbol][-length:] for symbol in symbols], dtype=np.float64).T
+    return symbols, np.diff(np.log(prices), axis=0)
+
+
+def project_capped_simplex(v, upper, total):
+    """Euclidean projection of v onto {0 <= w <= upper, sum(w) = total}
+
+    The answer is clip(v - shift, 0, upper) for the shift where the clipped sum equals total.
+    That sum is piecewise linear in the shift, so it is evaluated at every breakpoint at
+    once and interpolated in the segment that brackets total.
+    """
+    if total <= 0:
+        return np.zeros_like(v)
+    tops = np.sort(v)  # w_i stops growing (hits upper) below shift = v_i - upper, is 0 above v_i
+    breakpoints = np.unique(np.concatenate([tops, tops - upper]))
+    top_sums = np.concatenate([[0.0], np.cumsum(tops[::-1])])
+    # Just right of each breakpoint: assets still above zero (v_i > b) and assets at the cap (v_i - upper > b)
+    above = len(v) - np.searchsorted(tops, breakpoints, side='right')
+    capped = len(v) - np.searchsorted(tops - upper, breakpoints, side='right')
+    partial = above - capped
+    partial_sum = top_sums[above] - top_sums[capped]
+    sums = capped * upper + partial_sum - partial * breakpoints
+    # sums decreases as the shift grows; find the last breakpoint still at or above total
+    i = max(np.searchsorted(-sums, -total, side='right') - 1, 0)
+    if partial[i] == 0:
+        shift = breakpoints[i]
+    else:
+        shift = (capped[i] * upper + partial_sum[i] - total) / partial[i]
+    return np.clip(v - shift, 0, upper)
+
+
+def project_feasible(v, upper, memecoin_mask, memecoin_cap):
+    """Projection onto fully invested, per-asset capped weights with memecoins capped in total (no minimum)"""
+    w = project_capped_simplex(v, upper, 1.0)
+    if not memecoin_mask.any() or w[memecoin_mask].sum() <= memecoin_cap:
+        return w
+    # The group cap binds, so the projection splits into one capped simplex per group
+    w = np.empty_like(v)
+    w[memecoin_mask] = project_capped_simplex(v[memecoin_mask], upper, memecoin_cap)
+    w[~memecoin_mask] = project_capped_simplex(v[~memecoin_mask], upper, 1.0 - memecoin_cap)
+    return w
+
+
+class PortfolioAllocator:
+    def __init__(self, method='risk_parity', memecoin_cap=0.1, max_weight=0.5, risk_aversion=5.0,
+                 shrinkage=0.2, lookback=90, max_iterations=2000, tolerance=1e-8):
+        """Split funds across candidate assets by constrained risk parity or mean-variance
+
+        Only upper caps are enforced: max_weight per asset and memecoin_cap for memecoins in total.
+        The script's 5-10% memecoin guideline has no lower bound here, so memecoins may get nothing.
+
+        Covariances are shrunk towards their diagonal, since a few weeks of candles give a
+        singular sample covariance once there are more assets than days.
+        """
+        if method not in ALLOCATION_METHODS:
+            raise ValueError(f"method must be one of {ALLOCATION_METHODS}")
+        self.method = method
+        self.memecoin_cap = memecoin_cap
+        self.max_weight = max_weight
+        self.risk_aversion = risk_aversion
+        self.shrinkage = shrinkage
+        self.lookback = lookback
+        self.max_iterations = max_iterations
+        self.tolerance = tolerance
+        
+    def covariance(self, returns):
+        """Sample covariance shrunk towards its diagonal"""
+        cov = np.atleast_2d(np.cov(returns, rowvar=False))
+        return (1 - self.shrinkage) * cov + self.shrinkage * np.diag(np.diag(cov))
+        
+    def mean_variance(self, mu, cov, upper, memecoin_mask):
+        """Maximize mu.w - risk_aversion/2 * w.cov.w under the constraints (accelerated projected gradient)"""
+        # Largest absolute row sum bounds the largest eigenvalue, which sets a safe step size
+        step = 1.0 / (self.risk_aversion * np.abs(cov).sum(axis=1).max() + 1e-12)
+        w = project_feasible(np.full(len(mu), 1.0 / len(mu)), upper, memecoin_mask, self.memecoin_cap)
+        y, t = w, 1.0
+        for _ in range(self.max_iterations):
+            gradient = mu - self.risk_aversion * (cov @ y)
+            w_next = project_feasible(y + step * gradient, upper, memecoin_mask, self.memecoin_cap)
+            if np.abs(w_next - w).max() < self.tolerance:
+                return w_next
+            if (y - w_next) @ (w_next - w) > 0:
+                # Momentum is pushing uphill on the objective: restart it
+                t = 1.0
+            t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+            y = w_next + ((t - 1) / t_next) * (w_next - w)
+            w, t = w_next, t_next
+        return w
+        
+    def risk_parity(self, cov, upper, memecoin_mask):
+        """Equal risk contributions, then the nearest weights satisfying the caps"""
+        w = 1.0 / np.sqrt(np.maximum(np.diag(cov), 1e-12))
+        w /= w.sum()
+        target = 1.0 / len(w)
+        for _ in range(self.max_iterations):
+            marginal = cov @ w
+            contributions = w * marginal / (w @ marginal)
+            if np.abs(contributions - target).max() < self.tolerance:
+                break
+            w *= np.sqrt(target / np.maximum(contributions, 1e-12))
+            w /= w.sum()
+        return project_feasible(w, upper, memecoin_mask, self.memecoin_cap)
+        
+    def allocate(self, closes_by_symbol, memecoins=()):
+        """Weights per symbol (summing to 1) from daily closes; empty when there is nothing to allocate"""
+        try:
+            start = time.perf_counter()
+            symbols, returns = log_returns(closes_by_symbol, self.lookback)
+            if not symbols:
+                return {}
+            memecoin_mask = np.array([symbol in memecoins for symbol in symbols])
+            standard_count = int((~memecoin_mask).sum())
+            if standard_count == 0:
+                logger.warning("No standard assets to allocate to; memecoins alone would break the cap")
+                return {}
+            # Never cap single assets so tightly that the standard ones cannot absorb the funds
+            upper = max(self.max_weight, 1.0 / standard_count)
+            
+            cov = self.covariance(returns)
+            if self.method == 'mean_variance':
+                weights = self.mean_variance(returns.mean(axis=0), cov, upper, memecoin_mask)
+            else:
+                weights = self.risk_parity(cov, upper, memecoin_mask)
+                
+            logger.info(f"Allocated across {len(symbols)} assets ({self.method}) in "
+                        f"{(time.perf_counter() - start) * 1000:.1f}ms")
+            return {symbol: float(weight) for symbol, weight in zip(symbols, weights)}
+        except Exception as e:
+            logger.error(f"Error allocating portfolio: {e}")
+            return {}
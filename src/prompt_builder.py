@@ -0,0 +1,190 @@
+import json
+import logging
+import math
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Rough Gemini tokenization ratio for English text and JSON
+CHARS_PER_TOKEN = 4
+
+# Fields each prompt actually uses; everything else in the source dicts is dropped
+FOLLOW_UP_ANALYSIS_FIELDS = ['current_price', 'trend', 'rsi', 'risk_level', 'volume_trend']
+FOLLOW_UP_RESPONSE_FIELDS = [
+    'interest', 'preferred_investment', 'investment_amount', 'questions', 'sentiment', 'next_step'
+]
+CONFIRMATION_ANALYSIS_FIELDS = ['current_price', 'trend', 'rsi', 'volatility', 'risk_level']
+
+TRANSCRIPT_ANALYSIS_TEMPLATE = """Analyze this user response from a phone call about investment opportunities:
+
+{transcript}
+
+Determine whether the user: expressed interest in a specific investment; specified an amount in POL; confirmed their choice; said the confirmation word "rates" exactly; asked questions that need answers. Also give their sentiment and the next step.
+
+Respond with JSON only:
+{{"interest": "yes/no/unsure", "preferred_investment": "symbol or null", "investment_amount": "number in POL or null", "amount_confirmed": "yes/no", "confirmation_word_correct": "yes/no", "questions": ["..."], "sentiment": "positive/negative/neutral", "next_step": "...", "investment_completed": "yes/no"}}
+
+Set investment_completed to "yes" only if amount_confirmed and confirmation_word_correct are both "yes"."""
+
+BATCH_TRANSCRIPT_ANALYSIS_TEMPLATE = """Analyze each of these user responses from phone calls about investment opportunities. Each one is a separate call.
+
+{transcripts}
+
+For each call, determine whether the user: expressed interest in a specific investment; specified an amount in POL; confirmed their choice; said the confirmation word "rates" exactly; asked questions that need answers. Also give their sentiment and the next step.
+
+Respond with a JSON array only, one object per call, in any order:
+[{{"id": <call id>, "interest": "yes/no/unsure", "preferred_investment": "symbol or null", "investment_amount": "number in POL or null", "amount_confirmed": "yes/no", "confirmation_word_correct": "yes/no", "questions": ["..."], "sentiment": "positive/negative/neutral", "next_step": "...", "investment_completed": "yes/no"}}]
+
+Set investment_completed to "yes" only if amount_confirmed and confirmation_word_correct are both "yes"."""
+
+FOLLOW_UP_TEMPLATE = """Generate a natural, concise phone response from this context.
+
+Analysis: {analysis}
+User: {user_response}
+
+Address the user's questions, add information they asked for, confirm or adjust the investment plan, and keep a professional, helpful tone."""
+
+CONFIRMATION_TEMPLATE = """Generate a confirmation message for this investment:
+
+Symbol: {symbol}
+Amount: {amount:.2f} POL
+Analysis: {analysis}
+
+The message should confirm the details in POL, highlight key points from the analysis, and ask the user to say the exact word "rates" to finalize, stating that the transaction only proceeds if they do. Explain what happens after confirmation, then thank them and end the call politely."""
+
+
+class PromptBudgetExceeded(ValueError):
+    """Raised when a prompt cannot be trimmed to fit its token budget"""
+
+
+def estimate_tokens(text):
+    """Estimate the token count of a prompt"""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _compact_value(value):
+    """Round floats so prices and indicators don't spend tokens on noise digits"""
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return None
+        return float(f"{value:.6g}")
+    return value
+
+
+def compact_json(data, fields):
+    """Serialize only the given fields, without whitespace or empty values"""
+    if not data:
+        return '{}'
+    trimmed = {}
+    for field in fields:
+        value = _compact_value(data.get(field))
+        if value not in (None, '', [], {}):
+            trimmed[field] = value
+    return json.dumps(trimmed, separators=(',', ':'), default=str)
+
+
+def price_bucket(price, digits=3):
+    """Round a price to a few significant digits, so keys only change when the quoted price would"""
+    try:
+        price = float(price)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(price) or math.isinf(price):
+        return None
+    return float(f"{price:.{digits}g}")
+
+
+def confirmation_cache_key(symbol, amount_pol, analysis):
+    """Cache key for a confirmation message: exactly what its prompt sends, with numbers bucketed"""
+    if not analysis:
+        return None
+    values = [
+        price_bucket(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else value
+        for value in (analysis.get(field) for field in CONFIRMATION_ANALYSIS_FIELDS)
+    ]
+    return f"confirmation:{symbol}:{amount_pol:.2f}:" + ':'.join(str(value) for value in values)
+
+
+class PromptBuilder:
+    def __init__(self, max_tokens=2000):
+        """Initialize the builder with a per-prompt token budget"""
+        self.max_tokens = max_tokens
+        self._stats = {}
+        self._lock = threading.Lock()
+        
+    def _finalize(self, name, prompt, max_tokens=None):
+        """Enforce the budget, then record and log the prompt size"""
+        max_tokens = max_tokens or self.max_tokens
+        tokens = estimate_tokens(prompt)
+        if tokens > max_tokens:
+            raise PromptBudgetExceeded(
+                f"{name} prompt is ~{tokens} tokens, over the {max_tokens} token budget"
+            )
+            
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'total_tokens': 0, 'max_tokens': 0})
+            stats['count'] += 1
+            stats['total_tokens'] += tokens
+            stats['max_tokens'] = max(stats['max_tokens'], tokens)
+        logger.info(f"LLM prompt {name}: ~{tokens} tokens ({len(prompt)} chars)")
+        return prompt
+        
+    def _trim_transcript(self, transcript, overhead):
+        """Keep the most recent speech so the transcript fits the budget alongside the overhead"""
+        max_chars = max(0, (self.max_tokens - overhead) * CHARS_PER_TOKEN)
+        if len(transcript) > max_chars:
+            logger.warning(f"Transcript trimmed from {len(transcript)} to its last {max_chars} chars")
+            transcript = transcript[-max_chars:]
+        return transcript
+        
+    def build_transcript_analysis(self, transcript):
+        """Build the transcript analysis prompt, keeping the most recent speech if over budget"""
+        overhead = estimate_tokens(TRANSCRIPT_ANALYSIS_TEMPLATE.format(transcript=''))
+        transcript = self._trim_transcript(transcript, overhead)
+        return self._finalize('transcript_analysis', TRANSCRIPT_ANALYSIS_TEMPLATE.format(transcript=transcript))
+        
+    def build_batch_transcript_analysis(self, transcripts):
+        """Build one prompt analyzing several transcripts, identified by their list index"""
+        overhead = estimate_tokens(BATCH_TRANSCRIPT_ANALYSIS_TEMPLATE.format(transcripts=''))
+        sections = [
+            f"[Call {i}]\n{self._trim_transcript(transcript, overhead)}"
+            for i, transcript in enumerate(transcripts)
+        ]
+        prompt = BATCH_TRANSCRIPT_ANALYSIS_TEMPLATE.format(transcripts='\n\n'.join(sections))
+        # Each transcript keeps its own single-prompt budget
+        return self._finalize('batch_transcript_analysis', prompt, self.max_tokens * len(transcripts))
+        
+    def build_follow_up(self, analysis, user_response):
+        """Build the follow-up prompt from the trimmed analysis and user response"""
+        user_response = dict(user_response or {})
+        prompt = FOLLOW_UP_TEMPLATE.format(
+            analysis=compact_json(analysis, FOLLOW_UP_ANALYSIS_FIELDS),
+            user_response=compact_json(user_response, FOLLOW_UP_RESPONSE_FIELDS)
+        )
+        # Questions are the only unbounded field; drop the oldest until the prompt fits
+        while estimate_tokens(prompt) > self.max_tokens and user_response.get('questions'):
+            user_response['questions'] = user_response['questions'][1:]
+            prompt = FOLLOW_UP_TEMPLATE.format(
+                analysis=compact_json(analysis, FOLLOW_UP_ANALYSIS_FIELDS),
+                user_response=compact_json(user_response, FOLLOW_UP_RESPONSE_FIELDS)
+            )
+        return self._finalize('follow_up', prompt)
+        
+    def build_confirmation(self, symbol, amount_pol, analysis):
+        """Build the investment confirmation prompt"""
+        prompt = CONFIRMATION_TEMPLATE.format(
+            symbol=symbol,
+            amount=amount_pol,
+            analysis=compact_json(analysis, CONFIRMATION_ANALYSIS_FIELDS)
+        )
+        return self._finalize('confirmation', prompt)
+        
+    def get_stats(self):
+        """Get per-prompt token statistics"""
+        with self._lock:
+            return {
+                name: {**stats, 'avg_tokens': stats['total_tokens'] / stats['count']}
+                for name, stats in self._stats.items()
+            }
@@ -0,0 +1,150 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt):
+    """Collapse whitespace so prompts that differ only in indentation share a key"""
+    return re.sub(r'\s+', ' ', prompt).strip()
+
+
+def prompt_key(prompt):
+    """Build a cache key from a prompt"""
+    return hashlib.sha256(normalize_prompt(prompt).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=3600, db_path=None):
+        """Initialize an in-memory LRU/TTL cache with optional SQLite backing"""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (text, created_at)
+        self._lock = threading.Lock()
+        self._db = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, text TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl,))
+            self._db.commit()
+            
+    def get(self, key):
+        """Get a cached response, or None if missing or expired"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT text, created_at FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    entry = row
+                    self._store(key, entry)
+                    
+            if entry is None or now - entry[1] > self.ttl:
+                if entry is not None:
+                    self._evict(key)
+                self.misses += 1
+                return None
+                
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+            
+    def set(self, key, text):
+        """Cache a response"""
+        entry = (text, time.time())
+        with self._lock:
+            self._store(key, entry)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, text, created_at) VALUES (?, ?, ?)",
+                    (key, text, entry[1])
+                )
+                self._db.commit()
+                
+    def _store(self, key, entry):
+        """Insert into the in-memory LRU, evicting the least recently used entry when full"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            
+    def _evict(self, key):
+        """Remove an expired entry from memory and the backing store"""
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+            
+    def get_stats(self):
+        """Get hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+                'entries': len(self._entries)
+            }
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response served from the cache"""
+    def __init__(self, text):
+        self.text = text
+
+
+class CachedModel:
+    def __init__(self, model, cache):
+        """Wrap a Gemini model so generate_content is served from the cache when possible"""
+        self.model = model
+        self.cache = cache
+        
+    def generate_content(self, prompt, cache_key=None, stream=False):
+        """Generate content, keyed by prompt unless an explicit cache key is given"""
+        key = cache_key or prompt_key(prompt)
+        if stream:
+            return self._stream_content(prompt, key)
+            
+        text = self.cache.get(key)
+        if text is not None:
+            return CachedResponse(text)
+            
+        response = self.model.generate_content(prompt)
+        self.cache.set(key, response.text)
+        return response
+        
+    def _stream_content(self, prompt, key):
+        """Stream chunks, serving a hit as one chunk and caching only streams read to the end"""
+        text = self.cache.get(key)
+        if text is not None:
+            yield CachedResponse(text)
+            return
+            
+        chunks = self.model.generate_content(prompt, stream=True)
+        parts = []
+        try:
+            for chunk in chunks:
+                parts.append(chunk.text)
+                yield chunk
+        finally:
+            # Closing this generator early (a cancelled stream) closes the upstream one too
+            close = getattr(chunks, 'close', None)
+            if close:
+                close()
+        self.cache.set(key, ''.join(parts))
@@ -0,0 +1,146 @@
+import hashlib
+import json
+import logging
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Per-user fields are marked with this separator in the compiled script and filled in at render time
+FIELD_MARK = '\x00'
+
+# The suggestion fields the compiled script is rendered from; anything else (e.g. allocation_pol) may differ per user
+SCRIPT_FIELDS = ('symbol', 'price_in_pol', 'price', 'risk_level', 'daily_return', 'risk_warning', 'is_memecoin')
+
+CALL_SCRIPT_TEMPLATE = """
+Hello! This is Oscar, your weekly AI financial advisor. 
+
+I've noticed you have {unused_funds} POL in unused funds that could be working harder for you. Based on your spending patterns, you're keeping more than necessary in your wallet.{matic_text}
+
+Here are some investment opportunities I've analyzed: 
+(Say the analysed opportunities without waiting for the user to respond)
+
+📈 Standard Investment Options:
+{standard_text}
+
+Would you like to invest some of your unused funds? I can help you choose the best option based on your risk tolerance and investment goals.
+
+[Wait for user response]
+
+If the user asks about alternative or higher risk investments:
+1. Mention that there are also higher-risk options available in the memecoin category
+2. Ask if they would like to hear about these options
+3. If yes, present the following with strong risk warnings:
+
+🎮 High-Risk Alternative Options:
+{memecoin_text}
+
+Additional guidelines for memecoin inquiries:
+1. Emphasize the extreme volatility and high risk
+2. Recommend limiting memecoin investments to a small portion of their portfolio (max 5-10%)
+3. Remind them that these investments can result in significant losses
+4. Suggest considering standard options first
+
+If the user wants to proceed with any investment:
+1. Ask them to specify an amount they would like to invest, reminding them that they have {unused_funds} POL available.
+2. After they choose an amount, repeat their choice back to them for confirmation.
+3. If they confirm the amount, explain that for security, they need to say the word "rates" to finalize the transaction.
+4. Only proceed with the investment if they say the exact word "rates".
+
+Based on historical data analysis, I recommend {recommended_symbol} as the most suitable investment option for your profile.
+
+Please let me know if you'd like to proceed with any of these options or if you have any questions about the available investments.
+"""
+
+
+def format_standard_options(standard_coins):
+    """Format the standard investment suggestions"""
+    return "\n".join([
+        f"{i+1}. {s['symbol']} - Current Price: {s['price_in_pol']:.2f} POL (≈ ${s['price']:.2f}), "
+        f"Risk Level: {s['risk_level']}, 24h Return: {s['daily_return']*100:.2f}%"
+        for i, s in enumerate(standard_coins)
+    ])
+
+
+def format_memecoin_options(memecoins):
+    """Format memecoin suggestions for later use if requested"""
+    return "\n".join([
+        f"• {s['symbol']} - Current Price: {s['price_in_pol']:.8f} POL (≈ ${s['price']:.8f}), "
+        f"Risk Level: {s['risk_level']}, 24h Return: {s['daily_return']*100:.2f}%\n"
+        f"  {s['risk_warning']}"
+        for s in memecoins
+    ])
+
+
+def format_matic_text(unused_funds, matic_equivalent):
+    """Format the optional MATIC reference line"""
+    if not matic_equivalent:
+        return ""
+    return f"\n\nFor reference, your unused funds of ${unused_funds:.2f} is equivalent to approximately {matic_equivalent:.2f} MATIC tokens."
+
+
+def suggestions_fingerprint(suggestions):
+    """Hash of the fields the script is rendered from, so equal snapshots share a template"""
+    content = [[s.get(field) for field in SCRIPT_FIELDS] for s in suggestions]
+    return hashlib.sha256(json.dumps(content, default=str).encode()).hexdigest()
+
+
+class CallScriptTemplate:
+    def __init__(self, suggestions, fingerprint=None):
+        """Pre-render the market portion of the call script once per suggestions snapshot"""
+        self.suggestions = suggestions
+        self.fingerprint = fingerprint or suggestions_fingerprint(suggestions)
+        
+        # Separate standard coins and memecoins
+        standard_coins = [s for s in suggestions if not s.get('is_memecoin', False)]
+        memecoins = [s for s in suggestions if s.get('is_memecoin', False)]
+        
+        compiled = CALL_SCRIPT_TEMPLATE.format(
+            standard_text=format_standard_options(standard_coins),
+            memecoin_text=format_memecoin_options(memecoins),
+            recommended_symbol=standard_coins[0]['symbol'],
+            unused_funds=f"{FIELD_MARK}unused_funds{FIELD_MARK}",
+            matic_text=f"{FIELD_MARK}matic_text{FIELD_MARK}"
+        )
+        # Even indices are literal text, odd indices are per-user field names
+        self._segments = compiled.split(FIELD_MARK)
+        
+    def render(self, unused_funds, matic_equivalent=None):
+        """Fill in the per-user fields"""
+        fields = {
+            'unused_funds': f"{unused_funds:.2f}",
+            'matic_text': format_matic_text(unused_funds, matic_equivalent)
+        }
+        segments = list(self._segments)
+        for i in range(1, len(segments), 2):
+            segments[i] = fields[segments[i]]
+        return ''.join(segments)
+        
+    def render_many(self, users):
+        """Render scripts for a whole campaign; users are dicts with unused_funds and optional matic_equivalent"""
+        return [
+            self.render(user['unused_funds'], user.get('matic_equivalent'))
+            for user in users
+        ]
+
+
+class CallScriptCache:
+    def __init__(self):
+        """Keep the compiled template for the most recent suggestions snapshot"""
+        self._template = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+    def get(self, suggestions):
+        """Get the compiled template, recompiling only when the rendered market data has changed"""
+        # Keyed on content: every fetch returns a new list, even when prices haven't moved
+        fingerprint = suggestions_fingerprint(suggestions)
+        with self._lock:
+            if self._template is not None and self._template.fingerprint == fingerprint:
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._template = CallScriptTemplate(suggestions, fingerprint)
+            return self._template
@@ -0,0 +1,140 @@
+"""
+Transaction Signing Service for OSCARR
+Signs batches of BlockDAG transactions in a process pool so CPU-bound ECDSA
+work runs outside the request thread and private keys stay inside the workers
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from eth_account import Account
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Environment variables each worker loads its signing keys from.
+# Variables ending in _PATH point to a file holding the key.
+KEY_SOURCES = {
+    'blockdag': 'BLOCKDAG_PRIVATE_KEY',
+}
+
+# Keys loaded by the pool initializer; only ever populated inside worker processes
+_worker_keys: Dict[str, str] = {}
+
+
+def _load_key(env_var: str) -> Optional[str]:
+    """Read a private key from an environment variable or the file it points to"""
+    value = os.getenv(env_var)
+    if not value:
+        return None
+    if env_var.endswith('_PATH'):
+        with open(value) as f:
+            return f.read().strip()
+    return value
+
+
+def _init_worker(key_sources: Dict[str, str]):
+    """Pool initializer: load signing keys into this worker process"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    for name, env_var in key_sources.items():
+        key = _load_key(env_var)
+        if key:
+            _worker_keys[name] = key
+
+
+def _worker_key(key_name: str) -> str:
+    """Get a key loaded in this worker"""
+    key = _worker_keys.get(key_name)
+    if not key:
+        raise ValueError(f"No signing key loaded for '{key_name}'")
+    return key
+
+
+def _key_address(key_name: str) -> str:
+    """Address of a worker-held key (the key itself never leaves the worker)"""
+    return Account.from_key(_worker_key(key_name)).address
+
+
+def _raw_transaction(signed_tx) -> bytes:
+    """Signed bytes: eth-account >= 0.13 names them raw_transaction, older versions rawTransaction"""
+    raw = getattr(signed_tx, 'raw_transaction', None)
+    return raw if raw is not None else signed_tx.rawTransaction
+
+
+def _sign_chunk(key_name: str, unsigned_txs: List[Dict]) -> List[Dict]:
+    """Sign a chunk of transactions with a worker-held key"""
+    key = _worker_key(key_name)
+    signed = []
+    for tx in unsigned_txs:
+        signed_tx = Account.sign_transaction(tx, key)
+        signed.append({
+            'raw_transaction': _raw_transaction(signed_tx).hex(),
+            'hash': signed_tx.hash.hex(),
+            'nonce': tx.get('nonce'),
+        })
+    return signed
+
+
+class SigningService:
+    """Process-pool signer for BlockDAG transactions"""
+    
+    def __init__(self, max_workers: int = None, key_sources: Dict[str, str] = None, chunk_size: int = 16):
+        """Start the pool; each worker loads its own copy of the signing keys"""
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            initializer=_init_worker,
+            initargs=(key_sources or KEY_SOURCES,)
+        )
+        self._addresses: Dict[str, str] = {}
+        
+    def get_address(self, key_name: str) -> str:
+        """Address that signs for key_name, i.e. the sender and nonce owner of its transactions"""
+        if key_name not in self._addresses:
+            self._addresses[key_name] = self._executor.submit(_key_address, key_name).result()
+        return self._addresses[key_name]
+        
+    def sign(self, key_name: str, unsigned_tx: Dict) -> Dict:
+        """Sign a single transaction"""
+        return self._executor.submit(_sign_chunk, key_name, [unsigned_tx]).result()[0]
+        
+    def sign_batch(self, key_name: str, unsigned_txs: List[Dict]) -> List[Dict]:
+        """Sign a batch of transactions across the pool, preserving input order"""
+        if not unsigned_txs:
+            return []
+            
+        # Spread the batch over every worker, capping the chunk size so no single worker holds the batch
+        chunk_size = max(1, min(self.chunk_size, -(-len(unsigned_txs) // self.max_workers)))
+        chunks = [
+            unsigned_txs[i:i + chunk_size]
+            for i in range(0, len(unsigned_txs), chunk_size)
+        ]
+        futures = [self._executor.submit(_sign_chunk, key_name, chunk) for chunk in chunks]
+        
+        signed = []
+        for future in futures:
+            signed.extend(future.result())
+        logger.info(f"Signed {len(signed)} {key_name} transactions in {len(chunks)} chunks")
+        return signed
+        
+    def shutdown(self, wait: bool = True):
+        """Stop the worker processes"""
+        self._executor.shutdown(wait=wait)
+
+
+_shared_service: Optional[SigningService] = None
+_shared_lock = threading.Lock()
+
+
+def get_signing_service() -> SigningService:
+    """The process-wide signing pool (its worker processes start on first use)"""
+    global _shared_service
+    with _shared_lock:
+        if _shared_service is None:
+            _shared_service = SigningService()
+        return _shared_service
@@ -0,0 +1,206 @@
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_current_span = ContextVar('current_span', default=None)
+
+TRACE_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+def new_trace_id():
+    """Random 128-bit trace id as hex"""
+    return uuid.uuid4().hex
+
+
+def valid_trace_id(value):
+    """value if it is a well-formed trace id (32 lowercase hex characters), else None"""
+    if isinstance(value, str) and TRACE_ID_PATTERN.match(value):
+        return value
+    return None
+
+
+def is_sampled(trace_id, sample_rate):
+    """Deterministic sampling decision, so every part of a trace agrees (the call and its later webhook)"""
+    if sample_rate >= 1:
+        return True
+    if sample_rate <= 0 or not valid_trace_id(trace_id):
+        return False
+    return int(trace_id[:8], 16) / 0xFFFFFFFF < sample_rate
+
+
+class Span:
+    def __init__(self, name, trace_id, parent_id, sampled, attributes):
+        """One timed stage within a trace"""
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = None
+        self.error = None
+        self._start = time.perf_counter()
+        
+    def set_attribute(self, key, value):
+        """Attach a value to the span"""
+        self.attributes[key] = value
+        
+    def finish(self):
+        """Stop the span's clock"""
+        self.duration = time.perf_counter() - self._start
+        
+    def to_dict(self):
+        """Serialize the span for export"""
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start_time': self.start_time,
+            'duration': round(self.duration, 6),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+class FileSpanExporter:
+    def __init__(self, path='logs/traces.jsonl', max_queue=10000):
+        """Append finished spans to a JSONL file from a background thread"""
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._write_loop, name='span-exporter', daemon=True)
+        self._thread.start()
+        
+    def export(self, span):
+        """Queue a span; drops it rather than blocking the traced code when the writer falls behind"""
+        try:
+            self._queue.put_nowait(span.to_dict())
+        except queue.Full:
+            self.dropped += 1
+            
+    def _write_loop(self):
+        """Write queued spans in batches"""
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with open(self.path, 'a') as f:
+                    f.writelines(json.dumps(span, default=str) + '\n' for span in batch)
+            except Exception as e:
+                logger.error(f"Error exporting spans: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+                    
+    def flush(self):
+        """Wait until every queued span has been written"""
+        self._queue.join()
+
+
+class Tracer:
+    def __init__(self, exporter=None, sample_rate=0.1):
+        """Create spans for sampled traces; everything else costs one context lookup"""
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        
+    @contextmanager
+    def start_trace(self, name, trace_id=None, **attributes):
+        """Open a root span, continuing trace_id when given (e.g. from the outbound call's metadata)"""
+        # Ids arrive from outside (webhook metadata); a malformed one starts a fresh trace
+        trace_id = valid_trace_id(trace_id) or new_trace_id()
+        sampled = self.exporter is not None and is_sampled(trace_id, self.sample_rate)
+        with self._run(Span(name, trace_id, None, sampled, attributes)) as span:
+            yield span
+            
+    @contextmanager
+    def span(self, name, **attributes):
+        """Open a child of the current span (no-op outside a sampled trace)"""
+        parent = _current_span.get()
+        if parent is None or not parent.sampled:
+            yield parent
+            return
+        with self._run(Span(name, parent.trace_id, parent.span_id, True, attributes)) as span:
+            yield span
+            
+    @contextmanager
+    def _run(self, span):
+        """Make span current for the block, then finish and export it"""
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            if span.sampled:
+                span.finish()
+                self.exporter.export(span)
+
+
+def current_trace_id():
+    """Trace id of the active trace, or None"""
+    span = _current_span.get()
+    return span.trace_id if span else None
+
+
+tracer = Tracer()
+
+
+def configure(path, sample_rate):
+    """Export sampled traces to path"""
+    tracer.exporter = FileSpanExporter(path)
+    tracer.sample_rate = sample_rate
+    return tracer
+
+
+def summarize(path):
+    """Per-stage latency from an exported trace file: count, mean, p95 and share of root-span time"""
+    durations = defaultdict(list)
+    root_time = 0.0
+    with open(path) as f:
+        for line in f:
+            span = json.loads(line)
+            durations[span['name']].append(span['duration'])
+            if span['parent_id'] is None:
+                root_time += span['duration']
+                
+    summary = []
+    for name, values in durations.items():
+        values.sort()
+        total = sum(values)
+        summary.append({
+            'name': name,
+            'count': len(values),
+            'mean': total / len(values),
+            'p95': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'share': total / root_time if root_time else 0.0
+        })
+    return sorted(summary, key=lambda s: s['share'], reverse=True)
+
+
+if __name__ == '__main__':
+    # python -m src.tracing logs/traces.jsonl
+    for stage in summarize(sys.argv[1] if len(sys.argv) > 1 else 'logs/traces.jsonl'):
+        print(f"{stage['name']:<40} n={stage['count']:<6} mean={stage['mean'] * 1000:8.1f}ms "
+              f"p95={stage['p95'] * 1000:8.1f}ms share={stage['share']:6.1%}")
@@ -0,0 +1,107 @@
+import asyncio
+import json
+import logging
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def parse_batch_response(text):
+    """Parse the model's JSON array into {id: result}; malformed items are treated as missing"""
+    items = json.loads(CODE_FENCE.sub('', text.strip()))
+    if not isinstance(items, list):
+        return {}
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        try:
+            results[int(item.pop('id'))] = item
+        except (KeyError, TypeError, ValueError):
+            continue
+    return results
+
+
+class TranscriptBatcher:
+    def __init__(self, gateway, prompt_builder, max_batch_size=8, max_wait=0.2, max_in_flight=4):
+        """Collect transcripts for up to max_wait seconds (or max_batch_size items) per LLM call"""
+        self.gateway = gateway
+        self.prompt_builder = prompt_builder
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches_sent = 0
+        self.transcripts_batched = 0
+        self._stats_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='transcript-batch')
+        self._thread = threading.Thread(target=self._collect, name='transcript-batcher', daemon=True)
+        self._thread.start()
+        
+    def submit(self, transcript, timeout=None):
+        """Queue a transcript and wait for its analysis
+        
+        Returns None when the model left this transcript out, so it can be analyzed individually.
+        Raises TimeoutError when the batch ran out of time, and the batch's error when it failed.
+        """
+        future = Future()
+        self._queue.put((transcript, future))
+        try:
+            return future.result(timeout)
+        except (FutureTimeoutError, asyncio.TimeoutError) as e:
+            # Either this caller's wait or the gateway deadline of the batch it joined ran out
+            raise TimeoutError("Batched transcript analysis timed out") from e
+            
+    def _collect(self):
+        """Form batches: the first transcript opens a window of at most max_wait seconds"""
+        while True:
+            batch = [self._queue.get()]
+            window_closes = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = window_closes - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._executor.submit(self._run_batch, batch)
+            
+    def _run_batch(self, batch):
+        """Send one multi-transcript prompt and fan the parsed results back out"""
+        transcripts = [transcript for transcript, _ in batch]
+        try:
+            if len(batch) == 1:
+                prompt = self.prompt_builder.build_transcript_analysis(transcripts[0])
+                results = {0: json.loads(self.gateway.generate(prompt))}
+            else:
+                prompt = self.prompt_builder.build_batch_transcript_analysis(transcripts)
+                results = parse_batch_response(self.gateway.generate(prompt))
+            with self._stats_lock:
+                self.batches_sent += 1
+                self.transcripts_batched += len(batch)
+            logger.info(f"Analyzed {len(batch)} transcripts in one LLM call")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+            
+        for i, (_, future) in enumerate(batch):
+            # Items the model dropped resolve to None so the caller can retry them alone
+            future.set_result(results.get(i))
+            
+    def get_stats(self):
+        """Get batching counters"""
+        with self._stats_lock:
+            return {
+                'batches_sent': self.batches_sent,
+                'transcripts_batched': self.transcripts_batched,
+                'avg_batch_size': self.transcripts_batched / self.batches_sent if self.batches_sent else 0.0
+            }
@@ -0,0 +1,178 @@
+import logging
+import re
+import threading
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CONFIRMATION_WORD = 'rates'
+
+# Spoken names -> trading pair used by InvestmentAnalyzer
+SYMBOL_ALIASES = {
+    'btc': 'BTC/USDT', 'bitcoin': 'BTC/USDT',
+    'eth': 'ETH/USDT', 'ether': 'ETH/USDT', 'ethereum': 'ETH/USDT',
+    'sol': 'SOL/USDT', 'solana': 'SOL/USDT',
+    'doge': 'DOGE/USDT', 'dogecoin': 'DOGE/USDT',
+    'shib': 'SHIB/USDT', 'shiba': 'SHIB/USDT',
+    'pepe': 'PEPE/USDT',
+    'floki': 'FLOKI/USDT',
+}
+
+SYMBOL_PATTERN = re.compile(r'\b(' + '|'.join(SYMBOL_ALIASES) + r')\b')
+AMOUNT_PATTERN = re.compile(r'\b(\d[\d,]*(?:\.\d+)?)\s*(k|thousand)?\b')
+CONFIRMATION_PATTERN = re.compile(r'\b' + CONFIRMATION_WORD + r'\b')
+NEGATIVE_PATTERN = re.compile(
+    r"\b(no|nope|nah|not interested|no thanks|no thank you|don'?t want|do not want|"
+    r"not now|not today|maybe later|stop calling|cancel)\b"
+)
+AFFIRMATIVE_PATTERN = re.compile(
+    r"\b(yes|yeah|yep|sure|correct|confirm|confirmed|that'?s right|go ahead|let'?s do it|sounds good)\b"
+)
+# Anything that needs a real answer, or a currency we would have to convert, goes to the LLM
+ESCALATION_PATTERN = re.compile(
+    r"\?|\b(what|why|how|when|which|who|can you|could you|tell me|explain|"
+    r"not sure|unsure|maybe|depends|dollars?|usd|bucks|percent|half|all of it)\b"
+)
+USER_SPEAKERS = {'user', 'human', 'customer', 'caller'}
+ASSISTANT_SPEAKERS = {'assistant', 'agent', 'ai', 'bot', 'oscarr'}
+SPEAKER_PATTERN = re.compile(r'^\s*([a-z ]+?)\s*:\s*(.*)$', re.IGNORECASE)
+# What the assistant says when it reads the amount back and asks for the confirmation word
+CONFIRMATION_PROMPT_PATTERN = re.compile(r'\b(confirm|' + CONFIRMATION_WORD + r')\b')
+
+
+class TranscriptParser:
+    def __init__(self):
+        """Initialize the rule-based intent extractor and its counters"""
+        self.fast_path_hits = 0
+        self.escalations = 0
+        self._lock = threading.Lock()
+        
+    def _turns(self, transcript):
+        """Split a transcript into (is_user, text) turns, or None unless every speaker is a known one
+        
+        Unlabelled text could be either side of the call, so it is never attributed to the user.
+        Unlabelled lines after a labelled one continue that turn.
+        """
+        turns = []
+        for line in transcript.splitlines():
+            if not line.strip():
+                continue
+            match = SPEAKER_PATTERN.match(line)
+            speaker = match.group(1).lower() if match else None
+            if speaker in USER_SPEAKERS or speaker in ASSISTANT_SPEAKERS:
+                turns.append((speaker in USER_SPEAKERS, match.group(2).lower()))
+            elif match or not turns:
+                return None
+            else:
+                is_user, text = turns[-1]
+                turns[-1] = (is_user, f"{text} {line.strip().lower()}")
+        return turns
+        
+    def _confirmed_after_prompt(self, turns, amount):
+        """Whether the confirmation word was said in a user turn after the assistant read back the amount"""
+        prompted = False
+        for is_user, text in turns:
+            if not is_user:
+                prompted = bool(CONFIRMATION_PROMPT_PATTERN.search(text)) and amount in self._parse_amounts(text)
+            elif prompted and CONFIRMATION_PATTERN.search(text):
+                return True
+        return False
+        
+    def _parse_amounts(self, text):
+        """Extract distinct numeric amounts, expanding 'k'/'thousand'"""
+        amounts = set()
+        for number, multiplier in AMOUNT_PATTERN.findall(text):
+            value = float(number.replace(',', ''))
+            if multiplier:
+                value *= 1000
+            amounts.add(value)
+        return amounts
+        
+    def _build_result(self, **fields):
+        """Fill in the process_user_response structure"""
+        result = {
+            'interest': 'unsure',
+            'preferred_investment': None,
+            'investment_amount': None,
+            'amount_confirmed': 'no',
+            'confirmation_word_correct': 'no',
+            'questions': [],
+            'sentiment': 'neutral',
+            'next_step': 'end',
+            'investment_completed': 'no'
+        }
+        result.update(fields)
+        return result
+        
+    def parse(self, transcript):
+        """Return a confident structured result, or None if the transcript needs the LLM"""
+        result = self._classify(transcript or '')
+        with self._lock:
+            if result is None:
+                self.escalations += 1
+            else:
+                self.fast_path_hits += 1
+        return result
+        
+    def _classify(self, transcript):
+        """Apply the rules; None means not confident"""
+        turns = self._turns(transcript)
+        if not turns:
+            return None
+        text = ' '.join(text for is_user, text in turns if is_user)
+        if not text.strip() or ESCALATION_PATTERN.search(text):
+            return None
+            
+        symbols = set(SYMBOL_ALIASES[s] for s in SYMBOL_PATTERN.findall(text))
+        amounts = self._parse_amounts(text)
+        said_confirmation_word = bool(CONFIRMATION_PATTERN.search(text))
+        negative = bool(NEGATIVE_PATTERN.search(text))
+        affirmative = bool(AFFIRMATIVE_PATTERN.search(text))
+        
+        # Clear decline: a refusal with nothing that points at an investment
+        if negative and not (affirmative or symbols or amounts or said_confirmation_word):
+            return self._build_result(interest='no', sentiment='negative')
+            
+        # Mixed signals, or more than one candidate symbol/amount, are left to the LLM
+        if negative or len(symbols) != 1 or len(amounts) != 1:
+            return None
+            
+        symbol = symbols.pop()
+        amount = amounts.pop()
+        if said_confirmation_word:
+            # The word alone proves nothing ("btc rates for 2025"); it must answer the amount read-back
+            if not self._confirmed_after_prompt(turns, amount):
+                return None
+            return self._build_result(
+                interest='yes',
+                preferred_investment=symbol,
+                investment_amount=amount,
+                amount_confirmed='yes',
+                confirmation_word_correct='yes',
+                sentiment='positive',
+                investment_completed='yes'
+            )
+            
+        return self._build_result(
+            interest='yes',
+            preferred_investment=symbol,
+            investment_amount=amount,
+            amount_confirmed='yes' if affirmative else 'no',
+            sentiment='positive',
+            next_step=(
+                "Ask the user to say the confirmation word to finalize the investment"
+                if affirmative else
+                f"Repeat back {amount:.2f} POL in {symbol} and ask the user to confirm the amount"
+            )
+        )
+        
+    def get_stats(self):
+        """Get fast-path counters; every fast-path hit is an LLM call avoided"""
+        with self._lock:
+            total = self.fast_path_hits + self.escalations
+            return {
+                'llm_calls_avoided': self.fast_path_hits,
+                'escalations': self.escalations,
+                'fast_path_rate': self.fast_path_hits / total if total else 0.0
+            }
@@ -0,0 +1,202 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PRIORITY_HIGH = 0  # e.g. the user's balance just changed
+PRIORITY_NORMAL = 1
+
+
+class UserScheduler:
+    def __init__(self, check_fn, interval=86400, jitter=0.1, batch_size=50, max_workers=8, poll_interval=1.0,
+                 initial_spread=None, check_many_fn=None):
+        """Run check_fn(user_id) for every user once per interval, spread out over time
+
+        With check_many_fn, users that fall due together are checked in one check_many_fn(user_ids)
+        call instead, so work shared between them (e.g. market data) is done once per batch.
+        """
+        self.check_fn = check_fn
+        self.check_many_fn = check_many_fn
+        self.interval = interval
+        self.jitter = jitter  # fraction of the interval each next-due time is randomly shifted by
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.initial_spread = interval if initial_spread is None else initial_spread
+        self.runs = 0
+        self.failures = 0
+        self.total_lag = 0.0
+        
+        self._due = []  # (due_at, priority, seq, user_id), lazily invalidated
+        self._ready = []  # (priority, due_at, seq, user_id) for users already due
+        self._live = {}  # user_id -> seq of its current schedule entry
+        self._running = set()
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._slots = threading.Semaphore(max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='user-check')
+        self._stop_event = threading.Event()
+        self._paused = False
+        self._thread = None
+        
+    def add_user(self, user_id, delay=None, priority=PRIORITY_NORMAL):
+        """Schedule a user; with no delay the first run lands at a random point within initial_spread"""
+        if delay is None:
+            delay = random.uniform(0, self.initial_spread)
+        self._schedule(user_id, time.monotonic() + delay, priority)
+        
+    def remove_user(self, user_id):
+        """Stop scheduling a user (a run already in progress finishes)"""
+        with self._cond:
+            self._live.pop(user_id, None)
+            
+    def prioritize(self, user_id):
+        """Check a user as soon as a worker is free, ahead of routine checks"""
+        self._schedule(user_id, time.monotonic(), PRIORITY_HIGH)
+        
+    def _schedule(self, user_id, due_at, priority):
+        """Replace a user's schedule entry; the old heap entry is skipped when popped"""
+        with self._cond:
+            seq = next(self._seq)
+            self._live[user_id] = seq
+            heapq.heappush(self._due, (due_at, priority, seq, user_id))
+            self._cond.notify()
+            
+    def _next_due_at(self):
+        """Next due time after this run, with jitter so users don't drift into lockstep"""
+        spread = self.interval * self.jitter
+        return time.monotonic() + self.interval + random.uniform(-spread, spread)
+        
+    def start(self):
+        """Start the dispatch thread (a no-op if it is already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._dispatch_loop, name='user-scheduler', daemon=True)
+        self._thread.start()
+        
+    def stop(self, wait=True):
+        """Stop dispatching and optionally wait for running checks"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread:
+            self._thread.join()
+        self._executor.shutdown(wait=wait)
+        
+    def pause(self):
+        """Stop dispatching new checks (schedules are kept; running checks finish)"""
+        with self._cond:
+            self._paused = True
+            
+    def resume(self):
+        """Resume dispatching, starting with anything that fell due while paused"""
+        with self._cond:
+            self._paused = False
+            self._cond.notify()
+            
+    def _dispatch_loop(self):
+        """Move due users to the ready queue and dispatch them in capped batches"""
+        while not self._stop_event.is_set():
+            with self._cond:
+                batch = [] if self._paused else self._take_batch()
+                if not batch:
+                    self._cond.wait(self._wait_time())
+                    continue
+            if self.check_many_fn is not None and len(batch) > 1:
+                self._executor.submit(self._run_many, batch)
+                continue
+            for user_id, seq, due_at in batch:
+                self._executor.submit(self._run, user_id, seq, due_at)
+                
+    def _wait_time(self):
+        """Sleep until the next user is due, a new entry arrives, or poll_interval passes"""
+        if self._ready or not self._due:
+            return self.poll_interval
+        return max(0.0, min(self.poll_interval, self._due[0][0] - time.monotonic()))
+        
+    def _take_batch(self):
+        """Pop up to batch_size ready users, limited by free worker slots (call with the lock held)"""
+        now = time.monotonic()
+        while self._due and self._due[0][0] <= now:
+            due_at, priority, seq, user_id = heapq.heappop(self._due)
+            if self._live.get(user_id) == seq:
+                heapq.heappush(self._ready, (priority, due_at, seq, user_id))
+                
+        batch = []
+        deferred = []
+        while self._ready and len(batch) < self.batch_size:
+            if not self._slots.acquire(blocking=False):
+                break
+            priority, due_at, seq, user_id = heapq.heappop(self._ready)
+            if self._live.get(user_id) != seq:
+                self._slots.release()
+                continue
+            if user_id in self._running:
+                # Never run the same user twice at once; retry once the current run is done
+                self._slots.release()
+                deferred.append((priority, due_at, seq, user_id))
+                continue
+            self._running.add(user_id)
+            batch.append((user_id, seq, due_at))
+        for entry in deferred:
+            heapq.heappush(self._ready, entry)
+        return batch
+        
+    def _run(self, user_id, seq, due_at):
+        """Check one user and schedule their next run"""
+        start = time.monotonic()
+        failed = False
+        try:
+            self.check_fn(user_id)
+        except Exception as e:
+            failed = True
+            logger.error(f"Error checking user {user_id}: {e}")
+        finally:
+            self._finish(user_id, seq, due_at, start, failed)
+            
+    def _run_many(self, batch):
+        """Check a batch of users in one call and schedule each one's next run"""
+        start = time.monotonic()
+        failed = False
+        try:
+            self.check_many_fn([user_id for user_id, _, _ in batch])
+        except Exception as e:
+            failed = True
+            logger.error(f"Error checking a batch of {len(batch)} users: {e}")
+        finally:
+            for user_id, seq, due_at in batch:
+                self._finish(user_id, seq, due_at, start, failed)
+                
+    def _finish(self, user_id, seq, due_at, start, failed):
+        """Record a user's run, free their worker slot and schedule their next run"""
+        with self._cond:
+            self.runs += 1
+            self.failures += failed
+            self.total_lag += start - due_at
+            self._running.discard(user_id)
+            # Only reschedule if nothing (prioritize, remove_user) replaced this entry meanwhile
+            if self._live.get(user_id) == seq:
+                seq = next(self._seq)
+                self._live[user_id] = seq
+                heapq.heappush(self._due, (self._next_due_at(), PRIORITY_NORMAL, seq, user_id))
+            self._slots.release()
+            self._cond.notify()
+            
+    def get_stats(self):
+        """Get scheduling counters"""
+        with self._cond:
+            return {
+                'users': len(self._live),
+                'running': len(self._running),
+                'ready': len(self._ready),
+                'runs': self.runs,
+                'failures': self.failures,
+                'avg_lag': self.total_lag / self.runs if self.runs else 0.0
+            }
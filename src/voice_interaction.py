@@ -4,6 +4,13 @@ import logging
 from datetime import datetime
 from config.config import *
 from .investment_analyzer import InvestmentAnalyzer
+from .response_cache import ResponseCache, CachedModel
+from .llm_gateway import LLMGateway
+from .transcript_parser import TranscriptParser
+from .prompt_builder import PromptBuilder, confirmation_cache_key
+from .transcript_batcher import TranscriptBatcher
+from .script_templates import CallScriptCache
+from .metrics import instrument
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -11,124 +18,79 @@ logger = logging.getLogger(__name__)
 
 # Initialize Gemini AI
 genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-pro')
+model = CachedModel(
+    # Timed below the cache, so only real Gemini requests are measured
+    instrument(genai.GenerativeModel('gemini-pro'), 'gemini', ['generate_content']),
+    ResponseCache(
+        max_entries=LLM_CACHE_MAX_ENTRIES,
+        ttl=LLM_CACHE_TTL,
+        db_path=LLM_CACHE_DB_PATH
+    )
+)
+llm_gateway = LLMGateway(
+    model,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    timeout=LLM_TIMEOUT,
+    max_retries=LLM_MAX_RETRIES,
+    hedge_after=LLM_HEDGE_AFTER
+)
 
 class VoiceInteraction:
-    def __init__(self):
+    def __init__(self, gateway=None):
         self.investment_analyzer = InvestmentAnalyzer()
+        # Pass an LLMGateway around fake_services.FakeModel to exercise the call paths offline
+        self.gateway = gateway or llm_gateway
+        self.transcript_parser = TranscriptParser()
+        self.script_templates = CallScriptCache()
+        self.prompt_builder = PromptBuilder(max_tokens=LLM_PROMPT_TOKEN_BUDGET)
+        self.transcript_batcher = None
+        if LLM_BATCH_MAX_SIZE > 1:
+            self.transcript_batcher = TranscriptBatcher(
+                self.gateway,
+                self.prompt_builder,
+                max_batch_size=LLM_BATCH_MAX_SIZE,
+                max_wait=LLM_BATCH_MAX_WAIT
+            )
         
     def generate_call_script(self, unused_funds, suggestions, matic_equivalent=None):
         """Generate a call script for the AI to follow"""
         try:
-            # Separate standard coins and memecoins
-            standard_coins = [s for s in suggestions if not s.get('is_memecoin', False)]
-            memecoins = [s for s in suggestions if s.get('is_memecoin', False)]
+            # The market portion is compiled once per suggestions snapshot
+            return self.script_templates.get(suggestions).render(unused_funds, matic_equivalent)
             
-            # Format standard investment suggestions
-            standard_text = "\n".join([
-                f"{i+1}. {s['symbol']} - Current Price: {s['price_in_pol']:.2f} POL (≈ ${s['price']:.2f}), "
-                f"Risk Level: {s['risk_level']}, 24h Return: {s['daily_return']*100:.2f}%"
-                for i, s in enumerate(standard_coins)
-            ])
-            
-            # Format memecoin suggestions for later use if requested
-            memecoin_text = "\n".join([
-                f"• {s['symbol']} - Current Price: {s['price_in_pol']:.8f} POL (≈ ${s['price']:.8f}), "
-                f"Risk Level: {s['risk_level']}, 24h Return: {s['daily_return']*100:.2f}%\n"
-                f"  {s['risk_warning']}"
-                for s in memecoins
-            ])
-            
-            matic_text = ""
-            if matic_equivalent:
-                matic_text = f"\n\nFor reference, your unused funds of ${unused_funds:.2f} is equivalent to approximately {matic_equivalent:.2f} MATIC tokens."
-            
-            script = f"""
-Hello! This is Oscar, your weekly AI financial advisor. 
-
-I've noticed you have {unused_funds:.2f} POL in unused funds that could be working harder for you. Based on your spending patterns, you're keeping more than necessary in your wallet.{matic_text}
-
-Here are some investment opportunities I've analyzed: 
-(Say the analysed opportunities without waiting for the user to respond)
-
-📈 Standard Investment Options:
-{standard_text}
-
-Would you like to invest some of your unused funds? I can help you choose the best option based on your risk tolerance and investment goals.
-
-[Wait for user response]
-
-If the user asks about alternative or higher risk investments:
-1. Mention that there are also higher-risk options available in the memecoin category
-2. Ask if they would like to hear about these options
-3. If yes, present the following with strong risk warnings:
-
-🎮 High-Risk Alternative Options:
-{memecoin_text}
-
-Additional guidelines for memecoin inquiries:
-1. Emphasize the extreme volatility and high risk
-2. Recommend limiting memecoin investments to a small portion of their portfolio (max 5-10%)
-3. Remind them that these investments can result in significant losses
-4. Suggest considering standard options first
-
-If the user wants to proceed with any investment:
-1. Ask them to specify an amount they would like to invest, reminding them that they have {unused_funds:.2f} POL available.
-2. After they choose an amount, repeat their choice back to them for confirmation.
-3. If they confirm the amount, explain that for security, they need to say the word "rates" to finalize the transaction.
-4. Only proceed with the investment if they say the exact word "rates".
-
-Based on historical data analysis, I recommend {standard_coins[0]['symbol']} as the most suitable investment option for your profile.
+        except Exception as e:
+            logger.error(f"Error generating call script: {e}")
+            return None
 
-Please let me know if you'd like to proceed with any of these options or if you have any questions about the available investments.
-"""
-            
-            return script
+    def generate_call_scripts(self, users, suggestions):
+        """Generate call scripts for a whole campaign sharing one suggestions snapshot"""
+        try:
+            return self.script_templates.get(suggestions).render_many(users)
             
         except Exception as e:
-            logger.error(f"Error generating call script: {e}")
+            logger.error(f"Error generating call scripts: {e}")
             return None
 
     def process_user_response(self, transcript):
         """Process user's voice response using Gemini AI"""
         try:
-            prompt = f"""
-            Analyze the following user response from a phone call about investment opportunities:
-            
-            {transcript}
-            
-            Please determine:
-            1. Did the user express interest in any specific investment?
-            2. Did they specify an investment amount in POL?
-            3. Did they confirm their choice?
-            4. Did they say the secret confirmation word?
-            5. Did they ask any questions that need to be addressed?
-            6. What is their overall sentiment (positive, negative, neutral)?
-            7. What should be the next step in the conversation?
-            8. Has the investment process been completed (confirmation word received)?
-            
-            The confirmation word is "rates" - this must be said exactly to confirm any transaction.
-            
-            Respond in JSON format with the following structure:
-            {{
-                "interest": "yes/no/unsure",
-                "preferred_investment": "symbol or null",
-                "investment_amount": "numeric amount in POL or null",
-                "amount_confirmed": "yes/no",
-                "confirmation_word_correct": "yes/no",  # Check if they said "rates"
-                "questions": ["list of questions asked"],
-                "sentiment": "positive/negative/neutral",
-                "next_step": "suggestion for next action",
-                "investment_completed": "yes/no"  # Whether to end call with investment confirmation
-            }}
-            
-            Important: Only set investment_completed to "yes" if:
-            1. amount_confirmed is "yes"
-            2. confirmation_word_correct is "yes"
-            """
-            
-            response = model.generate_content(prompt)
-            result = json.loads(response.text)
+            # Obvious answers are parsed locally; only ambiguous transcripts reach Gemini
+            result = self.transcript_parser.parse(transcript)
+            if result is None and self.transcript_batcher:
+                try:
+                    result = self.transcript_batcher.submit(
+                        transcript, timeout=LLM_TIMEOUT + LLM_BATCH_MAX_WAIT
+                    )
+                except TimeoutError:
+                    # The whole LLM budget is spent; a serial call now would only double the wait
+                    logger.warning("Batched transcript analysis timed out; skipping the serial fallback")
+                    return None
+                except Exception as e:
+                    # e.g. an unparseable batch reply; this transcript alone may still succeed
+                    logger.error(f"Batched transcript analysis failed, analyzing individually: {e}")
+            if result is None:
+                prompt = self.prompt_builder.build_transcript_analysis(transcript)
+                result = json.loads(self.gateway.generate(prompt))
             
             # If investment is completed (confirmed amount + correct confirmation word) or user declines, add farewell
             if result.get('investment_completed') == 'yes' and result.get('confirmation_word_correct') == 'yes':
@@ -146,62 +108,64 @@ Please let me know if you'd like to proceed with any of these options or if you
             logger.error(f"Error processing user response: {e}")
             return None
 
+    def _follow_up_prompt(self, analysis, user_response):
+        """Build the follow-up prompt"""
+        return self.prompt_builder.build_follow_up(analysis, user_response)
+
+    def _confirmation_prompt(self, symbol, amount_pol, analysis):
+        """Build the confirmation prompt and its cache key"""
+        prompt = self.prompt_builder.build_confirmation(symbol, amount_pol, analysis)
+        
+        # The live analysis numbers drift between calls; the price is bucketed so a cached
+        # message never quotes a price more than a rounding step away from the current one
+        return prompt, confirmation_cache_key(symbol, amount_pol, analysis)
+
     def generate_follow_up(self, analysis, user_response):
         """Generate a follow-up response based on user's input"""
         try:
-            prompt = f"""
-            Based on the following context, generate a natural response:
-            
-            Previous analysis: {json.dumps(analysis, indent=2)}
-            User response analysis: {json.dumps(user_response, indent=2)}
-            
-            Please generate a conversational response that:
-            1. Addresses any questions the user asked
-            2. Provides additional information if requested
-            3. Confirms or adjusts the investment plan
-            4. Maintains a professional and helpful tone
-            
-            Keep the response concise and focused on the user's specific interests.
-            """
-            
-            response = model.generate_content(prompt)
-            return response.text
+            return self.gateway.generate(self._follow_up_prompt(analysis, user_response))
             
         except Exception as e:
             logger.error(f"Error generating follow-up: {e}")
             return None
 
-    def handle_investment_confirmation(self, symbol, amount_pol):
-        """Handle the final confirmation of an investment"""
+    def stream_follow_up(self, analysis, user_response):
+        """Stream the follow-up as sentence-level segments; cancel() the stream if the caller hangs up"""
         try:
-            # Get detailed analysis of the chosen investment
-            analysis = self.investment_analyzer.analyze_investment_opportunity(symbol, amount_pol)
-            
-            prompt = f"""
-            Generate a confirmation message for the following investment:
-            
-            Symbol: {symbol}
-            Amount: {amount_pol:.2f} POL
-            Analysis: {json.dumps(analysis, indent=2)}
+            return self.gateway.stream(
+                self._follow_up_prompt(analysis, user_response),
+                name='follow_up_stream'
+            )
             
-            The message should:
-            1. Confirm the investment details in POL
-            2. Highlight key points from the analysis
-            3. Ask the user to say the word "rates" to finalize the investment
-            4. Clearly state that the transaction will only proceed if they say the exact word "rates"
-            5. Explain what will happen after confirmation
-            6. After confirmation, thank them for their trust and end the call politely
-            
-            Keep the message clear and professional. Be explicit about the confirmation word "rates".
-            """
-            
-            response = model.generate_content(prompt)
-            return response.text
+        except Exception as e:
+            logger.error(f"Error streaming follow-up: {e}")
+            return None
+
+    def handle_investment_confirmation(self, symbol, amount_pol, analysis=None):
+        """Handle the final confirmation of an investment"""
+        try:
+            # Get detailed analysis of the chosen investment unless the caller already has it
+            if analysis is None:
+                analysis = self.investment_analyzer.analyze_investment_opportunity(symbol, amount_pol)
+            prompt, cache_key = self._confirmation_prompt(symbol, amount_pol, analysis)
+            return self.gateway.generate(prompt, cache_key=cache_key)
             
         except Exception as e:
             logger.error(f"Error handling investment confirmation: {e}")
             return None
 
+    def stream_investment_confirmation(self, symbol, amount_pol, analysis=None):
+        """Stream the confirmation message as sentence-level segments"""
+        try:
+            if analysis is None:
+                analysis = self.investment_analyzer.analyze_investment_opportunity(symbol, amount_pol)
+            prompt, cache_key = self._confirmation_prompt(symbol, amount_pol, analysis)
+            return self.gateway.stream(prompt, cache_key=cache_key, name='confirmation_stream')
+            
+        except Exception as e:
+            logger.error(f"Error streaming investment confirmation: {e}")
+            return None
+
     def generate_farewell(self, investment_made=False):
         """Generate a farewell message to end the call"""
         if investment_made:
@@ -0,0 +1,139 @@
+import heapq
+import logging
+import threading
+import time
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def relative_change(old, new):
+    """Relative change from old to new (any change from zero counts as 100%)"""
+    if old == new:
+        return 0.0
+    if not old:
+        return 1.0
+    return abs(new - old) / abs(old)
+
+
+class WalletChangeTracker:
+    def __init__(self, on_dirty, balance_threshold=0.05, spending_threshold=0.1, debounce=30.0, max_delay=300.0):
+        """Call on_dirty(user_id) for a wallet's users only when its balance or spending changed significantly"""
+        self.on_dirty = on_dirty
+        self.balance_threshold = balance_threshold
+        self.spending_threshold = spending_threshold
+        self.debounce = debounce  # quiet period that closes a burst of changes
+        self.max_delay = max_delay  # a wallet that never goes quiet is still evaluated this often
+        self.events = 0
+        self.evaluations = 0
+        self.marked_dirty = 0
+        
+        self._wallets = {}  # wallet_id -> wallet_monitor
+        self._users = {}  # wallet_id -> ids of the users it belongs to
+        self._baselines = {}  # wallet_id -> snapshot at the last dirty mark
+        self._pending = {}  # wallet_id -> (first_change_at, fire_at)
+        self._deadlines = []  # (fire_at, wallet_id), lazily invalidated
+        self._cond = threading.Condition()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name='wallet-change-tracker', daemon=True)
+        self._thread.start()
+        
+    def watch(self, user_id, wallet_monitor):
+        """Start tracking a user's wallet, taking its current state as the baseline
+        
+        Changes are tracked per wallet (its wallet_id, or the user's id for an anonymous
+        wallet), so a wallet is evaluated once however many users are attached to it.
+        """
+        wallet_id = wallet_monitor.wallet_id or user_id
+        with self._cond:
+            self._users.setdefault(wallet_id, set()).add(user_id)
+            if wallet_id in self._wallets:
+                return
+            self._wallets[wallet_id] = wallet_monitor
+            self._baselines[wallet_id] = self._snapshot(wallet_monitor)
+        wallet_monitor.add_change_listener(lambda monitor, reason: self.touch(wallet_id))
+        
+    def touch(self, wallet_id):
+        """Record a change; the wallet is evaluated once the burst settles"""
+        now = time.monotonic()
+        with self._cond:
+            self.events += 1
+            first_change_at = self._pending.get(wallet_id, (now, None))[0]
+            fire_at = min(now + self.debounce, first_change_at + self.max_delay)
+            self._pending[wallet_id] = (first_change_at, fire_at)
+            heapq.heappush(self._deadlines, (fire_at, wallet_id))
+            self._cond.notify()
+            
+    def _snapshot(self, wallet_monitor):
+        """Balance and monthly spending that unused-funds detection depends on"""
+        spending = wallet_monitor.calculate_spending_patterns()
+        return {
+            'balance': wallet_monitor.get_ethereum_balance(),
+            'monthly_average': spending['monthly_average'] if spending else None
+        }
+        
+    def _is_significant(self, baseline, snapshot):
+        """Whether the change since the baseline could change the unused-funds result"""
+        if relative_change(baseline['balance'], snapshot['balance']) >= self.balance_threshold:
+            return True
+        if (baseline['monthly_average'] is None) != (snapshot['monthly_average'] is None):
+            return True
+        if snapshot['monthly_average'] is None:
+            return False
+        return relative_change(baseline['monthly_average'], snapshot['monthly_average']) >= self.spending_threshold
+        
+    def _flush_loop(self):
+        """Evaluate wallets whose debounce window has closed"""
+        while not self._stop_event.is_set():
+            with self._cond:
+                now = time.monotonic()
+                due = []
+                while self._deadlines and self._deadlines[0][0] <= now:
+                    fire_at, wallet_id = heapq.heappop(self._deadlines)
+                    pending = self._pending.get(wallet_id)
+                    if pending and pending[1] == fire_at:
+                        del self._pending[wallet_id]
+                        due.append(wallet_id)
+                if not due:
+                    timeout = self._deadlines[0][0] - now if self._deadlines else None
+                    self._cond.wait(timeout)
+                    continue
+            for wallet_id in due:
+                self._evaluate(wallet_id)
+                
+    def _evaluate(self, wallet_id):
+        """Compare a settled wallet against its baseline and mark it dirty if it moved enough"""
+        try:
+            snapshot = self._snapshot(self._wallets[wallet_id])
+            self.evaluations += 1
+            if not self._is_significant(self._baselines[wallet_id], snapshot):
+                logger.info(f"Wallet {wallet_id} changed insignificantly, skipping re-evaluation")
+                return
+            self._baselines[wallet_id] = snapshot
+            self.marked_dirty += 1
+            logger.info(f"Wallet {wallet_id} marked dirty: {snapshot}")
+            with self._cond:
+                users = list(self._users[wallet_id])
+            for user_id in users:
+                self.on_dirty(user_id)
+        except Exception as e:
+            logger.error(f"Error evaluating wallet {wallet_id}: {e}")
+            
+    def stop(self):
+        """Stop the flush thread (pending changes are dropped)"""
+        self._stop_event.set()
+        with self._cond:
+            self._cond.notify()
+        self._thread.join()
+        
+    def get_stats(self):
+        """Get change-tracking counters"""
+        with self._cond:
+            return {
+                'wallets': len(self._wallets),
+                'pending': len(self._pending),
+                'events': self.events,
+                'evaluations': self.evaluations,
+                'marked_dirty': self.marked_dirty
+            }
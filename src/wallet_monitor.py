@@ -9,10 +9,24 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class WalletMonitor:
-    def __init__(self):
+    def __init__(self, wallet_id=None):
         # Initialize mock wallet instead of real connections
         self.mock_wallet = MockWallet(initial_balance=10.0)  # Start with 10 ETH
+        self.wallet_id = wallet_id
+        self._change_listeners = []
         
+    def add_change_listener(self, listener):
+        """Register listener(wallet_monitor, reason) to be called whenever the wallet changes"""
+        self._change_listeners.append(listener)
+
+    def notify_change(self, reason):
+        """Tell listeners the wallet changed (also called by chain sync after applying new blocks)"""
+        for listener in self._change_listeners:
+            try:
+                listener(self, reason)
+            except Exception as e:
+                logger.error(f"Error in wallet change listener: {e}")
+
     def get_ethereum_balance(self):
         """Get Ethereum balance from mock wallet"""
         return self.mock_wallet.get_ethereum_balance()
@@ -32,7 +46,9 @@ class WalletMonitor:
     def update_balance(self, new_balance):
         """Update the mock wallet balance"""
         self.mock_wallet.update_balance(new_balance)
+        self.notify_change('balance_update')
 
     def add_transaction(self, amount, is_incoming=True):
         """Add a new transaction to the mock wallet"""
-        self.mock_wallet.add_transaction(amount, is_incoming) 
\ No newline at end of file
+        self.mock_wallet.add_transaction(amount, is_incoming)
+        self.notify_change('transaction')
@@ -0,0 +1,115 @@
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from src import call_dispatcher
+from src.call_dispatcher import CallDispatcher, SharedTokenBucket, request_not_sent
+
+
+class Response:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self.body = body or {}
+        self.headers = headers or {}
+        self.text = str(self.body)
+        
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+            
+    def json(self):
+        return self.body
+
+
+class ScriptedSession:
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+        
+    def post(self, url, json=None, headers=None, timeout=None):
+        self.calls.append(headers)
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def dispatcher(outcomes):
+    client = CallDispatcher('key', rate_per_second=1000, burst=1000, max_retries=3, backoff_base=0)
+    client.session = ScriptedSession(outcomes)
+    return client
+
+
+def refused():
+    reason = NewConnectionError(None, 'Connection refused')
+    return requests.ConnectionError(MaxRetryError(None, '/v1/calls', reason))
+
+
+def test_connect_failures_and_429_are_retried_with_one_idempotency_key():
+    client = dispatcher([refused(), Response(429, headers={'Retry-After': '0'}), Response(200, {'call_id': 'c1'})])
+    assert client.place_call('+1', 'task') == {'call_id': 'c1'}
+    keys = {headers['Idempotency-Key'] for headers in client.session.calls}
+    assert len(client.session.calls) == 3 and len(keys) == 1
+
+
+@pytest.mark.parametrize('outcome', [
+    Response(503),
+    requests.ReadTimeout('read timed out'),
+    requests.ConnectionError('Connection reset by peer'),
+])
+def test_failures_after_sending_are_not_retried(outcome):
+    client = dispatcher([outcome, Response(200, {'call_id': 'c1'})])
+    assert client.place_call('+1', 'task') is None
+    assert len(client.session.calls) == 1
+
+
+def test_request_not_sent():
+    assert request_not_sent(requests.ConnectTimeout('connect timed out'))
+    assert request_not_sent(refused())
+    assert not request_not_sent(requests.ReadTimeout('read timed out'))
+
+
+def test_retry_after_is_clamped():
+    client = CallDispatcher('key', max_backoff=5)
+    assert client._backoff(0, '3600') == 5
+    assert client._backoff(0, '-1') == 0
+    assert 0 <= client._backoff(10, 'Wed, 21 Oct 2026 07:28:00 GMT') <= 5
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        self.sleeps = []
+        
+    def time(self):
+        return self.now
+        
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_shared_bucket_limits_every_process_together(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(call_dispatcher.time, 'time', clock.time)
+    monkeypatch.setattr(call_dispatcher.time, 'sleep', clock.sleep)
+    # Two buckets on one database stand in for two gunicorn workers
+    db_path = str(tmp_path / 'rate_limits.db')
+    first = SharedTokenBucket(db_path, rate=2.0, capacity=2)
+    second = SharedTokenBucket(db_path, rate=2.0, capacity=2)
+    
+    first.acquire()
+    second.acquire()
+    assert clock.sleeps == []
+    # The burst is spent across both, so the next token is half a second away for either
+    second.acquire()
+    assert clock.sleeps == [0.5]
+    first.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_dispatcher_uses_the_shared_bucket_when_given_a_database(tmp_path):
+    client = CallDispatcher('key', rate_limit_db_path=str(tmp_path / 'rate_limits.db'))
+    assert isinstance(client.rate_limiter, SharedTokenBucket)
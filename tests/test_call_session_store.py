@@ -0,0 +1,79 @@
+import sqlite3
+
+from src import call_session_store
+from src.call_session_store import CallSessionStore
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        
+    def time(self):
+        return self.now
+
+
+SESSION = {
+    'phone_number': '+15550000001',
+    'unused_funds': {'unused_funds': 42.0},
+    'suggestions': [{'symbol': 'BTC/USDT', 'price': 64000.0}],
+    'recommended_symbol': 'BTC/USDT',
+    'analysis': {'BTC/USDT': {'current_price': 64000.0}}
+}
+
+
+def make_store(tmp_path, **kwargs):
+    return CallSessionStore(str(tmp_path / 'sessions.db'), **kwargs)
+
+
+def count_rows(tmp_path):
+    with sqlite3.connect(str(tmp_path / 'sessions.db')) as conn:
+        return conn.execute("SELECT COUNT(*) FROM call_sessions").fetchone()[0]
+
+
+def test_session_survives_a_restart(tmp_path):
+    make_store(tmp_path).put('call-1', SESSION)
+    assert make_store(tmp_path).get('call-1') == SESSION
+
+
+def test_unknown_or_missing_call_id(tmp_path):
+    store = make_store(tmp_path)
+    assert store.get('nope') is None
+    assert store.get(None) is None
+
+
+def test_session_expires_after_ttl(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(call_session_store.time, 'time', clock.time)
+    store = make_store(tmp_path, ttl=60)
+    store.put('call-1', SESSION)
+    clock.now += 59
+    assert store.get('call-1') == SESSION
+    clock.now += 1
+    assert store.get('call-1') is None
+    assert count_rows(tmp_path) == 0
+
+
+def test_eviction_only_drops_the_memory_copy(tmp_path):
+    store = make_store(tmp_path, max_entries=2)
+    store.put('call-1', {'n': 1})
+    store.put('call-2', {'n': 2})
+    assert store.get('call-1') == {'n': 1}  # call-2 is now the least recently used
+    store.put('call-3', {'n': 3})
+    assert list(store._sessions) == ['call-1', 'call-3']
+    # Still one lookup away on disk
+    assert store.get('call-2') == {'n': 2}
+    assert len(store._sessions) == 2
+
+
+def test_purge_expired_clears_memory_and_disk(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(call_session_store.time, 'time', clock.time)
+    store = make_store(tmp_path, ttl=60)
+    store.put('old', SESSION)
+    clock.now += 30
+    store.put('new', SESSION)
+    clock.now += 30
+    assert store.purge_expired() == 1
+    assert 'old' not in store._sessions
+    assert count_rows(tmp_path) == 1
+    assert store.get('new') == SESSION
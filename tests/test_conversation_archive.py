@@ -0,0 +1,105 @@
+import json
+import os
+
+from src.conversation_archive import ConversationArchive
+
+
+def conversation(conversation_id, started_at, symbol=None, amount=None, status='completed', messages=()):
+    decision = {'preferred_investment': symbol, 'investment_amount': amount, 'status': status} if symbol else None
+    return {
+        'conversation_id': conversation_id,
+        'timestamp': started_at,
+        'initial_state': {'balance_pol': 250.0},
+        'pol_price_usd': 0.5,
+        'interactions': [{'timestamp': started_at, 'role': role, 'message': text} for role, text in messages],
+        'final_decision': decision
+    }
+
+
+def make_archive(tmp_path):
+    return ConversationArchive(str(tmp_path / 'conversations.db'))
+
+
+def write_document(path, document, mtime=None):
+    path.write_text(json.dumps(document))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_import_skips_unchanged_files_and_replays_orphan_journals(tmp_path):
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    document = log_dir / 'conversation_a.json'
+    write_document(document, conversation('a', '2026-01-05T10:00:00', 'BTC/USDT', 50), mtime=1000)
+    # A compacted document and its journal describe the same conversation; only the document is read
+    (log_dir / 'conversation_a.jsonl').write_text('not json\n')
+    # A journal left behind by a crash, with a torn last line
+    journal = [
+        {'event': 'start', 'data': conversation('b', '2026-01-06T10:00:00')},
+        {'event': 'interaction', 'data': {'timestamp': '2026-01-06T10:00:05', 'role': 'user',
+                                          'message': 'Put it into ethereum'}},
+        {'event': 'final_decision', 'data': {'preferred_investment': 'ETH/USDT', 'investment_amount': 20}}
+    ]
+    (log_dir / 'conversation_b.jsonl').write_text('\n'.join(json.dumps(entry) for entry in journal) + '\n{"event": "inter')
+    archive = make_archive(tmp_path)
+    
+    result = archive.import_directory(str(log_dir))
+    assert (result['imported'], result['skipped'], result['failed']) == (2, 0, 0)
+    assert archive.get_conversation('b')['interactions'][0]['message'] == 'Put it into ethereum'
+    
+    assert archive.import_directory(str(log_dir))['skipped'] == 2
+    
+    # A rewritten document is picked up again
+    write_document(document, conversation('a', '2026-01-05T10:00:00', 'BTC/USDT', 75), mtime=2000)
+    result = archive.import_directory(str(log_dir))
+    assert (result['imported'], result['skipped']) == (1, 1)
+    assert archive.find_conversations(symbol='BTC')[0]['investment_amount'] == 75
+
+
+def test_find_matches_symbol_pairs_and_time_bounds(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.ingest_many([
+        conversation('jan', '2026-01-10T09:00:00', 'BTC/USDT', 10),
+        conversation('feb', '2026-02-10T09:00:00', 'BTC', 20),
+        conversation('mar', '2026-03-10T09:00:00', 'BTCB/USDT', 30),
+        conversation('eth', '2026-02-11T09:00:00', 'ETH/USDT', 40)
+    ])
+    # Newest first; BTC does not match BTCB
+    assert [c['conversation_id'] for c in archive.find_conversations(symbol='BTC')] == ['feb', 'jan']
+    found = archive.find_conversations(since='2026-02-01T00:00:00', until='2026-02-11T09:00:00')
+    assert [c['conversation_id'] for c in found] == ['feb']
+    assert [c['conversation_id'] for c in archive.find_conversations(min_amount=25, max_amount=35)] == ['mar']
+
+
+def test_search_stays_in_sync_when_a_conversation_is_reingested(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.ingest(conversation('a', '2026-01-05T10:00:00', messages=[
+        ('assistant', 'Would you like to invest in bitcoin?'),
+        ('user', 'Yes, invest in bitcoin please')
+    ]))
+    assert [hit['role'] for hit in archive.search_messages('bitcoin', role='user')] == ['user']
+    assert len(archive.search_messages('invest')) == 2  # porter stemming matches both forms
+    
+    archive.ingest(conversation('a', '2026-01-05T10:00:00', messages=[('user', 'Actually, solana instead')]))
+    assert archive.search_messages('bitcoin') == []
+    hits = archive.search_messages('solana')
+    assert len(hits) == 1 and '[solana]' in hits[0]['snippet']
+    assert archive.search_messages('solana', since='2026-02-01T00:00:00') == []
+
+
+def test_decision_totals_per_symbol(tmp_path):
+    archive = make_archive(tmp_path)
+    archive.ingest_many([
+        conversation('a', '2026-01-05T10:00:00', 'BTC/USDT', 10),
+        conversation('b', '2026-01-06T10:00:00', 'BTC/USDT', 15.5),
+        conversation('c', '2026-01-07T10:00:00', 'ETH/USDT', 5),
+        conversation('d', '2026-01-08T10:00:00', 'ETH/USDT', 100, status='cancelled'),
+        conversation('e', '2026-03-01T10:00:00', 'ETH/USDT', 50)
+    ])
+    assert archive.get_decision_totals(until='2026-02-01T00:00:00') == [
+        {'symbol': 'BTC/USDT', 'decisions': 2, 'total_amount': 25.5},
+        {'symbol': 'ETH/USDT', 'decisions': 1, 'total_amount': 5.0}
+    ]
+    assert archive.get_decision_totals(status='cancelled') == [
+        {'symbol': 'ETH/USDT', 'decisions': 1, 'total_amount': 100.0}
+    ]
@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from src.conversation_logger import ConversationLogger, replay_journal
+
+
+class FakeWriter:
+    def __init__(self):
+        self.closed = []
+        
+    def write(self, path, text, block=False):
+        with open(path, 'a') as f:
+            f.write(text)
+            
+    def fsync(self, path, wait=True):
+        pass
+        
+    def close_file(self, path, wait=True):
+        self.closed.append(path)
+
+
+def test_journal_replays_to_the_document(tmp_path):
+    conversation = ConversationLogger(str(tmp_path), writer=FakeWriter())
+    conversation.log_initial_state(100.0, 0.5, 10.0)
+    conversation.log_interaction('ai', 'Hello')
+    conversation.log_investment_decision({'investment_amount': 5.0, 'preferred_investment': 'BTC'})
+    
+    replayed = replay_journal(conversation.journal_file)
+    assert replayed['initial_state']['balance_pol'] == 100.0
+    assert [item['message'] for item in replayed['interactions']] == ['Hello']
+    assert replayed['final_decision']['preferred_investment'] == 'BTC'
+
+
+def test_events_after_close_update_the_document(tmp_path):
+    conversation = ConversationLogger(str(tmp_path), writer=FakeWriter())
+    conversation.log_interaction('ai', 'Hello')
+    conversation.close()
+    assert conversation.journal_file is None
+    
+    conversation.log_interaction('user', 'One more thing')
+    with open(conversation.json_file) as f:
+        document = json.load(f)
+    assert [item['message'] for item in document['interactions']] == ['Hello', 'One more thing']
+
+
+def test_replay_without_start_event(tmp_path):
+    path = tmp_path / 'conversation_x.jsonl'
+    path.write_text(json.dumps({'event': 'interaction', 'data': {'message': 'orphan'}}) + '\n')
+    with pytest.raises(ValueError):
+        replay_journal(path)
+        
+    path.write_text('{"event": "sta')
+    with pytest.raises(ValueError):
+        replay_journal(path)
@@ -0,0 +1,68 @@
+import time
+
+from src.config.blockdag_config import DEFAULT_CONFIG, GWEI
+from src.fee_oracle import FeeOracle
+
+
+class FakeClient:
+    def __init__(self, prices):
+        self.prices = prices
+        self.fee_calls = 0
+        self.gas_calls = 0
+        
+    def get_recent_gas_prices(self, limit):
+        self.fee_calls += 1
+        return self.prices
+        
+    def estimate_gas(self, tx_data):
+        self.gas_calls += 1
+        return 21000
+
+
+def test_creating_an_oracle_has_no_side_effects():
+    client = FakeClient([GWEI])
+    oracle = FeeOracle(client)
+    assert client.fee_calls == 0
+    assert oracle._thread is None
+
+
+def test_first_lookup_starts_sampling_and_returns_wei():
+    client = FakeClient([i * GWEI for i in range(1, 101)])
+    oracle = FeeOracle(client, {'sample_interval': 60})
+    try:
+        price = oracle.get_gas_price('standard')
+        assert client.fee_calls == 1
+        assert isinstance(price, int)
+        assert 50 * GWEI <= price <= 51 * GWEI
+        assert oracle.get_gas_price('low') < price < oracle.get_gas_price('fast')
+        assert client.fee_calls == 1  # later lookups are served from the cache
+    finally:
+        oracle.stop()
+
+
+def test_tiers_are_capped_at_max_gas_price():
+    client = FakeClient([500 * GWEI] * 10)
+    oracle = FeeOracle(client, {'sample_interval': 60, 'max_gas_price': 100 * GWEI})
+    try:
+        assert oracle.get_gas_price('fast') == 100 * GWEI
+    finally:
+        oracle.stop()
+
+
+def test_stale_estimates_fall_back_to_default_in_wei():
+    oracle = FeeOracle(FakeClient([]), {'sample_interval': 60})
+    try:
+        assert oracle.get_gas_price() == DEFAULT_CONFIG['gas_price'] == 10 * GWEI
+    finally:
+        oracle.stop()
+
+
+def test_gas_limits_are_cached_per_asset_and_call_type():
+    client = FakeClient([GWEI])
+    oracle = FeeOracle(client, {'gas_limit_margin': 1.5})
+    assert oracle.get_gas_limit('BDAG', 'transfer', {}) == 31500
+    assert oracle.get_gas_limit('BDAG', 'transfer', {}) == 31500
+    assert client.gas_calls == 1
+    oracle.invalidate_gas_estimate('BDAG', 'transfer')
+    oracle.get_gas_limit('BDAG', 'transfer', {})
+    assert client.gas_calls == 2
@@ -0,0 +1,151 @@
+import threading
+import time
+
+from src import job_queue
+from src.job_queue import JobQueue, JobWorkerPool
+
+
+def make_queue(tmp_path, **kwargs):
+    return JobQueue(str(tmp_path / 'jobs.db'), **kwargs)
+
+
+def test_claim_complete_round_trip(tmp_path):
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue('kind', {'x': 1})
+    job = queue.claim()
+    assert job['id'] == job_id and job['payload'] == {'x': 1} and job['attempts'] == 1
+    assert queue.claim() is None
+    assert queue.complete(job_id, job['token'], {'total': 0.1})
+    assert queue.get_job(job_id)['status'] == 'done'
+
+
+def test_failures_back_off_then_die(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2, retry_backoff=0)
+    job_id = queue.enqueue('kind', {})
+    job = queue.claim()
+    assert queue.fail(job_id, job['token'], job['attempts'], 'boom') == 'pending'
+    job = queue.claim()
+    assert queue.fail(job_id, job['token'], job['attempts'], 'boom') == 'dead'
+    assert queue.get_job(job_id)['last_error'] == 'boom'
+
+
+def test_stale_claim_cannot_finish_a_reclaimed_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0)
+    job_id = queue.enqueue('kind', {})
+    stale = queue.claim()
+    fresh = queue.claim()  # the lease expired at once, so another worker takes it over
+    assert fresh['id'] == job_id and fresh['attempts'] == 2
+    
+    assert not queue.complete(job_id, stale['token'])
+    assert queue.fail(job_id, stale['token'], stale['attempts'], 'late') is None
+    assert not queue.extend_lease(job_id, stale['token'])
+    assert queue.get_job(job_id)['status'] == 'running'
+    assert queue.complete(job_id, fresh['token'])
+
+
+def test_extend_lease_keeps_the_job_from_being_reclaimed(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=60)
+    job_id = queue.enqueue('kind', {})
+    job = queue.claim()
+    assert queue.extend_lease(job_id, job['token'])
+    assert queue.claim() is None
+
+
+def test_duplicate_dedup_key_returns_the_existing_job(tmp_path):
+    queue = make_queue(tmp_path)
+    first = queue.enqueue('kind', {}, dedup_key='call-1:completed')
+    assert queue.enqueue('kind', {}, dedup_key='call-1:completed') == first
+
+
+def test_worker_renews_the_lease_of_a_long_job(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.3)
+    started = threading.Event()
+    runs = []
+    
+    def handler(payload, timer):
+        runs.append(payload)
+        started.set()
+        time.sleep(1.0)  # several lease periods
+        
+    pool = JobWorkerPool(queue, {'slow': handler}, num_workers=2, poll_interval=0.05)
+    job_id = queue.enqueue('slow', {'n': 1})
+    pool.start()
+    try:
+        assert started.wait(2)
+        time.sleep(1.5)
+        assert runs == [{'n': 1}]
+        assert queue.get_job(job_id)['status'] == 'done'
+    finally:
+        pool.stop()
+
+
+def test_enqueue_once_reports_duplicates_across_queues(tmp_path):
+    # Two queues on one database stand in for two gunicorn workers
+    first, second = make_queue(tmp_path), make_queue(tmp_path)
+    job_id, duplicate = first.enqueue_once('kind', {}, dedup_key='call-1:completed')
+    assert not duplicate
+    assert second.enqueue_once('kind', {}, dedup_key='call-1:completed') == (job_id, True)
+
+
+def test_jobs_without_a_dedup_key_are_never_duplicates(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.enqueue_once('kind', {})[0] != queue.enqueue_once('kind', {})[0]
+
+
+def test_dead_job_is_revived_by_a_new_delivery(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1)
+    job_id = queue.enqueue('kind', {'v': 1}, dedup_key='call-1:completed')
+    job = queue.claim()
+    assert queue.fail(job_id, job['token'], job['attempts'], 'boom') == 'dead'
+    
+    assert queue.enqueue_once('kind', {'v': 2}, dedup_key='call-1:completed') == (job_id, False)
+    job = queue.claim()
+    assert job['id'] == job_id and job['payload'] == {'v': 2} and job['attempts'] == 1
+
+
+def test_expired_lease_on_the_last_attempt_is_marked_dead(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=2, lease_seconds=0)
+    job_id = queue.enqueue('kind', {})
+    queue.claim()
+    assert queue.claim()['attempts'] == 2  # the first lease expired, one attempt left
+    
+    # The second worker crashed too: no third run, the job is dead
+    assert queue.claim() is None
+    job = queue.get_job(job_id)
+    assert job['status'] == 'dead' and job['attempts'] == 2
+    assert 'Lease expired' in job['last_error']
+
+
+def test_purge_removes_only_old_finished_jobs(tmp_path):
+    queue = make_queue(tmp_path, max_attempts=1)
+    done_id = queue.enqueue('kind', {})
+    job = queue.claim()
+    queue.complete(done_id, job['token'])
+    dead_id = queue.enqueue('kind', {})
+    job = queue.claim()
+    queue.fail(dead_id, job['token'], job['attempts'], 'boom')
+    pending_id = queue.enqueue('kind', {})
+    
+    assert queue.purge(older_than=3600) == 0
+    assert queue.purge(older_than=-1) == 2
+    assert queue.get_job(done_id) is None and queue.get_job(dead_id) is None
+    assert queue.get_job(pending_id)['status'] == 'pending'
+
+
+def test_dedup_key_holds_until_the_job_is_purged(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(job_queue.time, 'time', lambda: now[0])
+    queue = make_queue(tmp_path)
+    job_id = queue.enqueue('kind', {}, dedup_key='call-1:completed')
+    queue.complete(job_id, queue.claim()['token'])
+    
+    # A redelivery inside the window is still recognised after a purge
+    now[0] += 3000
+    assert queue.purge(older_than=3600) == 0
+    assert queue.enqueue_once('kind', {}, dedup_key='call-1:completed') == (job_id, True)
+    
+    # Past the window the row is gone and the key is free
+    now[0] += 1000
+    assert queue.purge(older_than=3600) == 1
+    new_id, duplicate = queue.enqueue_once('kind', {}, dedup_key='call-1:completed')
+    assert new_id != job_id and not duplicate
@@ -0,0 +1,87 @@
+import time
+
+from src import leader_election
+from src.leader_election import LeaderLease
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        
+    def time(self):
+        return self.now
+
+
+def make_lease(tmp_path, **kwargs):
+    return LeaderLease(str(tmp_path / 'leader.db'), ttl=30, **kwargs)
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll until condition() holds or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_only_one_process_acquires_the_lease(tmp_path):
+    first, second = make_lease(tmp_path), make_lease(tmp_path)
+    assert first.try_acquire()
+    assert not second.try_acquire()
+
+
+def test_renewal_keeps_the_lease(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(leader_election.time, 'time', clock.time)
+    leader, follower = make_lease(tmp_path), make_lease(tmp_path)
+    assert leader.try_acquire()
+    clock.now += 20
+    assert leader.try_acquire()
+    clock.now += 20  # past the first expiry, but within the renewed one
+    assert not follower.try_acquire()
+
+
+def test_expired_lease_is_taken_over(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(leader_election.time, 'time', clock.time)
+    leader, follower = make_lease(tmp_path), make_lease(tmp_path)
+    assert leader.try_acquire()
+    clock.now += 30
+    assert follower.try_acquire()
+    assert not leader.try_acquire()
+
+
+def test_released_lease_is_free_at_once(tmp_path):
+    leader, follower = make_lease(tmp_path), make_lease(tmp_path)
+    assert leader.try_acquire()
+    leader.release()
+    assert follower.try_acquire()
+
+
+def test_failed_duties_give_the_lease_up_and_retry(tmp_path):
+    elected = []
+    revoked = []
+    
+    def on_elected():
+        elected.append(True)
+        if len(elected) == 1:
+            raise RuntimeError("scheduler failed to start")
+            
+    lease = LeaderLease(str(tmp_path / 'leader.db'), ttl=30, renew_interval=0.01,
+                        on_elected=on_elected, on_revoked=lambda: revoked.append(True))
+    lease._set_leader(True)
+    # Not left leading (and renewing) with nothing running, and free for anyone to take
+    assert not lease.is_leader
+    assert revoked == [True]
+    other = make_lease(tmp_path)
+    assert other.try_acquire()
+    other.release()
+    
+    lease.start()
+    try:
+        assert wait_for(lambda: lease.is_leader)
+        assert len(elected) == 2
+    finally:
+        lease.stop()
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.llm_gateway import LLMGateway
+
+
+class Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class SlowModel:
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+        
+    def generate_content(self, prompt, **kwargs):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return Response(prompt)
+
+
+class FlakyModel:
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+        
+    def generate_content(self, prompt, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("transient")
+        return Response('ok')
+
+
+def test_generate_returns_model_text():
+    gateway = LLMGateway(SlowModel(0), max_concurrency=2)
+    try:
+        assert gateway.generate('hello') == 'hello'
+    finally:
+        gateway.close()
+
+
+def test_transient_errors_are_retried():
+    model = FlakyModel(failures=2)
+    gateway = LLMGateway(model, max_retries=2, backoff_base=0.001)
+    try:
+        assert gateway.generate('x') == 'ok'
+        assert gateway.retries == 2
+    finally:
+        gateway.close()
+
+
+def test_timed_out_calls_still_hold_their_slot():
+    model = SlowModel(0.3)
+    gateway = LLMGateway(model, max_concurrency=2, timeout=0.05, max_retries=0)
+    try:
+        async def burst():
+            return await asyncio.gather(
+                *(gateway.agenerate(str(i), timeout=0.05) for i in range(6)), return_exceptions=True
+            )
+        results = asyncio.run_coroutine_threadsafe(burst(), gateway._loop).result()
+        assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+        # The abandoned calls are still sleeping; new work must wait for them
+        with pytest.raises(asyncio.TimeoutError):
+            gateway.generate('late', timeout=0.05)
+        time.sleep(0.7)
+        assert model.peak <= 2
+    finally:
+        gateway.close()
+
+
+class StreamingModel:
+    def __init__(self, words, delay=0.0, failures=0):
+        self.words = words
+        self.delay = delay
+        self.failures = failures
+        self.calls = 0
+        self.closed = threading.Event()
+        self.sent = 0
+        
+    def generate_content(self, prompt, stream=False, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("transient")
+        return self._chunks()
+        
+    def _chunks(self):
+        try:
+            for word in self.words:
+                time.sleep(self.delay)
+                self.sent += 1
+                yield Response(word)
+        finally:
+            self.closed.set()
+
+
+def test_stream_yields_sentences_and_records_timings():
+    model = StreamingModel(['First sentence is here. ', 'Second one ', 'follows it.'])
+    gateway = LLMGateway(model)
+    try:
+        stream = gateway.stream('x', name='test_stream')
+        segments = list(stream)
+        assert segments == ['First sentence is here. Second one follows it.']
+        assert stream.text == 'First sentence is here. Second one follows it.'
+        metrics = stream.get_metrics()
+        assert metrics['outcome'] == 'completed'
+        assert 0 <= metrics['time_to_first_token'] <= metrics['total_time']
+    finally:
+        gateway.close()
+
+
+def test_stream_retries_before_the_first_chunk():
+    model = StreamingModel(['ok.'], failures=1)
+    gateway = LLMGateway(model, max_retries=2, backoff_base=0.001)
+    try:
+        assert list(gateway.stream('x')) == ['ok.']
+        assert model.calls == 2
+    finally:
+        gateway.close()
+
+
+def test_stream_waits_for_a_slot_within_its_deadline():
+    gateway = LLMGateway(SlowModel(0.5), max_concurrency=1)
+    try:
+        busy = threading.Thread(target=gateway.generate, args=('busy',))
+        busy.start()
+        time.sleep(0.05)
+        stream = gateway.stream('x', timeout=0.1)
+        with pytest.raises(TimeoutError):
+            list(stream)
+        assert stream.outcome == 'timeout'
+        busy.join()
+    finally:
+        gateway.close()
+
+
+def test_cancelled_stream_closes_upstream_and_frees_its_slot():
+    model = StreamingModel(['Word. '] * 100, delay=0.02)
+    gateway = LLMGateway(model, max_concurrency=1)
+    try:
+        stream = gateway.stream('x')
+        iterator = iter(stream)
+        next(iterator)
+        # The caller hung up
+        stream.cancel()
+        assert list(iterator) == []
+        assert stream.outcome == 'cancelled'
+        assert model.closed.wait(1)
+        assert model.sent < 100
+        # The single slot is free again
+        model.generate_content = lambda prompt, **kwargs: Response(prompt)
+        assert gateway.generate('next', timeout=1) == 'next'
+    finally:
+        gateway.close()
@@ -0,0 +1,52 @@
+import time
+
+import pytest
+
+from src.llm_streaming import SentenceStream, StreamFeed
+
+
+def test_segments_split_at_sentence_ends():
+    chunks = ['This is the first full sentence here. And', ' this is the second sentence, also long. Tail']
+    stream = SentenceStream(iter(chunks), min_segment_chars=20)
+    assert list(stream) == [
+        'This is the first full sentence here.',
+        'And this is the second sentence, also long.',
+        'Tail'
+    ]
+    assert stream.segments == 3
+    assert stream.outcome == 'completed'
+
+
+def test_stopping_early_closes_the_source():
+    closed = []
+    
+    def chunks():
+        try:
+            while True:
+                yield 'A sentence that is long enough to emit. '
+        finally:
+            closed.append(True)
+            
+    stream = SentenceStream(chunks(), min_segment_chars=10)
+    iterator = iter(stream)
+    next(iterator)
+    iterator.close()
+    assert closed == [True]
+    assert stream.outcome == 'cancelled'
+
+
+def test_feed_raises_past_its_deadline_and_cancels():
+    feed = StreamFeed(time.monotonic() + 0.05)
+    feed.put('partial')
+    iterator = iter(feed)
+    assert next(iterator) == 'partial'
+    with pytest.raises(TimeoutError):
+        next(iterator)
+    assert feed.cancelled.is_set()
+
+
+def test_feed_passes_producer_errors_to_the_consumer():
+    feed = StreamFeed(time.monotonic() + 1)
+    feed.fail(ValueError('bad request'))
+    with pytest.raises(ValueError):
+        list(SentenceStream(feed))
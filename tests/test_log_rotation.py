@@ -0,0 +1,81 @@
+import json
+import os
+from datetime import datetime
+
+from src.log_rotation import LogRotator
+
+
+def write_conversation(log_dir, conversation_id, message='Hello'):
+    started = datetime.strptime(conversation_id, '%Y%m%d_%H%M%S')
+    conversation = {
+        'conversation_id': conversation_id,
+        'timestamp': started.isoformat(),
+        'interactions': [{'role': 'ai', 'message': message}]
+    }
+    path = log_dir / f"conversation_{conversation_id}.json"
+    path.write_text(json.dumps(conversation))
+    (log_dir / f"conversation_{conversation_id}.log").write_text(f"AI: {message}\n")
+    return path
+
+
+def make_rotator(tmp_path):
+    log_dir = tmp_path / 'logs'
+    log_dir.mkdir()
+    return LogRotator(log_dir, tmp_path / 'archive', min_age=0, retention_days=0)
+
+
+def test_rotate_and_read_back(tmp_path):
+    rotator = make_rotator(tmp_path)
+    write_conversation(rotator.log_dir, '20260915_101500', 'first')
+    write_conversation(rotator.log_dir, '20260915_102000', 'second')
+    assert rotator.rotate() == 2
+    assert not list(rotator.log_dir.iterdir())
+    
+    record = rotator.read('20260915_102000')
+    assert record['conversation']['interactions'][0]['message'] == 'second'
+    assert record['log'] == 'AI: second\n'
+    assert rotator.read('20260915_103000') is None
+
+
+def test_bad_index_line_does_not_hide_later_entries(tmp_path):
+    rotator = make_rotator(tmp_path)
+    write_conversation(rotator.log_dir, '20260915_101500')
+    rotator.rotate()
+    segment = rotator.list_segments()[0]
+    index_path = rotator.index_path(segment)
+    index_path.write_text('garbage\n' + index_path.read_text())
+    assert '20260915_101500' in rotator.load_index(segment)
+
+
+def test_append_after_torn_index_line(tmp_path):
+    rotator = make_rotator(tmp_path)
+    write_conversation(rotator.log_dir, '20260915_101500', 'first')
+    rotator.rotate()
+    segment = rotator.list_segments()[0]
+    with open(rotator.index_path(segment), 'a') as f:
+        f.write('{"conversation_id": "20260915_1')
+        
+    write_conversation(rotator.log_dir, '20260915_102000', 'second')
+    rotator.rotate()
+    assert rotator.read('20260915_101500')['conversation']['interactions'][0]['message'] == 'first'
+    assert rotator.read('20260915_102000')['conversation']['interactions'][0]['message'] == 'second'
+
+
+def test_unindexed_tail_is_truncated_before_appending(tmp_path):
+    rotator = make_rotator(tmp_path)
+    write_conversation(rotator.log_dir, '20260915_101500', 'first')
+    rotator.rotate()
+    segment = rotator.list_segments()[0]
+    indexed_size = segment.stat().st_size
+    # A crash after writing data but before indexing it leaves the source files in place
+    with open(segment, 'ab') as f:
+        f.write(b'partial member')
+        
+    write_conversation(rotator.log_dir, '20260915_102000', 'second')
+    rotator.rotate()
+    offset, length = rotator.load_index(segment)['20260915_102000']
+    assert offset == indexed_size
+    assert segment.stat().st_size == offset + length
+    assert [record['conversation']['conversation_id'] for record in rotator.iter_segment(segment)] == [
+        '20260915_101500', '20260915_102000'
+    ]
@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from src.log_writer import LogWriter
+
+
+class StalledWriter(LogWriter):
+    def __init__(self, run_loop=True, **kwargs):
+        """A writer whose thread does not drain the queue until released"""
+        self.release = threading.Event()
+        self.run_loop = run_loop
+        super().__init__(**kwargs)
+        
+    def _write_loop(self):
+        self.release.wait()
+        if self.run_loop:
+            super()._write_loop()
+
+
+def test_writes_reach_the_file(tmp_path):
+    path = str(tmp_path / 'a.log')
+    writer = LogWriter(flush_interval=0.01)
+    writer.write(path, 'one\n')
+    writer.write(path, 'two\n', block=True)
+    control = writer.close_file(path)
+    assert control.done.is_set() and control.error is None
+    assert open(path).read() == 'one\ntwo\n'
+
+
+def test_full_queue_drops_plain_writes_but_blocks_journal_writes(tmp_path):
+    path = str(tmp_path / 'a.log')
+    writer = StalledWriter(max_queue=1, put_timeout=0.01, flush_interval=0.01)
+    writer.write(path, 'one\n')
+    writer.write(path, 'dropped\n')
+    assert writer.dropped == 1
+    
+    blocked = threading.Thread(target=writer.write, args=(path, 'two\n'), kwargs={'block': True})
+    blocked.start()
+    blocked.join(0.1)
+    assert blocked.is_alive()
+    
+    writer.release.set()
+    blocked.join(2)
+    assert not blocked.is_alive()
+    writer.close_file(path)
+    assert open(path).read() == 'one\ntwo\n'
+
+
+def test_blocking_write_raises_when_the_thread_is_gone(tmp_path):
+    writer = StalledWriter(run_loop=False, max_queue=1, put_timeout=0.01)
+    writer.release.set()
+    writer._thread.join(1)
+    writer.write(str(tmp_path / 'a.log'), 'one\n')
+    with pytest.raises(RuntimeError):
+        writer.write(str(tmp_path / 'a.log'), 'two\n', block=True)
+
+
+def test_control_wait_is_bounded():
+    writer = StalledWriter(control_timeout=0.05)
+    control = writer.flush()
+    assert not control.done.is_set()
+    assert control.error == 'timed out'
+    writer.release.set()
+
+
+def test_loop_failure_signals_waiters(tmp_path):
+    writer = LogWriter(flush_interval=0.01)
+    
+    def fail(pending):
+        raise OSError('disk gone')
+        
+    writer._write_pending = fail
+    control = writer.fsync(str(tmp_path / 'a.log'))
+    assert control.done.is_set()
+    assert control.error == 'disk gone'
+    assert writer._thread.is_alive()
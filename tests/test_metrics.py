@@ -0,0 +1,48 @@
+import os
+
+from src.metrics import MetricsRegistry, _Metric, Counter, Gauge, Histogram
+
+
+def test_every_metric_type_creates_its_own_children():
+    for cls in (Counter, Gauge, Histogram):
+        assert issubclass(cls, _Metric)
+        metric = cls('m', 'doc', ['a'])
+        assert metric.labels('x') is metric.labels(a='x')
+
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    registry.counter('calls_total', 'Calls', ['service']).labels('bland').inc(2)
+    registry.gauge('queue', 'Queue depth').set_function(lambda: 3)
+    histogram = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    histogram.observe(0.5)
+    
+    text = registry.render()
+    
+    assert 'calls_total{service="bland"} 2' in text
+    assert 'queue 3' in text
+    assert 'latency_seconds_bucket{le="0.1"} 0' in text
+    assert 'latency_seconds_bucket{le="1"} 1' in text
+    assert 'latency_seconds_bucket{le="+Inf"} 1' in text
+    assert 'latency_seconds_count 1' in text
+
+
+def test_multiprocess_render_includes_every_live_worker(tmp_path):
+    other = MetricsRegistry()
+    other.multiprocess_dir = tmp_path
+    other.counter('calls_total', 'Calls').inc(5)
+    other.write_snapshot()
+    # Pretend that snapshot came from the parent process, which is alive
+    os.replace(tmp_path / f"metrics-{os.getpid()}.json", tmp_path / f"metrics-{os.getppid()}.json")
+    # and leave one behind from a process that has exited
+    (tmp_path / 'metrics-999999999.json').write_text('[]')
+    
+    registry = MetricsRegistry()
+    registry.counter('calls_total', 'Calls').inc(2)
+    registry.enable_multiprocess(tmp_path, interval=60)
+    text = registry.render()
+    
+    assert f'calls_total{{worker="{os.getpid()}"}} 2' in text
+    assert f'calls_total{{worker="{os.getppid()}"}} 5' in text
+    assert text.count('# TYPE calls_total counter') == 1
+    assert not (tmp_path / 'metrics-999999999.json').exists()
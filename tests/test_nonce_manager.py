@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from src.nonce_manager import NonceManager, get_nonce_manager
+
+
+class FakeChain:
+    def __init__(self, count=0):
+        self.count = count
+        
+    def get_transaction_count(self, sender):
+        return self.count
+
+
+def test_concurrent_batches_get_distinct_nonces():
+    manager = NonceManager(FakeChain(5).get_transaction_count)
+    nonces = []
+    lock = threading.Lock()
+    
+    def send(size):
+        with manager.allocate('0xAbc', size) as first:
+            with lock:
+                nonces.extend(range(first, first + size))
+                
+    threads = [threading.Thread(target=send, args=(size,)) for size in (1, 2, 3, 4) * 5]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(nonces) == list(range(5, 5 + 50))
+
+
+def test_senders_are_case_insensitive_and_independent():
+    manager = NonceManager(FakeChain(0).get_transaction_count)
+    with manager.allocate('0xAbc', 2) as first:
+        assert first == 0
+    with manager.allocate('0xabc') as first:
+        assert first == 2
+    with manager.allocate('0xDef') as first:
+        assert first == 0
+
+
+def test_chain_ahead_of_local_reservations_wins():
+    chain = FakeChain(0)
+    manager = NonceManager(chain.get_transaction_count)
+    with manager.allocate('0xabc', 2):
+        pass
+    chain.count = 10
+    with manager.allocate('0xabc') as first:
+        assert first == 10
+
+
+def test_failed_broadcast_falls_back_to_the_chain():
+    chain = FakeChain(3)
+    manager = NonceManager(chain.get_transaction_count)
+    with pytest.raises(ConnectionError):
+        with manager.allocate('0xabc', 4):
+            raise ConnectionError('broadcast failed')
+    with manager.allocate('0xabc') as first:
+        assert first == 3
+
+
+def test_one_manager_per_chain():
+    chain = FakeChain()
+    assert get_nonce_manager(9001, chain.get_transaction_count) is get_nonce_manager(9001, chain.get_transaction_count)
+    assert get_nonce_manager(9001, chain.get_transaction_count) is not get_nonce_manager(9002, chain.get_transaction_count)
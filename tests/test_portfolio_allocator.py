@@ -0,0 +1,61 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from src.portfolio_allocator import PortfolioAllocator, project_capped_simplex, project_feasible
+
+
+def brute_force_projection(v, upper, total):
+    """Reference projection by bisection on the shift"""
+    low, high = v.min() - upper - 1, v.max() + 1
+    for _ in range(200):
+        shift = (low + high) / 2
+        if np.clip(v - shift, 0, upper).sum() > total:
+            low = shift
+        else:
+            high = shift
+    return np.clip(v - (low + high) / 2, 0, upper)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_capped_simplex_matches_bisection(seed):
+    v = np.random.default_rng(seed).normal(size=12)
+    w = project_capped_simplex(v, 0.2, 1.0)
+    assert w.sum() == pytest.approx(1.0)
+    assert w.min() >= 0 and w.max() <= 0.2 + 1e-12
+    assert w == pytest.approx(brute_force_projection(v, 0.2, 1.0), abs=1e-9)
+
+
+def test_capped_simplex_edges():
+    assert list(project_capped_simplex(np.array([0.3, 0.7]), 1.0, 0.0)) == [0.0, 0.0]
+    # Already feasible points are left alone
+    assert project_capped_simplex(np.array([0.5, 0.3, 0.2]), 0.6, 1.0) == pytest.approx([0.5, 0.3, 0.2])
+    # Ties and a binding cap
+    assert project_capped_simplex(np.array([1.0, 1.0, 0.0]), 0.4, 1.0) == pytest.approx([0.4, 0.4, 0.2])
+
+
+def test_feasible_projection_caps_memecoins_in_total():
+    v = np.array([0.1, 0.1, 0.5, 0.5])
+    mask = np.array([False, False, True, True])
+    w = project_feasible(v, 0.6, mask, 0.1)
+    assert w.sum() == pytest.approx(1.0)
+    assert w[mask].sum() == pytest.approx(0.1)
+    assert w.max() <= 0.6 + 1e-12
+
+
+def test_memecoin_cap_is_only_an_upper_bound():
+    v = np.array([0.6, 0.4, -1.0])
+    mask = np.array([False, False, True])
+    w = project_feasible(v, 1.0, mask, 0.1)
+    assert w[mask].sum() == 0.0
+    assert w == pytest.approx(project_capped_simplex(v, 1.0, 1.0))
+
+
+@pytest.mark.parametrize('method', ['risk_parity', 'mean_variance'])
+def test_allocate_respects_the_caps(method):
+    rng = np.random.default_rng(3)
+    closes = {symbol: 100 * np.exp(np.cumsum(rng.normal(0, 0.02 * (i + 1), 60))) for i, symbol in enumerate('ABCDE')}
+    weights = PortfolioAllocator(method=method, max_weight=0.4, memecoin_cap=0.1).allocate(closes, memecoins={'E'})
+    assert sum(weights.values()) == pytest.approx(1.0)
+    assert max(weights.values()) <= 0.4 + 1e-9
+    assert weights['E'] <= 0.1 + 1e-9
@@ -0,0 +1,35 @@
+from src.prompt_builder import confirmation_cache_key, price_bucket
+
+ANALYSIS = {
+    'current_price': 64123.45, 'trend': 'bullish', 'rsi': 55.2, 'volatility': 0.0312,
+    'risk_level': 'Medium', 'volume_trend': 'increasing'
+}
+
+
+def test_price_bucket_keeps_three_significant_digits():
+    assert price_bucket(64123.45) == 64100.0
+    assert price_bucket(0.0012345) == 0.00123
+    assert price_bucket(None) is None
+    assert price_bucket(float('nan')) is None
+
+
+def test_confirmation_key_changes_when_the_price_moves():
+    moved = {**ANALYSIS, 'current_price': 58000.0}
+    assert confirmation_cache_key('BTC', 100, ANALYSIS) != confirmation_cache_key('BTC', 100, moved)
+
+
+def test_confirmation_key_ignores_noise_below_the_bucket():
+    nudged = {**ANALYSIS, 'current_price': 64140.0, 'rsi': 55.24, 'volatility': 0.03121}
+    assert confirmation_cache_key('BTC', 100, ANALYSIS) == confirmation_cache_key('BTC', 100, nudged)
+
+
+def test_confirmation_key_covers_every_field_the_prompt_sends():
+    key = confirmation_cache_key('BTC', 100, ANALYSIS)
+    assert key != confirmation_cache_key('BTC', 100, {**ANALYSIS, 'rsi': 71.0})
+    assert key != confirmation_cache_key('BTC', 100, {**ANALYSIS, 'volatility': 0.08})
+    # Not part of the confirmation prompt, so it must not split the cache
+    assert key == confirmation_cache_key('BTC', 100, {**ANALYSIS, 'volume_trend': 'decreasing'})
+
+
+def test_no_key_without_analysis():
+    assert confirmation_cache_key('BTC', 100, None) is None
@@ -0,0 +1,79 @@
+from src import response_cache
+from src.response_cache import CachedModel, ResponseCache, prompt_key
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+        
+    def time(self):
+        return self.now
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    def __init__(self):
+        self.calls = 0
+        
+    def generate_content(self, prompt):
+        self.calls += 1
+        return FakeResponse(f"answer {self.calls}")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.set('a', 'A')
+    cache.set('b', 'B')
+    assert cache.get('a') == 'A'  # b is now the least recently used
+    cache.set('c', 'C')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'A'
+    assert cache.get('c') == 'C'
+    assert cache.get_stats()['entries'] == 2
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    cache = ResponseCache(ttl=60)
+    cache.set('a', 'A')
+    clock.now += 59
+    assert cache.get('a') == 'A'
+    clock.now += 2
+    assert cache.get('a') is None
+    assert cache.get_stats() == {'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 0}
+
+
+def test_sqlite_backing_survives_a_restart(tmp_path):
+    db_path = str(tmp_path / 'cache.db')
+    ResponseCache(db_path=db_path).set('a', 'A')
+    # A fresh instance has nothing in memory and reads through to SQLite
+    restarted = ResponseCache(db_path=db_path)
+    assert restarted.get_stats()['entries'] == 0
+    assert restarted.get('a') == 'A'
+    assert restarted.get_stats()['entries'] == 1
+
+
+def test_sqlite_drops_expired_rows(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, 'time', clock.time)
+    db_path = str(tmp_path / 'cache.db')
+    ResponseCache(ttl=60, db_path=db_path).set('a', 'A')
+    clock.now += 120
+    restarted = ResponseCache(ttl=60, db_path=db_path)
+    assert restarted._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] == 0
+    assert restarted.get('a') is None
+
+
+def test_cached_model_calls_the_model_once_per_key():
+    model = FakeModel()
+    cached = CachedModel(model, ResponseCache())
+    assert cached.generate_content('Hello  world').text == 'answer 1'
+    assert cached.generate_content('Hello world').text == 'answer 1'
+    assert cached.generate_content('Hello world', cache_key='other').text == 'answer 2'
+    assert model.calls == 2
+    assert prompt_key('a\n  b') == prompt_key('a b')
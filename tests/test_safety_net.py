@@ -0,0 +1,62 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from src.safety_net import SafetyNetEstimator, resolve_safety_net, simulate_reserves, wallet_seed
+
+
+class FakeWallet:
+    def __init__(self, wallet_id, history):
+        self.wallet_id = wallet_id
+        self.history = history
+        
+    def get_transaction_history(self, days):
+        return self.history
+
+
+def test_floor_applies_when_income_offsets_spending():
+    # One month of average spending is kept even when the simulation needs nothing
+    assert resolve_safety_net(0.0, 100.0, min_months=1) == 100.0
+    assert resolve_safety_net(250.0, 100.0, min_months=1) == 250.0
+    assert resolve_safety_net(None, 100.0, min_months=1) == 300.0
+
+
+def test_constant_spending_needs_the_whole_horizon():
+    reserves = simulate_reserves(np.full((1, 30), 2.0), [30], horizon_days=10, n_paths=50,
+                                 rng=np.random.default_rng(0))
+    assert reserves[0] == pytest.approx(20.0)
+
+
+def test_wallet_without_history_has_no_estimate():
+    reserves = simulate_reserves(np.zeros((2, 30)), [0, 30], horizon_days=10, n_paths=50,
+                                 rng=np.random.default_rng(0))
+    assert np.isnan(reserves[0])
+    assert reserves[1] == 0.0
+
+
+def test_seeded_wallet_gets_the_same_estimate_alone_or_in_a_batch():
+    rng = np.random.default_rng(1)
+    histories = rng.normal(1.0, 5.0, size=(3, 60))
+    lengths = [60, 45, 30]
+    seeds = [wallet_seed(7, FakeWallet(wallet_id, None)) for wallet_id in ('a', 'b', 'c')]
+    batch = simulate_reserves(histories, lengths, horizon_days=20, n_paths=200, seeds=seeds)
+    alone = simulate_reserves(histories[1:2], lengths[1:2], horizon_days=20, n_paths=200, seeds=seeds[1:2])
+    assert alone[0] == batch[1]
+    # Small chunks take the same draws too
+    chunked = simulate_reserves(histories, lengths, horizon_days=20, n_paths=200, seeds=seeds, max_elements=1)
+    assert list(chunked) == list(batch)
+
+
+def test_estimator_with_a_seed_repeats():
+    pd = pytest.importorskip('pandas')
+    now = pd.Timestamp.now()
+    history = pd.DataFrame({
+        'timestamp': [now - pd.Timedelta(days=day) for day in range(20)],
+        'value': [float(day % 7) for day in range(20)],
+        'is_incoming': [day % 5 == 0 for day in range(20)]
+    })
+    estimator = SafetyNetEstimator(horizon_days=30, n_paths=300, seed=3)
+    wallets = [FakeWallet('a', history), FakeWallet('b', history.iloc[:10])]
+    batch = estimator.estimate_many(wallets)
+    assert estimator.estimate(wallets[0]) == batch[0]
+    assert SafetyNetEstimator(horizon_days=30, n_paths=300, seed=3).estimate(wallets[1]) == batch[1]
@@ -0,0 +1,52 @@
+from src.script_templates import CallScriptCache, CallScriptTemplate
+
+
+def make_suggestions(btc_price=64000.0):
+    """A fresh list each call, as every market data fetch returns"""
+    return [
+        {'symbol': 'BTC/USDT', 'price': btc_price, 'price_in_pol': btc_price / 0.5, 'risk_level': 'medium',
+         'daily_return': 0.012, 'risk_warning': None, 'is_memecoin': False, 'allocation_pol': 10.0},
+        {'symbol': 'ETH/USDT', 'price': 3100.0, 'price_in_pol': 6200.0, 'risk_level': 'high',
+         'daily_return': -0.004, 'risk_warning': None, 'is_memecoin': False, 'allocation_pol': 5.0},
+        {'symbol': 'DOGE/USDT', 'price': 0.12, 'price_in_pol': 0.24, 'risk_level': 'extreme',
+         'daily_return': 0.05, 'risk_warning': 'Only invest what you can afford to lose.', 'is_memecoin': True,
+         'allocation_pol': 0.5}
+    ]
+
+
+def test_cache_hits_on_equal_content_from_a_new_list():
+    cache = CallScriptCache()
+    first = cache.get(make_suggestions())
+    assert cache.get(make_suggestions()) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_cache_ignores_fields_the_script_does_not_render():
+    cache = CallScriptCache()
+    first = cache.get(make_suggestions())
+    other_user = [dict(s, allocation_pol=s['allocation_pol'] * 3) for s in make_suggestions()]
+    assert cache.get(other_user) is first
+
+
+def test_cache_recompiles_when_a_price_moves():
+    cache = CallScriptCache()
+    first = cache.get(make_suggestions())
+    moved = cache.get(make_suggestions(btc_price=58000.0))
+    assert moved is not first
+    assert '58000.00' in moved.render(100)
+    assert cache.misses == 2
+
+
+def test_render_fills_in_the_per_user_fields():
+    script = CallScriptTemplate(make_suggestions()).render(123.456, matic_equivalent=200)
+    assert '123.46 POL in unused funds' in script
+    assert 'approximately 200.00 MATIC' in script
+    assert 'I recommend BTC/USDT' in script
+    assert 'DOGE/USDT' in script and 'Only invest what you can afford to lose.' in script
+    assert '\x00' not in script
+
+
+def test_render_many_matches_render_per_user():
+    template = CallScriptTemplate(make_suggestions())
+    users = [{'unused_funds': 50}, {'unused_funds': 75.5, 'matic_equivalent': 120}]
+    assert template.render_many(users) == [template.render(50), template.render(75.5, 120)]
@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip('eth_account')
+
+from eth_account import Account
+
+from src import signing_service
+from src.signing_service import _key_address, _raw_transaction, _sign_chunk
+
+KEY = '0x' + '11' * 32
+
+
+class NewSignedTx:
+    raw_transaction = b'\x01\x02'
+
+
+class OldSignedTx:
+    rawTransaction = b'\x03\x04'
+
+
+def test_raw_transaction_supports_both_eth_account_names():
+    assert _raw_transaction(NewSignedTx()) == b'\x01\x02'
+    assert _raw_transaction(OldSignedTx()) == b'\x03\x04'
+
+
+def test_signed_transactions_come_from_the_key_address(monkeypatch):
+    monkeypatch.setitem(signing_service._worker_keys, 'blockdag', KEY)
+    tx = {'to': '0x' + '22' * 20, 'value': 1, 'gas': 21000, 'gasPrice': 10 ** 9, 'nonce': 7, 'chainId': 1}
+    
+    signed = _sign_chunk('blockdag', [tx])
+    
+    sender = Account.recover_transaction(signed[0]['raw_transaction'])
+    assert sender == _key_address('blockdag') == Account.from_key(KEY).address
+    assert signed[0]['nonce'] == 7
+
+
+def test_missing_key_is_an_error():
+    with pytest.raises(ValueError):
+        _key_address('no-such-key')
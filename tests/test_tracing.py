@@ -0,0 +1,39 @@
+import pytest
+
+from src.tracing import Tracer, is_sampled, new_trace_id, valid_trace_id
+
+
+class ListExporter:
+    def __init__(self):
+        self.spans = []
+        
+    def export(self, span):
+        self.spans.append(span)
+
+
+def test_valid_trace_id():
+    trace_id = new_trace_id()
+    assert valid_trace_id(trace_id) == trace_id
+    for bad in (None, '', 'xyz', trace_id[:-1], trace_id.upper(), trace_id + '0', 42, {'id': trace_id}):
+        assert valid_trace_id(bad) is None
+
+
+@pytest.mark.parametrize('bad', [None, '', 'not-hex-at-all', 'zzzzzzzz' * 4, 12345])
+def test_is_sampled_rejects_bad_ids(bad):
+    assert is_sampled(bad, 0.5) is False
+
+
+def test_is_sampled_is_deterministic():
+    assert is_sampled('00000000' + '0' * 24, 0.5)
+    assert not is_sampled('ffffffff' + '0' * 24, 0.5)
+    assert is_sampled('anything', 1.0)
+
+
+def test_malformed_trace_id_starts_a_fresh_trace():
+    tracer = Tracer(ListExporter(), sample_rate=1.0)
+    with tracer.start_trace('webhook', trace_id='../../etc') as span:
+        assert valid_trace_id(span.trace_id)
+        
+    trace_id = new_trace_id()
+    with tracer.start_trace('webhook', trace_id=trace_id) as span:
+        assert span.trace_id == trace_id
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from src.prompt_builder import PromptBuilder
+from src.transcript_batcher import TranscriptBatcher, parse_batch_response
+
+
+class EchoGateway:
+    def __init__(self, drop=()):
+        self.drop = drop
+        self.prompts = []
+        
+    def generate(self, prompt, **kwargs):
+        self.prompts.append(prompt)
+        if '[Call 0]' not in prompt:
+            return json.dumps({'interest': 'yes'})
+        count = prompt.count('[Call ')
+        return json.dumps([{'id': i, 'interest': 'yes'} for i in range(count) if i not in self.drop])
+
+
+def test_parse_batch_response_reads_ids():
+    results = parse_batch_response('```json\n[{"id": 1, "interest": "no"}, {"id": "0", "interest": "yes"}]\n```')
+    assert results == {1: {'interest': 'no'}, 0: {'interest': 'yes'}}
+
+
+def test_parse_batch_response_treats_malformed_items_as_missing():
+    results = parse_batch_response('[{"id": 0, "interest": "no"}, "oops", 3, null, ["id", 1], {"interest": "yes"}]')
+    assert results == {0: {'interest': 'no'}}
+    assert parse_batch_response('{"id": 0}') == {}
+
+
+def test_batched_transcripts_resolve_individually():
+    gateway = EchoGateway(drop={1})
+    batcher = TranscriptBatcher(gateway, PromptBuilder(), max_batch_size=3, max_wait=0.5)
+    results = [None] * 3
+    
+    def submit(i):
+        results[i] = batcher.submit(f"user: transcript {i}", timeout=5)
+        
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+        
+    assert len(gateway.prompts) == 1
+    assert sum(result is None for result in results) == 1
+    assert all(result == {'interest': 'yes'} for result in results if result is not None)
+
+
+class SlowGateway:
+    def __init__(self, delay):
+        self.delay = delay
+        
+    def generate(self, prompt, **kwargs):
+        time.sleep(self.delay)
+        raise asyncio.TimeoutError("LLM call deadline exceeded")
+
+
+class BrokenGateway:
+    def generate(self, prompt, **kwargs):
+        return 'not json'
+
+
+def test_batch_deadline_raises_timeout_for_every_member():
+    batcher = TranscriptBatcher(SlowGateway(0.05), PromptBuilder(), max_batch_size=2, max_wait=0.2)
+    errors = []
+    
+    def submit(i):
+        try:
+            batcher.submit(f"user: transcript {i}", timeout=5)
+        except Exception as e:
+            errors.append(e)
+            
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # A late joiner's own wait has not run out, but the batch it joined has
+    assert len(errors) == 2 and all(isinstance(error, TimeoutError) for error in errors)
+
+
+def test_waiting_too_long_raises_timeout():
+    batcher = TranscriptBatcher(SlowGateway(1.0), PromptBuilder(), max_batch_size=1, max_wait=0)
+    with pytest.raises(TimeoutError):
+        batcher.submit("user: transcript", timeout=0.05)
+
+
+def test_batch_failure_is_raised_not_hidden():
+    batcher = TranscriptBatcher(BrokenGateway(), PromptBuilder(), max_batch_size=1, max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.submit("user: transcript", timeout=5)
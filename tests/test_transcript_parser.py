@@ -0,0 +1,54 @@
+from src.transcript_parser import TranscriptParser
+
+PROMPT = "assistant: That's 100 POL in BTC. Please say the confirmation word to confirm."
+
+
+def parse(transcript):
+    return TranscriptParser().parse(transcript)
+
+
+def test_clear_decline_takes_the_fast_path():
+    result = parse("user: No thanks, I'm not interested.")
+    assert result['interest'] == 'no'
+    assert result['investment_completed'] == 'no'
+
+
+def test_confirmation_after_the_amount_prompt_completes():
+    result = parse(f"user: 100 into bitcoin\n{PROMPT}\nuser: rates, 100 in btc")
+    assert result['investment_completed'] == 'yes'
+    assert result['preferred_investment'] == 'BTC/USDT'
+    assert result['investment_amount'] == 100.0
+
+
+def test_question_about_rates_is_not_a_confirmation():
+    assert parse("user: What are BTC rates for 2025?") is None
+    assert parse("user: show me btc rates for 2025") is None
+
+
+def test_confirmation_word_without_a_prompt_is_escalated():
+    assert parse("user: put 100 into btc, rates") is None
+
+
+def test_confirmation_word_before_the_prompt_does_not_count():
+    assert parse(f"user: rates look good, 100 into btc\n{PROMPT}\nuser: ok 100 btc") is None
+
+
+def test_prompt_for_a_different_amount_does_not_count():
+    assert parse(f"{PROMPT}\nuser: rates, 250 in btc") is None
+
+
+def test_assistant_lines_are_not_read_as_the_user():
+    # Only the assistant mentions the symbol, the amount and the word
+    assert parse(f"{PROMPT}\nuser: ok") is None
+
+
+def test_unlabelled_and_unknown_speakers_are_escalated():
+    assert parse("No thanks") is None
+    assert parse("narrator: 100 in btc\nuser: rates") is None
+    assert parse("Say rates to confirm 100 POL in BTC. rates") is None
+
+
+def test_affirmative_amount_is_confirmed_but_not_completed():
+    result = parse("user: yes, 100 into bitcoin")
+    assert result['amount_confirmed'] == 'yes'
+    assert result['investment_completed'] == 'no'
@@ -0,0 +1,106 @@
+import time
+
+from src.user_scheduler import UserScheduler
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll until condition() holds or the timeout passes"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_users_due_together_are_checked_in_one_batch_call():
+    batches = []
+    singles = []
+    scheduler = UserScheduler(singles.append, interval=3600, max_workers=4, poll_interval=0.01,
+                              check_many_fn=batches.append)
+    for user_id in ('a', 'b', 'c'):
+        scheduler.add_user(user_id, delay=0)
+    scheduler.start()
+    try:
+        assert wait_for(lambda: scheduler.get_stats()['runs'] == 3)
+    finally:
+        scheduler.stop()
+    assert singles == []
+    assert batches == [['a', 'b', 'c']]
+    assert scheduler.get_stats()['running'] == 0
+
+
+def test_a_failed_batch_counts_every_user_and_reschedules_them():
+    def fail(user_ids):
+        raise RuntimeError("market data unavailable")
+
+    scheduler = UserScheduler(lambda user_id: None, interval=3600, max_workers=4, poll_interval=0.01,
+                              check_many_fn=fail)
+    scheduler.add_user('a', delay=0)
+    scheduler.add_user('b', delay=0)
+    scheduler.start()
+    try:
+        assert wait_for(lambda: scheduler.get_stats()['runs'] == 2)
+    finally:
+        scheduler.stop()
+    stats = scheduler.get_stats()
+    assert stats['failures'] == 2
+    assert stats['users'] == 2
+
+
+def take_batch(scheduler):
+    """Run one dispatch step by hand, without the dispatch thread"""
+    with scheduler._cond:
+        return [user_id for user_id, _, _ in scheduler._take_batch()]
+
+
+def test_due_users_come_out_by_priority_then_due_time():
+    scheduler = UserScheduler(lambda user_id: None)
+    scheduler.add_user('late', delay=-1)
+    scheduler.add_user('early', delay=-3)
+    scheduler.add_user('middle', delay=-2)
+    scheduler.add_user('not-yet', delay=60)
+    scheduler.prioritize('changed')
+    assert take_batch(scheduler) == ['changed', 'early', 'middle', 'late']
+
+
+def test_rescheduled_and_removed_users_skip_their_old_entries():
+    scheduler = UserScheduler(lambda user_id: None)
+    scheduler.add_user('a', delay=-2)
+    scheduler.add_user('a', delay=60)  # replaces the due entry, which stays in the heap
+    scheduler.add_user('b', delay=-1)
+    scheduler.remove_user('b')
+    scheduler.add_user('c', delay=-1)
+    scheduler.prioritize('c')  # two live-looking entries, only the newest counts
+    assert take_batch(scheduler) == ['c']
+    assert take_batch(scheduler) == []
+
+
+def test_batches_are_capped_by_free_worker_slots():
+    scheduler = UserScheduler(lambda user_id: None, max_workers=2, batch_size=10)
+    for i, user_id in enumerate(('a', 'b', 'c')):
+        scheduler.add_user(user_id, delay=-3 + i)
+    assert take_batch(scheduler) == ['a', 'b']
+    assert take_batch(scheduler) == []
+    
+    # Finishing a run frees its slot and schedules the user's next run
+    scheduler._finish('a', scheduler._live['a'], 0.0, 0.0, False)
+    assert take_batch(scheduler) == ['c']
+    assert scheduler.get_stats()['runs'] == 1
+
+
+def test_paused_scheduler_dispatches_nothing_until_resumed():
+    checked = []
+    scheduler = UserScheduler(checked.append, max_workers=2, poll_interval=0.01)
+    scheduler.start()
+    try:
+        scheduler.pause()
+        scheduler.add_user('a', delay=0)
+        time.sleep(0.1)
+        assert checked == []
+        assert scheduler.get_stats()['users'] == 1
+        
+        scheduler.resume()
+        assert wait_for(lambda: checked == ['a'])
+    finally:
+        scheduler.stop()
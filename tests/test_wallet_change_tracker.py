@@ -0,0 +1,91 @@
+import threading
+import time
+
+from src.wallet_change_tracker import WalletChangeTracker, relative_change
+
+
+class FakeWallet:
+    def __init__(self, wallet_id, balance=100.0):
+        self.wallet_id = wallet_id
+        self.balance = balance
+        self.listeners = []
+        
+    def add_change_listener(self, listener):
+        self.listeners.append(listener)
+        
+    def get_ethereum_balance(self):
+        return self.balance
+        
+    def calculate_spending_patterns(self):
+        return {'monthly_average': 10.0}
+        
+    def change(self, balance):
+        self.balance = balance
+        for listener in self.listeners:
+            listener(self, 'balance')
+
+
+class Recorder:
+    def __init__(self):
+        self.users = []
+        self.event = threading.Event()
+        
+    def __call__(self, user_id):
+        self.users.append(user_id)
+        self.event.set()
+
+
+def make_tracker(on_dirty):
+    return WalletChangeTracker(on_dirty, balance_threshold=0.05, debounce=0.05, max_delay=0.5)
+
+
+def test_relative_change():
+    assert relative_change(100, 110) == 0.1
+    assert relative_change(0, 5) == 1.0
+    assert relative_change(3, 3) == 0.0
+
+
+def test_each_user_is_woken_by_their_own_wallet():
+    recorder = Recorder()
+    tracker = make_tracker(recorder)
+    alice, bob = FakeWallet('wallet-a'), FakeWallet('wallet-b')
+    tracker.watch('+1001', alice)
+    tracker.watch('+1002', bob)
+    try:
+        alice.change(200.0)
+        assert recorder.event.wait(2)
+        time.sleep(0.2)
+        assert recorder.users == ['+1001']
+    finally:
+        tracker.stop()
+
+
+def test_shared_wallet_is_tracked_once():
+    recorder = Recorder()
+    tracker = make_tracker(recorder)
+    shared = FakeWallet('wallet-shared')
+    tracker.watch('+1001', shared)
+    tracker.watch('+1002', shared)
+    try:
+        assert len(shared.listeners) == 1
+        shared.change(200.0)
+        assert recorder.event.wait(2)
+        time.sleep(0.2)
+        assert sorted(recorder.users) == ['+1001', '+1002']
+        assert tracker.get_stats()['evaluations'] == 1
+    finally:
+        tracker.stop()
+
+
+def test_insignificant_change_does_not_wake_anyone():
+    recorder = Recorder()
+    tracker = make_tracker(recorder)
+    wallet = FakeWallet('wallet-a')
+    tracker.watch('+1001', wallet)
+    try:
+        wallet.change(101.0)
+        time.sleep(0.3)
+        assert recorder.users == []
+        assert tracker.get_stats()['evaluations'] == 1
+    finally:
+        tracker.stop()